@@ -0,0 +1,104 @@
+-- ========================================
+-- ANYCOMPANY - TABLES D'AGRÉGATS ANALYTICS
+-- Phase 1 ter : SILVER / flags promotion → ANALYTICS
+-- Agrégats journaliers lus par les dashboards Streamlit à la place de la table de faits
+-- À exécuter une fois après promotion_flags.sql : Snowflake les rafraîchit ensuite seul
+-- ========================================
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA ANALYTICS;
+
+-- Tables dynamiques : Snowflake planifie lui-même le rafraîchissement (incrémental
+-- quand c'est possible) pour que les agrégats n'aient jamais plus de TARGET_LAG de retard
+-- sur SILVER et sur transaction_promotion_flags. Les dashboards lisent ces tables ; seul
+-- le mode "Calcul local des chevauchements" lit encore les ventes détaillées.
+--
+-- Grain journalier + région + méthode de paiement : les filtres de la sidebar
+-- (période, régions, paiements) restent applicables sur chaque agrégat.
+-- Les moyennes sont recalculées côté dashboard en SUM(total_sales) / SUM(number_of_sales).
+
+-- ========================================
+-- 1. VENTES JOURNALIÈRES PAR RÉGION ET MÉTHODE DE PAIEMENT
+-- ========================================
+
+-- promotion_status est NULL pour les ventes pas encore flaguées par promotion_flags.sql :
+-- les requêtes avec/sans promotion les excluent, comme elles le faisaient sur la table de flags
+CREATE OR REPLACE DYNAMIC TABLE daily_sales
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = ANALYTICS_WH
+AS
+SELECT
+    t.transaction_date,
+    t.transaction_year,
+    t.region,
+    t.payment_method,
+    f.promotion_status,
+    COUNT(*) AS number_of_sales,
+    SUM(t.amount) AS total_sales
+FROM SILVER.financial_transactions_clean t
+LEFT JOIN transaction_promotion_flags f
+    ON f.transaction_id = t.transaction_id
+WHERE t.transaction_type = 'Sale'
+GROUP BY t.transaction_date, t.transaction_year, t.region, t.payment_method, f.promotion_status;
+
+-- ========================================
+-- 2. PERFORMANCE PAR PROMOTION
+-- ========================================
+
+-- Ventes attribuées à chaque promotion_id (règle d'attribution de promotion_flags.sql)
+CREATE OR REPLACE DYNAMIC TABLE promotion_performance
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = ANALYTICS_WH
+AS
+SELECT
+    promotion_id,
+    promotion_type,
+    product_category,
+    region,
+    discount_percentage,
+    transaction_date,
+    payment_method,
+    COUNT(*) AS number_of_sales,
+    SUM(amount) AS total_sales
+FROM transaction_promotion_flags
+WHERE promotion_id IS NOT NULL
+GROUP BY promotion_id, promotion_type, product_category, region, discount_percentage,
+         transaction_date, payment_method;
+
+-- ========================================
+-- 3. PERFORMANCE PAR TYPE DE CAMPAGNE
+-- ========================================
+
+-- Ventes réalisées pendant une campagne de la même région, par type de campagne.
+-- Même jointure que l'analyse d'impact : une vente couverte par deux campagnes compte deux fois.
+-- campaign_type est NULL pour les ventes hors campagne.
+CREATE OR REPLACE DYNAMIC TABLE campaign_type_performance
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = ANALYTICS_WH
+AS
+SELECT
+    t.transaction_date,
+    t.region,
+    t.payment_method,
+    CASE WHEN c.campaign_id IS NOT NULL THEN 'Pendant Campagne' ELSE 'Hors Campagne' END AS campaign_status,
+    c.campaign_type,
+    COUNT(*) AS number_of_sales,
+    SUM(t.amount) AS total_sales
+FROM SILVER.financial_transactions_clean t
+LEFT JOIN SILVER.marketing_campaigns_clean c
+    ON t.region = c.region AND t.transaction_date BETWEEN c.start_date AND c.end_date
+WHERE t.transaction_type = 'Sale'
+GROUP BY t.transaction_date, t.region, t.payment_method, campaign_status, c.campaign_type;
+
+-- ========================================
+-- VÉRIFICATIONS
+-- ========================================
+
+SELECT 'daily_sales' AS table_name, COUNT(*) AS nb_lignes, SUM(number_of_sales) AS ventes, SUM(total_sales) AS ca
+FROM daily_sales
+UNION ALL
+SELECT 'promotion_performance', COUNT(*), SUM(number_of_sales), SUM(total_sales)
+FROM promotion_performance
+UNION ALL
+SELECT 'campaign_type_performance', COUNT(*), SUM(number_of_sales), SUM(total_sales)
+FROM campaign_type_performance;
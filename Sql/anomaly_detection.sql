@@ -0,0 +1,328 @@
+-- ========================================
+-- ANYCOMPANY - DÉTECTION D'ANOMALIES INCRÉMENTALE
+-- Phase 1 ter : SILVER → ANALYTICS
+-- Remplace la section 7 de sales_trends.sql (3 écarts-types, baisse mensuelle > 10 %)
+-- À exécuter après promotion_flags.sql, à chaque chargement : seules les ventes flaguées,
+-- modifiées ou retirées depuis le dernier passage sont lues
+-- ========================================
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA ANALYTICS;
+
+-- Les statistiques (effectif, moyenne, somme des carrés des écarts M2) sont tenues
+-- par dimension : toutes les ventes (GLOBAL), par région et par méthode de paiement.
+-- Le lot est lu dans ANALYTICS.transaction_promotion_flags (une ligne par vente de SILVER)
+-- d'après refreshed_at, au-delà du dernier passage enregistré dans anomaly_refreshes.
+-- Une vente modifiée dans SILVER y est de nouveau flaguée : son ancienne version, journalisée
+-- dans transaction_flag_changes, est d'abord retirée des moments, puis la nouvelle est ajoutée.
+-- Chaque partie du lot est résumée par ses propres moments, puis fusionnée avec les moments
+-- existants (formule de Chan / Welford) : l'historique n'est jamais relu.
+--   ajout   : n = n_a + n_b,  μ = μ_a + δ · n_b / n,  M2 = M2_a + M2_b + δ² · n_a · n_b / n
+--   retrait : n_a = n - n_b,  μ_a = (n · μ - n_b · μ_b) / n_a,  M2_a = M2 - M2_b - δ² · n_a · n_b / n
+--             avec δ = μ_b - μ_a
+--   σ    = SQRT(M2 / (n - 1))                      (STDDEV de sales_trends.sql)
+-- Les totaux mensuels sont cumulés de la même façon : un lot ne réévalue que les
+-- mois qu'il touche et le mois suivant.
+-- Le journal transaction_flag_changes est conservé 90 jours : lancer le script au moins
+-- une fois sur cette période (sinon vider anomaly_refreshes pour tout recalculer).
+
+-- ========================================
+-- 1. TABLES PERSISTANTES
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS sales_amount_moments (
+    dimension VARCHAR(20),
+    dimension_value VARCHAR(100),
+    n NUMBER(18,0),
+    mean_amount DOUBLE,
+    m2_amount DOUBLE,
+    updated_at TIMESTAMP_NTZ
+);
+
+CREATE TABLE IF NOT EXISTS monthly_sales_totals (
+    mois DATE,
+    dimension VARCHAR(20),
+    dimension_value VARCHAR(100),
+    nb_ventes NUMBER(18,0),
+    total_ventes NUMBER(18,2),
+    updated_at TIMESTAMP_NTZ
+);
+
+-- source_refreshed_at : plus récent refreshed_at (ou changed_at de transaction_flag_changes)
+-- pris en compte dans les moments et les totaux
+CREATE TABLE IF NOT EXISTS anomaly_refreshes (
+    refreshed_at TIMESTAMP_NTZ,
+    source_refreshed_at TIMESTAMP_NTZ,
+    ventes_ajoutees NUMBER(18,0),
+    ventes_retirees NUMBER(18,0)
+);
+
+-- TRANSACTION EXCEPTIONNELLE : amount = montant, reference_value = moyenne, score = nb d'écarts-types
+-- BAISSE MENSUELLE : amount = ventes du mois, reference_value = mois précédent, score = variation %
+CREATE TABLE IF NOT EXISTS sales_anomaly_alerts (
+    alert_type VARCHAR(30),
+    dimension VARCHAR(20),
+    dimension_value VARCHAR(100),
+    transaction_id VARCHAR(50),
+    alert_date DATE,
+    amount NUMBER(18,2),
+    reference_value NUMBER(18,2),
+    score NUMBER(10,2),
+    detected_at TIMESTAMP_NTZ
+);
+
+-- ========================================
+-- 2. NOUVEAU LOT
+-- ========================================
+
+-- Bornes du lot : ventes flaguées ou retirées depuis le dernier passage, jusqu'à maintenant
+CREATE OR REPLACE TEMPORARY TABLE lot_courant AS
+SELECT
+    (SELECT MAX(source_refreshed_at) FROM anomaly_refreshes) AS depuis,
+    (
+        SELECT MAX(horodatage)
+        FROM (
+            SELECT MAX(refreshed_at) AS horodatage FROM transaction_promotion_flags
+            UNION ALL
+            SELECT MAX(changed_at) FROM transaction_flag_changes
+        ) h
+    ) AS jusqu_a;
+
+-- Premier passage : tout est recalculé depuis les flags
+DELETE FROM sales_amount_moments WHERE (SELECT depuis FROM lot_courant) IS NULL;
+DELETE FROM monthly_sales_totals WHERE (SELECT depuis FROM lot_courant) IS NULL;
+DELETE FROM sales_anomaly_alerts WHERE (SELECT depuis FROM lot_courant) IS NULL;
+
+-- signe = 1 : version actuelle d'une vente flaguée depuis le dernier passage
+-- signe = -1 : ancienne version déjà comptée (refreshed_at <= depuis) d'une vente modifiée ou retirée
+CREATE OR REPLACE TEMPORARY TABLE ventes_a_analyser AS
+SELECT
+    1 AS signe,
+    f.transaction_id,
+    f.transaction_date,
+    f.region,
+    f.payment_method,
+    f.amount
+FROM transaction_promotion_flags f
+CROSS JOIN lot_courant l
+WHERE f.amount IS NOT NULL
+  AND f.transaction_date IS NOT NULL
+  AND (l.depuis IS NULL OR f.refreshed_at > l.depuis)
+  AND f.refreshed_at <= l.jusqu_a
+UNION ALL
+SELECT
+    -1 AS signe,
+    c.transaction_id,
+    c.transaction_date,
+    c.region,
+    c.payment_method,
+    c.amount
+FROM transaction_flag_changes c
+CROSS JOIN lot_courant l
+WHERE c.amount IS NOT NULL
+  AND c.transaction_date IS NOT NULL
+  AND c.changed_at > l.depuis
+  AND c.changed_at <= l.jusqu_a
+  AND c.refreshed_at <= l.depuis;
+
+-- Une ligne par vente et par dimension suivie
+CREATE OR REPLACE TEMPORARY TABLE ventes_par_dimension AS
+SELECT signe, 'GLOBAL' AS dimension, 'Toutes' AS dimension_value, transaction_id, transaction_date, amount
+FROM ventes_a_analyser
+UNION ALL
+SELECT signe, 'REGION', region, transaction_id, transaction_date, amount
+FROM ventes_a_analyser
+WHERE region IS NOT NULL
+UNION ALL
+SELECT signe, 'PAYMENT_METHOD', payment_method, transaction_id, transaction_date, amount
+FROM ventes_a_analyser
+WHERE payment_method IS NOT NULL;
+
+-- ========================================
+-- 3. MOMENTS GLISSANTS
+-- ========================================
+
+-- Retrait des anciennes versions (μ_a et M2_a ci-dessus ; moments remis à zéro si tout est retiré)
+MERGE INTO sales_amount_moments m
+USING (
+    SELECT
+        dimension,
+        dimension_value,
+        COUNT(*) AS n,
+        AVG(amount) AS mean_amount,
+        VAR_POP(amount) * COUNT(*) AS m2_amount
+    FROM ventes_par_dimension
+    WHERE signe = -1
+    GROUP BY dimension, dimension_value
+) b
+ON m.dimension = b.dimension
+    AND m.dimension_value = b.dimension_value
+WHEN MATCHED THEN UPDATE SET
+    n = GREATEST(m.n - b.n, 0),
+    mean_amount = CASE WHEN m.n > b.n
+        THEN (m.n * m.mean_amount - b.n * b.mean_amount) / (m.n - b.n)
+        ELSE 0 END,
+    m2_amount = CASE WHEN m.n > b.n
+        THEN GREATEST(m.m2_amount - b.m2_amount
+            - POWER(b.mean_amount - (m.n * m.mean_amount - b.n * b.mean_amount) / (m.n - b.n), 2)
+              * (m.n - b.n) * b.n / m.n, 0)
+        ELSE 0 END,
+    updated_at = CURRENT_TIMESTAMP();
+
+-- Ajout des nouvelles versions
+MERGE INTO sales_amount_moments m
+USING (
+    SELECT
+        dimension,
+        dimension_value,
+        COUNT(*) AS n,
+        AVG(amount) AS mean_amount,
+        VAR_POP(amount) * COUNT(*) AS m2_amount
+    FROM ventes_par_dimension
+    WHERE signe = 1
+    GROUP BY dimension, dimension_value
+) b
+ON m.dimension = b.dimension
+    AND m.dimension_value = b.dimension_value
+WHEN MATCHED THEN UPDATE SET
+    n = m.n + b.n,
+    mean_amount = m.mean_amount + (b.mean_amount - m.mean_amount) * b.n / (m.n + b.n),
+    m2_amount = m.m2_amount + b.m2_amount
+        + POWER(b.mean_amount - m.mean_amount, 2) * m.n * b.n / (m.n + b.n),
+    updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (
+    dimension, dimension_value, n, mean_amount, m2_amount, updated_at
+) VALUES (
+    b.dimension, b.dimension_value, b.n, b.mean_amount, b.m2_amount, CURRENT_TIMESTAMP()
+);
+
+-- ========================================
+-- 4. TRANSACTIONS EXCEPTIONNELLES (> 3 ÉCARTS-TYPES)
+-- ========================================
+
+-- Chaque vente ajoutée est comparée aux moments de sa région, de sa méthode de
+-- paiement et de l'ensemble des ventes (au moins 30 ventes pour un écart-type stable).
+-- Les alertes des ventes modifiées ou retirées sont d'abord supprimées.
+DELETE FROM sales_anomaly_alerts
+USING (SELECT DISTINCT transaction_id FROM ventes_a_analyser) v
+WHERE sales_anomaly_alerts.alert_type = 'TRANSACTION EXCEPTIONNELLE'
+  AND sales_anomaly_alerts.transaction_id = v.transaction_id;
+
+INSERT INTO sales_anomaly_alerts (
+    alert_type, dimension, dimension_value, transaction_id, alert_date,
+    amount, reference_value, score, detected_at
+)
+SELECT
+    'TRANSACTION EXCEPTIONNELLE',
+    v.dimension,
+    v.dimension_value,
+    v.transaction_id,
+    v.transaction_date,
+    v.amount,
+    ROUND(m.mean_amount, 2),
+    ROUND((v.amount - m.mean_amount) / SQRT(m.m2_amount / (m.n - 1)), 2),
+    CURRENT_TIMESTAMP()
+FROM ventes_par_dimension v
+INNER JOIN sales_amount_moments m
+    ON m.dimension = v.dimension
+    AND m.dimension_value = v.dimension_value
+WHERE v.signe = 1
+  AND m.n >= 30
+  AND m.m2_amount > 0
+  AND v.amount > m.mean_amount + 3 * SQRT(m.m2_amount / (m.n - 1));
+
+-- ========================================
+-- 5. BAISSES MENSUELLES (> 10 %)
+-- ========================================
+
+MERGE INTO monthly_sales_totals t
+USING (
+    SELECT
+        DATE_TRUNC('month', transaction_date) AS mois,
+        dimension,
+        dimension_value,
+        SUM(signe) AS nb_ventes,
+        SUM(signe * amount) AS total_ventes
+    FROM ventes_par_dimension
+    GROUP BY DATE_TRUNC('month', transaction_date), dimension, dimension_value
+) b
+ON t.mois = b.mois
+    AND t.dimension = b.dimension
+    AND t.dimension_value = b.dimension_value
+WHEN MATCHED THEN UPDATE SET
+    nb_ventes = t.nb_ventes + b.nb_ventes,
+    total_ventes = t.total_ventes + b.total_ventes,
+    updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (
+    mois, dimension, dimension_value, nb_ventes, total_ventes, updated_at
+) VALUES (
+    b.mois, b.dimension, b.dimension_value, b.nb_ventes, b.total_ventes, CURRENT_TIMESTAMP()
+);
+
+-- Mois dont toutes les ventes ont été retirées ou déplacées
+DELETE FROM monthly_sales_totals
+WHERE nb_ventes <= 0;
+
+-- Mois dont la variation a pu changer : ceux du lot et le mois qui suit chacun d'eux
+CREATE OR REPLACE TEMPORARY TABLE mois_a_reevaluer AS
+SELECT DISTINCT dimension, dimension_value, DATE_TRUNC('month', transaction_date) AS mois
+FROM ventes_par_dimension
+UNION
+SELECT DISTINCT dimension, dimension_value, DATEADD(month, 1, DATE_TRUNC('month', transaction_date)) AS mois
+FROM ventes_par_dimension;
+
+DELETE FROM sales_anomaly_alerts
+USING mois_a_reevaluer r
+WHERE sales_anomaly_alerts.alert_type = 'BAISSE MENSUELLE'
+  AND sales_anomaly_alerts.dimension = r.dimension
+  AND sales_anomaly_alerts.dimension_value = r.dimension_value
+  AND sales_anomaly_alerts.alert_date = r.mois;
+
+-- Comparaison au mois calendaire précédent (LAG de sales_trends.sql)
+INSERT INTO sales_anomaly_alerts (
+    alert_type, dimension, dimension_value, transaction_id, alert_date,
+    amount, reference_value, score, detected_at
+)
+SELECT
+    'BAISSE MENSUELLE',
+    r.dimension,
+    r.dimension_value,
+    NULL,
+    r.mois,
+    cur.total_ventes,
+    prev.total_ventes,
+    ROUND((cur.total_ventes - prev.total_ventes) * 100.0 / prev.total_ventes, 2),
+    CURRENT_TIMESTAMP()
+FROM mois_a_reevaluer r
+INNER JOIN monthly_sales_totals cur
+    ON cur.dimension = r.dimension
+    AND cur.dimension_value = r.dimension_value
+    AND cur.mois = r.mois
+INNER JOIN monthly_sales_totals prev
+    ON prev.dimension = r.dimension
+    AND prev.dimension_value = r.dimension_value
+    AND prev.mois = DATEADD(month, -1, r.mois)
+WHERE prev.total_ventes > 0
+  AND (cur.total_ventes - prev.total_ventes) * 100.0 / prev.total_ventes < -10;
+
+-- Le lot est pris en compte
+INSERT INTO anomaly_refreshes (refreshed_at, source_refreshed_at, ventes_ajoutees, ventes_retirees)
+SELECT
+    CURRENT_TIMESTAMP(),
+    COALESCE(l.jusqu_a, l.depuis),
+    (SELECT COUNT(*) FROM ventes_a_analyser WHERE signe = 1),
+    (SELECT COUNT(*) FROM ventes_a_analyser WHERE signe = -1)
+FROM lot_courant l;
+
+-- ========================================
+-- VÉRIFICATIONS
+-- ========================================
+
+SELECT
+    'Alertes à jour' AS status,
+    (SELECT COUNT(*) FROM ventes_a_analyser WHERE signe = 1) AS ventes_analysees,
+    (SELECT COUNT(*) FROM ventes_a_analyser WHERE signe = -1) AS ventes_retirees,
+    SUM(CASE WHEN alert_type = 'TRANSACTION EXCEPTIONNELLE' THEN 1 ELSE 0 END) AS transactions_exceptionnelles,
+    SUM(CASE WHEN alert_type = 'BAISSE MENSUELLE' THEN 1 ELSE 0 END) AS baisses_mensuelles,
+    (SELECT MAX(n) FROM sales_amount_moments WHERE dimension = 'GLOBAL') AS ventes_suivies
+FROM sales_anomaly_alerts;
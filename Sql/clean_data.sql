@@ -6,6 +6,16 @@
 USE DATABASE ANYCOMPANY_LAB;
 USE SCHEMA SILVER;
 
+-- Clés de clustering : les ventes, promotions et campagnes sont filtrées par période
+-- et jointes par région (jointures par plage de dates région = région). Les tables
+-- sont triées sur la clé dès leur création, puis Snowflake maintient le clustering
+-- au fil des MERGE de clean_data_incremental.sql. Suivi : Sql/pruning_report.sql
+
+-- Identifiant du lot de chargement, journalisé dans load_batches. Chaque vente de
+-- financial_transactions_clean porte le lot qui l'a écrite en dernier : promotion_flags.sql
+-- ne relit que les ventes des lots postérieurs à son dernier passage
+SET load_batch_id = (SELECT TO_VARCHAR(CURRENT_TIMESTAMP(), 'YYYYMMDDHH24MISSFF3'));
+
 -- ========================================
 -- 1. CUSTOMER DEMOGRAPHICS CLEAN
 -- ========================================
@@ -34,7 +44,8 @@ QUALIFY ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY name) = 1;
 -- ========================================
 -- 2. FINANCIAL TRANSACTIONS CLEAN
 -- ========================================
-CREATE OR REPLACE TABLE financial_transactions_clean AS
+CREATE OR REPLACE TABLE financial_transactions_clean
+CLUSTER BY (region, transaction_date) AS
 SELECT 
     transaction_id,
     transaction_date,
@@ -46,17 +57,20 @@ SELECT
     TRIM(account_code) AS account_code,
     YEAR(transaction_date) AS transaction_year,
     QUARTER(transaction_date) AS transaction_quarter,
-    MONTH(transaction_date) AS transaction_month
+    MONTH(transaction_date) AS transaction_month,
+    $load_batch_id AS load_batch_id
 FROM BRONZE.financial_transactions
 WHERE transaction_id IS NOT NULL
   AND transaction_date IS NOT NULL
   AND amount IS NOT NULL
-QUALIFY ROW_NUMBER() OVER (PARTITION BY transaction_id ORDER BY transaction_date DESC) = 1;
+QUALIFY ROW_NUMBER() OVER (PARTITION BY transaction_id ORDER BY transaction_date DESC) = 1
+ORDER BY region, transaction_date;
 
 -- ========================================
 -- 3. PROMOTIONS CLEAN
 -- ========================================
-CREATE OR REPLACE TABLE promotions_clean AS
+CREATE OR REPLACE TABLE promotions_clean
+CLUSTER BY (region, start_date) AS
 SELECT 
     promotion_id,
     TRIM(product_category) AS product_category,
@@ -74,12 +88,14 @@ WHERE promotion_id IS NOT NULL
   AND start_date IS NOT NULL
   AND end_date IS NOT NULL
   AND start_date <= end_date
-QUALIFY ROW_NUMBER() OVER (PARTITION BY promotion_id ORDER BY start_date) = 1;
+QUALIFY ROW_NUMBER() OVER (PARTITION BY promotion_id ORDER BY start_date) = 1
+ORDER BY region, start_date;
 
 -- ========================================
 -- 4. MARKETING CAMPAIGNS CLEAN
 -- ========================================
-CREATE OR REPLACE TABLE marketing_campaigns_clean AS
+CREATE OR REPLACE TABLE marketing_campaigns_clean
+CLUSTER BY (region, start_date) AS
 SELECT 
     campaign_id,
     TRIM(campaign_name) AS campaign_name,
@@ -112,7 +128,8 @@ WHERE campaign_id IS NOT NULL
   AND start_date IS NOT NULL
   AND end_date IS NOT NULL
   AND start_date <= end_date
-QUALIFY ROW_NUMBER() OVER (PARTITION BY campaign_id ORDER BY start_date) = 1;
+QUALIFY ROW_NUMBER() OVER (PARTITION BY campaign_id ORDER BY start_date) = 1
+ORDER BY region, start_date;
 
 -- ========================================
 -- 5. PRODUCT REVIEWS CLEAN
@@ -294,6 +311,47 @@ FROM BRONZE.employee_records
 WHERE employee_id IS NOT NULL
 QUALIFY ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY hire_date) = 1;
 
+-- ========================================
+-- 12. INITIALISATION DU MODE INCRÉMENTAL
+-- ========================================
+
+-- Journal des lots de chargement (lu par clean_data_incremental.sql)
+CREATE TABLE IF NOT EXISTS load_batches (
+    load_batch_id VARCHAR(50),
+    table_name VARCHAR(100),
+    rows_inserted INTEGER,
+    rows_updated INTEGER,
+    loaded_at TIMESTAMP_LTZ
+);
+
+-- Watermarks : un stream par table BRONZE, positionné après les lignes
+-- qui viennent d'être nettoyées. clean_data_incremental.sql ne traitera
+-- que les lignes chargées après ce point.
+CREATE OR REPLACE STREAM bronze_customer_demographics_stream ON TABLE BRONZE.customer_demographics APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_financial_transactions_stream ON TABLE BRONZE.financial_transactions APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_promotions_data_stream ON TABLE BRONZE.promotions_data APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_marketing_campaigns_stream ON TABLE BRONZE.marketing_campaigns APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_product_reviews_stream ON TABLE BRONZE.product_reviews APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_customer_service_interactions_stream ON TABLE BRONZE.customer_service_interactions APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_inventory_stream ON TABLE BRONZE.inventory APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_store_locations_stream ON TABLE BRONZE.store_locations APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_logistics_and_shipping_stream ON TABLE BRONZE.logistics_and_shipping APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_supplier_information_stream ON TABLE BRONZE.supplier_information APPEND_ONLY = TRUE;
+CREATE OR REPLACE STREAM bronze_employee_records_stream ON TABLE BRONZE.employee_records APPEND_ONLY = TRUE;
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id AS load_batch_id, 'customer_demographics_clean' AS table_name, COUNT(*) AS rows_inserted, 0 AS rows_updated, CURRENT_TIMESTAMP() AS loaded_at FROM customer_demographics_clean
+UNION ALL SELECT $load_batch_id, 'financial_transactions_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM financial_transactions_clean
+UNION ALL SELECT $load_batch_id, 'promotions_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM promotions_clean
+UNION ALL SELECT $load_batch_id, 'marketing_campaigns_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM marketing_campaigns_clean
+UNION ALL SELECT $load_batch_id, 'product_reviews_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM product_reviews_clean
+UNION ALL SELECT $load_batch_id, 'customer_service_interactions_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM customer_service_interactions_clean
+UNION ALL SELECT $load_batch_id, 'inventory_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM inventory_clean
+UNION ALL SELECT $load_batch_id, 'store_locations_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM store_locations_clean
+UNION ALL SELECT $load_batch_id, 'logistics_and_shipping_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM logistics_and_shipping_clean
+UNION ALL SELECT $load_batch_id, 'supplier_information_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM supplier_information_clean
+UNION ALL SELECT $load_batch_id, 'employee_records_clean', COUNT(*), 0, CURRENT_TIMESTAMP() FROM employee_records_clean;
+
 -- ========================================
 -- VÉRIFICATIONS FINALES
 -- ========================================
@@ -0,0 +1,597 @@
+-- ========================================
+-- ANYCOMPANY - NETTOYAGE INCRÉMENTAL
+-- Phase 1 : BRONZE → SILVER (mode incrémental)
+-- ========================================
+
+-- Ne traite que les lignes chargées dans BRONZE depuis le dernier passage.
+-- Le watermark de chaque table est l'offset d'un stream Snowflake
+-- (bronze_<table>_stream, créé par clean_data.sql) : il n'avance que
+-- lorsque le MERGE qui le consomme est validé, un échec ne perd donc aucune ligne.
+--
+-- Chaque MERGE reprend les règles de clean_data.sql. Pour une clé déjà présente
+-- dans SILVER, la nouvelle ligne ne remplace l'existante que si elle aurait gagné
+-- le ROW_NUMBER() de la reconstruction complète (à égalité, le chargement le plus
+-- récent l'emporte).
+--
+-- Pré-requis : avoir exécuté clean_data.sql une fois, puis charger les nouveaux
+-- fichiers avec COPY INTO sans recréer les tables BRONZE (un CREATE OR REPLACE
+-- TABLE invalide les streams : relancer alors clean_data.sql).
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA SILVER;
+
+-- Identifiant du lot de chargement, journalisé dans load_batches et porté par les
+-- ventes insérées ou mises à jour (load_batch_id de financial_transactions_clean)
+SET load_batch_id = (SELECT TO_VARCHAR(CURRENT_TIMESTAMP(), 'YYYYMMDDHH24MISSFF3'));
+
+-- ========================================
+-- 1. CUSTOMER DEMOGRAPHICS CLEAN
+-- ========================================
+MERGE INTO customer_demographics_clean tgt
+USING (
+    SELECT 
+        customer_id,
+        TRIM(name) AS name,
+        date_of_birth,
+        CASE 
+            WHEN gender IN ('Male', 'Female', 'Other') THEN gender
+            ELSE 'Unknown'
+        END AS gender,
+        TRIM(region) AS region,
+        TRIM(country) AS country,
+        TRIM(city) AS city,
+        TRIM(marital_status) AS marital_status,
+        CASE 
+            WHEN annual_income > 0 THEN annual_income
+            ELSE NULL
+        END AS annual_income,
+        YEAR(CURRENT_DATE()) - YEAR(date_of_birth) AS age
+    FROM bronze_customer_demographics_stream
+    WHERE customer_id IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY name) = 1
+) src
+ON tgt.customer_id = src.customer_id
+WHEN MATCHED AND src.name <= tgt.name THEN UPDATE SET
+    name = src.name,
+    date_of_birth = src.date_of_birth,
+    gender = src.gender,
+    region = src.region,
+    country = src.country,
+    city = src.city,
+    marital_status = src.marital_status,
+    annual_income = src.annual_income,
+    age = src.age
+WHEN NOT MATCHED THEN INSERT (
+    customer_id, name, date_of_birth, gender, region, country, city, marital_status,
+    annual_income, age
+) VALUES (
+    src.customer_id, src.name, src.date_of_birth, src.gender, src.region, src.country,
+    src.city, src.marital_status, src.annual_income, src.age
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'customer_demographics_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 2. FINANCIAL TRANSACTIONS CLEAN
+-- ========================================
+MERGE INTO financial_transactions_clean tgt
+USING (
+    SELECT 
+        transaction_id,
+        transaction_date,
+        TRIM(transaction_type) AS transaction_type,
+        ABS(amount) AS amount,
+        TRIM(payment_method) AS payment_method,
+        TRIM(entity) AS entity,
+        TRIM(region) AS region,
+        TRIM(account_code) AS account_code,
+        YEAR(transaction_date) AS transaction_year,
+        QUARTER(transaction_date) AS transaction_quarter,
+        MONTH(transaction_date) AS transaction_month
+    FROM bronze_financial_transactions_stream
+    WHERE transaction_id IS NOT NULL
+      AND transaction_date IS NOT NULL
+      AND amount IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY transaction_id ORDER BY transaction_date DESC) = 1
+) src
+ON tgt.transaction_id = src.transaction_id
+WHEN MATCHED AND src.transaction_date >= tgt.transaction_date THEN UPDATE SET
+    transaction_date = src.transaction_date,
+    transaction_type = src.transaction_type,
+    amount = src.amount,
+    payment_method = src.payment_method,
+    entity = src.entity,
+    region = src.region,
+    account_code = src.account_code,
+    transaction_year = src.transaction_year,
+    transaction_quarter = src.transaction_quarter,
+    transaction_month = src.transaction_month,
+    load_batch_id = $load_batch_id
+WHEN NOT MATCHED THEN INSERT (
+    transaction_id, transaction_date, transaction_type, amount, payment_method, entity,
+    region, account_code, transaction_year, transaction_quarter, transaction_month,
+    load_batch_id
+) VALUES (
+    src.transaction_id, src.transaction_date, src.transaction_type, src.amount,
+    src.payment_method, src.entity, src.region, src.account_code, src.transaction_year,
+    src.transaction_quarter, src.transaction_month, $load_batch_id
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'financial_transactions_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 3. PROMOTIONS CLEAN
+-- ========================================
+MERGE INTO promotions_clean tgt
+USING (
+    SELECT 
+        promotion_id,
+        TRIM(product_category) AS product_category,
+        TRIM(promotion_type) AS promotion_type,
+        CASE 
+            WHEN discount_percentage BETWEEN 0 AND 1 THEN discount_percentage
+            ELSE NULL
+        END AS discount_percentage,
+        start_date,
+        end_date,
+        TRIM(region) AS region,
+        DATEDIFF(day, start_date, end_date) AS promotion_duration_days
+    FROM bronze_promotions_data_stream
+    WHERE promotion_id IS NOT NULL
+      AND start_date IS NOT NULL
+      AND end_date IS NOT NULL
+      AND start_date <= end_date
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY promotion_id ORDER BY start_date) = 1
+) src
+ON tgt.promotion_id = src.promotion_id
+WHEN MATCHED AND src.start_date <= tgt.start_date THEN UPDATE SET
+    product_category = src.product_category,
+    promotion_type = src.promotion_type,
+    discount_percentage = src.discount_percentage,
+    start_date = src.start_date,
+    end_date = src.end_date,
+    region = src.region,
+    promotion_duration_days = src.promotion_duration_days
+WHEN NOT MATCHED THEN INSERT (
+    promotion_id, product_category, promotion_type, discount_percentage, start_date,
+    end_date, region, promotion_duration_days
+) VALUES (
+    src.promotion_id, src.product_category, src.promotion_type, src.discount_percentage,
+    src.start_date, src.end_date, src.region, src.promotion_duration_days
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'promotions_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 4. MARKETING CAMPAIGNS CLEAN
+-- ========================================
+MERGE INTO marketing_campaigns_clean tgt
+USING (
+    SELECT 
+        campaign_id,
+        TRIM(campaign_name) AS campaign_name,
+        TRIM(campaign_type) AS campaign_type,
+        TRIM(product_category) AS product_category,
+        TRIM(target_audience) AS target_audience,
+        start_date,
+        end_date,
+        TRIM(region) AS region,
+        CASE 
+            WHEN budget > 0 THEN budget
+            ELSE NULL
+        END AS budget,
+        CASE 
+            WHEN reach > 0 THEN reach
+            ELSE NULL
+        END AS reach,
+        CASE 
+            WHEN conversion_rate BETWEEN 0 AND 1 THEN conversion_rate
+            ELSE NULL
+        END AS conversion_rate,
+        DATEDIFF(day, start_date, end_date) AS campaign_duration_days,
+        CASE 
+            WHEN reach > 0 AND conversion_rate > 0 
+            THEN budget / (reach * conversion_rate)
+            ELSE NULL
+        END AS cost_per_acquisition
+    FROM bronze_marketing_campaigns_stream
+    WHERE campaign_id IS NOT NULL
+      AND start_date IS NOT NULL
+      AND end_date IS NOT NULL
+      AND start_date <= end_date
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY campaign_id ORDER BY start_date) = 1
+) src
+ON tgt.campaign_id = src.campaign_id
+WHEN MATCHED AND src.start_date <= tgt.start_date THEN UPDATE SET
+    campaign_name = src.campaign_name,
+    campaign_type = src.campaign_type,
+    product_category = src.product_category,
+    target_audience = src.target_audience,
+    start_date = src.start_date,
+    end_date = src.end_date,
+    region = src.region,
+    budget = src.budget,
+    reach = src.reach,
+    conversion_rate = src.conversion_rate,
+    campaign_duration_days = src.campaign_duration_days,
+    cost_per_acquisition = src.cost_per_acquisition
+WHEN NOT MATCHED THEN INSERT (
+    campaign_id, campaign_name, campaign_type, product_category, target_audience, start_date,
+    end_date, region, budget, reach, conversion_rate, campaign_duration_days,
+    cost_per_acquisition
+) VALUES (
+    src.campaign_id, src.campaign_name, src.campaign_type, src.product_category,
+    src.target_audience, src.start_date, src.end_date, src.region, src.budget, src.reach,
+    src.conversion_rate, src.campaign_duration_days, src.cost_per_acquisition
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'marketing_campaigns_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 5. PRODUCT REVIEWS CLEAN
+-- ========================================
+MERGE INTO product_reviews_clean tgt
+USING (
+    SELECT 
+        review_id,
+        TRIM(product_id) AS product_id,
+        TRIM(reviewer_id) AS reviewer_id,
+        TRIM(reviewer_name) AS reviewer_name,
+        CASE 
+            WHEN rating BETWEEN 1 AND 5 THEN rating
+            ELSE NULL
+        END AS rating,
+        review_date,
+        TRIM(review_title) AS review_title,
+        TRIM(review_text) AS review_text,
+        CASE 
+            WHEN rating >= 4 THEN 'Positive'
+            WHEN rating = 3 THEN 'Neutral'
+            WHEN rating <= 2 THEN 'Negative'
+            ELSE 'Unknown'
+        END AS sentiment
+    FROM bronze_product_reviews_stream
+    WHERE review_id IS NOT NULL
+      AND product_id IS NOT NULL
+      AND review_date IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY review_id ORDER BY review_date DESC) = 1
+) src
+ON tgt.review_id = src.review_id
+WHEN MATCHED AND src.review_date >= tgt.review_date THEN UPDATE SET
+    product_id = src.product_id,
+    reviewer_id = src.reviewer_id,
+    reviewer_name = src.reviewer_name,
+    rating = src.rating,
+    review_date = src.review_date,
+    review_title = src.review_title,
+    review_text = src.review_text,
+    sentiment = src.sentiment
+WHEN NOT MATCHED THEN INSERT (
+    review_id, product_id, reviewer_id, reviewer_name, rating, review_date, review_title,
+    review_text, sentiment
+) VALUES (
+    src.review_id, src.product_id, src.reviewer_id, src.reviewer_name, src.rating,
+    src.review_date, src.review_title, src.review_text, src.sentiment
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'product_reviews_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 6. CUSTOMER SERVICE INTERACTIONS CLEAN
+-- ========================================
+MERGE INTO customer_service_interactions_clean tgt
+USING (
+    SELECT 
+        interaction_id,
+        interaction_date,
+        TRIM(interaction_type) AS interaction_type,
+        TRIM(issue_category) AS issue_category,
+        TRIM(description) AS description,
+        CASE 
+            WHEN duration_minutes > 0 THEN duration_minutes
+            ELSE NULL
+        END AS duration_minutes,
+        TRIM(resolution_status) AS resolution_status,
+        TRIM(follow_up_required) AS follow_up_required,
+        CASE 
+            WHEN customer_satisfaction BETWEEN 1 AND 5 THEN customer_satisfaction
+            ELSE NULL
+        END AS customer_satisfaction
+    FROM bronze_customer_service_interactions_stream
+    WHERE interaction_id IS NOT NULL
+      AND interaction_date IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY interaction_id ORDER BY interaction_date DESC) = 1
+) src
+ON tgt.interaction_id = src.interaction_id
+WHEN MATCHED AND src.interaction_date >= tgt.interaction_date THEN UPDATE SET
+    interaction_date = src.interaction_date,
+    interaction_type = src.interaction_type,
+    issue_category = src.issue_category,
+    description = src.description,
+    duration_minutes = src.duration_minutes,
+    resolution_status = src.resolution_status,
+    follow_up_required = src.follow_up_required,
+    customer_satisfaction = src.customer_satisfaction
+WHEN NOT MATCHED THEN INSERT (
+    interaction_id, interaction_date, interaction_type, issue_category, description,
+    duration_minutes, resolution_status, follow_up_required, customer_satisfaction
+) VALUES (
+    src.interaction_id, src.interaction_date, src.interaction_type, src.issue_category,
+    src.description, src.duration_minutes, src.resolution_status, src.follow_up_required,
+    src.customer_satisfaction
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'customer_service_interactions_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 7. INVENTORY CLEAN
+-- ========================================
+MERGE INTO inventory_clean tgt
+USING (
+    SELECT 
+        TRIM(product_id) AS product_id,
+        TRIM(product_category) AS product_category,
+        TRIM(region) AS region,
+        TRIM(country) AS country,
+        TRIM(warehouse) AS warehouse,
+        CASE 
+            WHEN current_stock >= 0 THEN current_stock
+            ELSE 0
+        END AS current_stock,
+        CASE 
+            WHEN reorder_point > 0 THEN reorder_point
+            ELSE NULL
+        END AS reorder_point,
+        CASE 
+            WHEN lead_time > 0 THEN lead_time
+            ELSE NULL
+        END AS lead_time,
+        last_restock_date,
+        CASE 
+            WHEN current_stock <= reorder_point THEN TRUE
+            ELSE FALSE
+        END AS is_low_stock
+    FROM bronze_inventory_stream
+    WHERE product_id IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY product_id, warehouse ORDER BY last_restock_date DESC) = 1
+) src
+ON tgt.product_id = src.product_id AND tgt.warehouse = src.warehouse
+WHEN MATCHED AND src.last_restock_date >= tgt.last_restock_date THEN UPDATE SET
+    product_category = src.product_category,
+    region = src.region,
+    country = src.country,
+    current_stock = src.current_stock,
+    reorder_point = src.reorder_point,
+    lead_time = src.lead_time,
+    last_restock_date = src.last_restock_date,
+    is_low_stock = src.is_low_stock
+WHEN NOT MATCHED THEN INSERT (
+    product_id, product_category, region, country, warehouse, current_stock, reorder_point,
+    lead_time, last_restock_date, is_low_stock
+) VALUES (
+    src.product_id, src.product_category, src.region, src.country, src.warehouse,
+    src.current_stock, src.reorder_point, src.lead_time, src.last_restock_date,
+    src.is_low_stock
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'inventory_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 8. STORE LOCATIONS CLEAN
+-- ========================================
+MERGE INTO store_locations_clean tgt
+USING (
+    SELECT 
+        TRIM(store_id) AS store_id,
+        TRIM(store_name) AS store_name,
+        TRIM(store_type) AS store_type,
+        TRIM(region) AS region,
+        TRIM(country) AS country,
+        TRIM(city) AS city,
+        TRIM(address) AS address,
+        postal_code,
+        CASE 
+            WHEN square_footage > 0 THEN square_footage
+            ELSE NULL
+        END AS square_footage,
+        CASE 
+            WHEN employee_count > 0 THEN employee_count
+            ELSE NULL
+        END AS employee_count
+    FROM bronze_store_locations_stream
+    WHERE store_id IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY store_id ORDER BY store_name) = 1
+) src
+ON tgt.store_id = src.store_id
+WHEN MATCHED AND src.store_name <= tgt.store_name THEN UPDATE SET
+    store_name = src.store_name,
+    store_type = src.store_type,
+    region = src.region,
+    country = src.country,
+    city = src.city,
+    address = src.address,
+    postal_code = src.postal_code,
+    square_footage = src.square_footage,
+    employee_count = src.employee_count
+WHEN NOT MATCHED THEN INSERT (
+    store_id, store_name, store_type, region, country, city, address, postal_code,
+    square_footage, employee_count
+) VALUES (
+    src.store_id, src.store_name, src.store_type, src.region, src.country, src.city,
+    src.address, src.postal_code, src.square_footage, src.employee_count
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'store_locations_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 9. LOGISTICS AND SHIPPING CLEAN
+-- ========================================
+MERGE INTO logistics_and_shipping_clean tgt
+USING (
+    SELECT 
+        shipment_id,
+        order_id,
+        ship_date,
+        estimated_delivery,
+        TRIM(shipping_method) AS shipping_method,
+        TRIM(status) AS status,
+        CASE 
+            WHEN shipping_cost >= 0 THEN shipping_cost
+            ELSE NULL
+        END AS shipping_cost,
+        TRIM(destination_region) AS destination_region,
+        TRIM(destination_country) AS destination_country,
+        TRIM(carrier) AS carrier,
+        DATEDIFF(day, ship_date, estimated_delivery) AS estimated_delivery_days
+    FROM bronze_logistics_and_shipping_stream
+    WHERE shipment_id IS NOT NULL
+      AND ship_date IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY shipment_id ORDER BY ship_date DESC) = 1
+) src
+ON tgt.shipment_id = src.shipment_id
+WHEN MATCHED AND src.ship_date >= tgt.ship_date THEN UPDATE SET
+    order_id = src.order_id,
+    ship_date = src.ship_date,
+    estimated_delivery = src.estimated_delivery,
+    shipping_method = src.shipping_method,
+    status = src.status,
+    shipping_cost = src.shipping_cost,
+    destination_region = src.destination_region,
+    destination_country = src.destination_country,
+    carrier = src.carrier,
+    estimated_delivery_days = src.estimated_delivery_days
+WHEN NOT MATCHED THEN INSERT (
+    shipment_id, order_id, ship_date, estimated_delivery, shipping_method, status,
+    shipping_cost, destination_region, destination_country, carrier, estimated_delivery_days
+) VALUES (
+    src.shipment_id, src.order_id, src.ship_date, src.estimated_delivery,
+    src.shipping_method, src.status, src.shipping_cost, src.destination_region,
+    src.destination_country, src.carrier, src.estimated_delivery_days
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'logistics_and_shipping_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 10. SUPPLIER INFORMATION CLEAN
+-- ========================================
+MERGE INTO supplier_information_clean tgt
+USING (
+    SELECT 
+        supplier_id,
+        TRIM(supplier_name) AS supplier_name,
+        TRIM(product_category) AS product_category,
+        TRIM(region) AS region,
+        TRIM(country) AS country,
+        TRIM(city) AS city,
+        CASE 
+            WHEN lead_time > 0 THEN lead_time
+            ELSE NULL
+        END AS lead_time,
+        CASE 
+            WHEN reliability_score BETWEEN 0 AND 1 THEN reliability_score
+            ELSE NULL
+        END AS reliability_score,
+        TRIM(quality_rating) AS quality_rating
+    FROM bronze_supplier_information_stream
+    WHERE supplier_id IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY supplier_id ORDER BY supplier_name) = 1
+) src
+ON tgt.supplier_id = src.supplier_id
+WHEN MATCHED AND src.supplier_name <= tgt.supplier_name THEN UPDATE SET
+    supplier_name = src.supplier_name,
+    product_category = src.product_category,
+    region = src.region,
+    country = src.country,
+    city = src.city,
+    lead_time = src.lead_time,
+    reliability_score = src.reliability_score,
+    quality_rating = src.quality_rating
+WHEN NOT MATCHED THEN INSERT (
+    supplier_id, supplier_name, product_category, region, country, city, lead_time,
+    reliability_score, quality_rating
+) VALUES (
+    src.supplier_id, src.supplier_name, src.product_category, src.region, src.country,
+    src.city, src.lead_time, src.reliability_score, src.quality_rating
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'supplier_information_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- 11. EMPLOYEE RECORDS CLEAN
+-- ========================================
+MERGE INTO employee_records_clean tgt
+USING (
+    SELECT 
+        employee_id,
+        TRIM(name) AS name,
+        date_of_birth,
+        hire_date,
+        TRIM(department) AS department,
+        TRIM(job_title) AS job_title,
+        CASE 
+            WHEN salary > 0 THEN salary
+            ELSE NULL
+        END AS salary,
+        TRIM(region) AS region,
+        TRIM(country) AS country,
+        LOWER(TRIM(email)) AS email,
+        DATEDIFF(year, hire_date, CURRENT_DATE()) AS years_of_service
+    FROM bronze_employee_records_stream
+    WHERE employee_id IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY hire_date) = 1
+) src
+ON tgt.employee_id = src.employee_id
+WHEN MATCHED AND src.hire_date <= tgt.hire_date THEN UPDATE SET
+    name = src.name,
+    date_of_birth = src.date_of_birth,
+    hire_date = src.hire_date,
+    department = src.department,
+    job_title = src.job_title,
+    salary = src.salary,
+    region = src.region,
+    country = src.country,
+    email = src.email,
+    years_of_service = src.years_of_service
+WHEN NOT MATCHED THEN INSERT (
+    employee_id, name, date_of_birth, hire_date, department, job_title, salary, region,
+    country, email, years_of_service
+) VALUES (
+    src.employee_id, src.name, src.date_of_birth, src.hire_date, src.department,
+    src.job_title, src.salary, src.region, src.country, src.email, src.years_of_service
+);
+
+INSERT INTO load_batches (load_batch_id, table_name, rows_inserted, rows_updated, loaded_at)
+SELECT $load_batch_id, 'employee_records_clean', "number of rows inserted", "number of rows updated", CURRENT_TIMESTAMP()
+FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()));
+
+-- ========================================
+-- VÉRIFICATIONS FINALES
+-- ========================================
+SELECT 
+    table_name,
+    rows_inserted,
+    rows_updated,
+    loaded_at
+FROM load_batches
+WHERE load_batch_id = $load_batch_id
+ORDER BY table_name;
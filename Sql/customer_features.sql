@@ -0,0 +1,297 @@
+-- ========================================
+-- ANYCOMPANY - FEATURE STORE CLIENTS
+-- Phase 3 : ANALYTICS → modèles ML
+-- Une photo mensuelle des agrégats de chaque client, lue par la segmentation,
+-- la propension à l'achat et le modèle de réponse aux promotions
+-- À exécuter après promotion_flags.sql (mise à jour incrémentale)
+-- ========================================
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA ANALYTICS;
+
+-- Un client est identifié par (customer_name, region), customer_name étant l'entité
+-- de la vente : l'identifiant du client acheteur (CUST + customer_id dans les données
+-- de generate_data.py), pas la filiale. Les ventes sont d'abord résumées par client et
+-- par mois ; seuls les mois touchés par des ventes nouvelles ou réattribuées
+-- (refreshed_at de transaction_promotion_flags) sont recalculés.
+-- La photo datée D ne contient que les ventes antérieures à D (mois < D) : un modèle
+-- entraîné sur la photo D n'a jamais vu ce qui s'est passé après D. La dernière photo
+-- (mois suivant le dernier mois de ventes) contient tout l'historique.
+-- Une vente modifiée ou retirée de SILVER est journalisée dans transaction_flag_changes
+-- avec son ancienne version : le mois et le client qu'elle quitte sont aussi recalculés.
+
+-- ========================================
+-- 1. TABLES PERSISTANTES
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS customer_monthly_activity (
+    customer_name VARCHAR(200),
+    region VARCHAR(100),
+    mois DATE,
+    nb_achats NUMBER(18,0),
+    total_achats NUMBER(18,2),
+    premier_achat DATE,
+    dernier_achat DATE,
+    nb_promotions NUMBER(18,0),
+    somme_remises NUMBER(18,4),
+    updated_at TIMESTAMP_NTZ
+);
+
+-- Campagnes actives dans chaque région, pour chaque mois de ventes
+CREATE TABLE IF NOT EXISTS region_campaign_months (
+    region VARCHAR(100),
+    mois DATE,
+    nb_campagnes NUMBER(18,0),
+    nb_conversions NUMBER(18,0),
+    somme_conversion NUMBER(18,4)
+);
+
+CREATE TABLE IF NOT EXISTS customer_feature_snapshots (
+    snapshot_date DATE,
+    customer_name VARCHAR(200),
+    region VARCHAR(100),
+    total_purchases NUMBER(18,0),
+    total_spent NUMBER(18,2),
+    avg_transaction_value NUMBER(18,2),
+    first_purchase_date DATE,
+    last_purchase_date DATE,
+    customer_lifetime_days INTEGER,
+    days_since_last_purchase INTEGER,
+    active_months INTEGER,
+    promotions_received NUMBER(18,0),
+    avg_discount_received NUMBER(10,4),
+    campaigns_exposed NUMBER(18,0),
+    avg_campaign_conversion NUMBER(10,4),
+    computed_at TIMESTAMP_NTZ
+);
+
+-- source_refreshed_at : plus récent refreshed_at (ou changed_at de transaction_flag_changes) pris en compte
+CREATE TABLE IF NOT EXISTS customer_feature_refreshes (
+    refreshed_at TIMESTAMP_NTZ,
+    source_refreshed_at TIMESTAMP_NTZ,
+    mois_recalcules NUMBER(18,0),
+    photos_recalculees NUMBER(18,0)
+);
+
+-- ========================================
+-- 2. PÉRIMÈTRE À RECALCULER
+-- ========================================
+
+-- Bornes du lot : ventes flaguées ou retirées depuis le dernier passage, jusqu'à maintenant
+CREATE OR REPLACE TEMPORARY TABLE lot_courant AS
+SELECT
+    (SELECT MAX(source_refreshed_at) FROM customer_feature_refreshes) AS depuis,
+    (
+        SELECT MAX(horodatage)
+        FROM (
+            SELECT MAX(refreshed_at) AS horodatage FROM transaction_promotion_flags
+            UNION ALL
+            SELECT MAX(changed_at) FROM transaction_flag_changes
+        ) h
+    ) AS jusqu_a;
+
+CREATE OR REPLACE TEMPORARY TABLE activite_a_recalculer AS
+SELECT DISTINCT
+    f.entity AS customer_name,
+    f.region,
+    DATE_TRUNC('month', f.transaction_date) AS mois
+FROM transaction_promotion_flags f
+CROSS JOIN lot_courant l
+WHERE f.entity IS NOT NULL
+  AND f.region IS NOT NULL
+  AND (l.depuis IS NULL OR f.refreshed_at > l.depuis)
+  AND f.refreshed_at <= l.jusqu_a
+UNION
+-- Ancienne version des ventes modifiées ou retirées
+SELECT DISTINCT
+    c.entity AS customer_name,
+    c.region,
+    DATE_TRUNC('month', c.transaction_date) AS mois
+FROM transaction_flag_changes c
+CROSS JOIN lot_courant l
+WHERE c.entity IS NOT NULL
+  AND c.region IS NOT NULL
+  AND (l.depuis IS NULL OR c.changed_at > l.depuis)
+  AND c.changed_at <= l.jusqu_a;
+
+-- ========================================
+-- 3. ACTIVITÉ MENSUELLE PAR CLIENT
+-- ========================================
+
+-- Les mois touchés sont recalculés en entier (une vente réattribuée à une autre
+-- promotion change nb_promotions sans ajouter de vente)
+MERGE INTO customer_monthly_activity a
+USING (
+    SELECT
+        f.entity AS customer_name,
+        f.region,
+        r.mois,
+        COUNT(*) AS nb_achats,
+        SUM(f.amount) AS total_achats,
+        MIN(f.transaction_date) AS premier_achat,
+        MAX(f.transaction_date) AS dernier_achat,
+        COUNT(f.promotion_id) AS nb_promotions,
+        COALESCE(SUM(f.discount_percentage), 0) AS somme_remises
+    FROM transaction_promotion_flags f
+    INNER JOIN activite_a_recalculer r
+        ON r.customer_name = f.entity
+        AND r.region = f.region
+        AND r.mois = DATE_TRUNC('month', f.transaction_date)
+    WHERE f.amount > 0
+    GROUP BY f.entity, f.region, r.mois
+) b
+ON a.customer_name = b.customer_name
+    AND a.region = b.region
+    AND a.mois = b.mois
+WHEN MATCHED THEN UPDATE SET
+    nb_achats = b.nb_achats,
+    total_achats = b.total_achats,
+    premier_achat = b.premier_achat,
+    dernier_achat = b.dernier_achat,
+    nb_promotions = b.nb_promotions,
+    somme_remises = b.somme_remises,
+    updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (
+    customer_name, region, mois, nb_achats, total_achats, premier_achat, dernier_achat,
+    nb_promotions, somme_remises, updated_at
+) VALUES (
+    b.customer_name, b.region, b.mois, b.nb_achats, b.total_achats, b.premier_achat, b.dernier_achat,
+    b.nb_promotions, b.somme_remises, CURRENT_TIMESTAMP()
+);
+
+-- Mois recalculés qui n'ont plus aucune vente (toutes retirées ou déplacées)
+DELETE FROM customer_monthly_activity
+USING activite_a_recalculer r
+WHERE customer_monthly_activity.customer_name = r.customer_name
+  AND customer_monthly_activity.region = r.region
+  AND customer_monthly_activity.mois = r.mois
+  AND NOT EXISTS (
+      SELECT 1
+      FROM transaction_promotion_flags f
+      WHERE f.entity = r.customer_name
+        AND f.region = r.region
+        AND DATE_TRUNC('month', f.transaction_date) = r.mois
+        AND f.amount > 0
+  );
+
+-- ========================================
+-- 4. CAMPAGNES PAR RÉGION ET PAR MOIS
+-- ========================================
+
+-- Peu de lignes (régions × mois) : recalculées à chaque passage puis comparées à
+-- la version enregistrée, comme promotion_flags_snapshot
+CREATE OR REPLACE TEMPORARY TABLE campagnes_par_mois AS
+SELECT
+    c.region,
+    m.mois,
+    COUNT(*) AS nb_campagnes,
+    COUNT(c.conversion_rate) AS nb_conversions,
+    ROUND(COALESCE(SUM(c.conversion_rate), 0), 4) AS somme_conversion
+FROM (SELECT DISTINCT mois FROM customer_monthly_activity) m
+INNER JOIN SILVER.marketing_campaigns_clean c
+    ON c.start_date < DATEADD(month, 1, m.mois)
+    AND c.end_date >= m.mois
+GROUP BY c.region, m.mois;
+
+CREATE OR REPLACE TEMPORARY TABLE mois_campagnes_modifies AS
+SELECT DISTINCT mois
+FROM (
+    (
+        SELECT region, mois, nb_campagnes, nb_conversions, somme_conversion
+        FROM campagnes_par_mois
+        MINUS
+        SELECT region, mois, nb_campagnes, nb_conversions, somme_conversion
+        FROM region_campaign_months
+    )
+    UNION ALL
+    (
+        SELECT region, mois, nb_campagnes, nb_conversions, somme_conversion
+        FROM region_campaign_months
+        MINUS
+        SELECT region, mois, nb_campagnes, nb_conversions, somme_conversion
+        FROM campagnes_par_mois
+    )
+) d;
+
+DELETE FROM region_campaign_months;
+
+INSERT INTO region_campaign_months (region, mois, nb_campagnes, nb_conversions, somme_conversion)
+SELECT region, mois, nb_campagnes, nb_conversions, somme_conversion
+FROM campagnes_par_mois;
+
+-- ========================================
+-- 5. PHOTOS MENSUELLES
+-- ========================================
+
+-- Une photo par mois de ventes, datée du 1er du mois suivant ; seules les photos
+-- postérieures au plus ancien mois modifié changent
+CREATE OR REPLACE TEMPORARY TABLE photos_a_recalculer AS
+SELECT DISTINCT DATEADD(month, 1, a.mois) AS snapshot_date
+FROM customer_monthly_activity a
+WHERE a.mois >= (
+    SELECT MIN(mois)
+    FROM (
+        SELECT mois FROM activite_a_recalculer
+        UNION ALL
+        SELECT mois FROM mois_campagnes_modifies
+    ) m
+);
+
+DELETE FROM customer_feature_snapshots
+USING photos_a_recalculer p
+WHERE customer_feature_snapshots.snapshot_date = p.snapshot_date;
+
+-- Les agrégats d'une photo se déduisent des mois qui la précèdent : l'historique
+-- des ventes n'est pas relu
+INSERT INTO customer_feature_snapshots (
+    snapshot_date, customer_name, region, total_purchases, total_spent, avg_transaction_value,
+    first_purchase_date, last_purchase_date, customer_lifetime_days, days_since_last_purchase,
+    active_months, promotions_received, avg_discount_received, campaigns_exposed,
+    avg_campaign_conversion, computed_at
+)
+SELECT
+    p.snapshot_date,
+    a.customer_name,
+    a.region,
+    SUM(a.nb_achats),
+    SUM(a.total_achats),
+    ROUND(SUM(a.total_achats) / SUM(a.nb_achats), 2),
+    MIN(a.premier_achat),
+    MAX(a.dernier_achat),
+    DATEDIFF(day, MIN(a.premier_achat), MAX(a.dernier_achat)),
+    DATEDIFF(day, MAX(a.dernier_achat), p.snapshot_date),
+    COUNT(*),
+    SUM(a.nb_promotions),
+    COALESCE(ROUND(SUM(a.somme_remises) / NULLIF(SUM(a.nb_promotions), 0), 4), 0),
+    COALESCE(SUM(c.nb_campagnes), 0),
+    COALESCE(ROUND(SUM(c.somme_conversion) / NULLIF(SUM(c.nb_conversions), 0), 4), 0),
+    CURRENT_TIMESTAMP()
+FROM photos_a_recalculer p
+INNER JOIN customer_monthly_activity a
+    ON a.mois < p.snapshot_date
+LEFT JOIN region_campaign_months c
+    ON c.region = a.region
+    AND c.mois = a.mois
+GROUP BY p.snapshot_date, a.customer_name, a.region;
+
+-- Le lot est pris en compte
+INSERT INTO customer_feature_refreshes (refreshed_at, source_refreshed_at, mois_recalcules, photos_recalculees)
+SELECT
+    CURRENT_TIMESTAMP(),
+    COALESCE(l.jusqu_a, l.depuis),
+    (SELECT COUNT(*) FROM activite_a_recalculer),
+    (SELECT COUNT(*) FROM photos_a_recalculer)
+FROM lot_courant l;
+
+-- ========================================
+-- VÉRIFICATIONS
+-- ========================================
+
+SELECT
+    'Feature store à jour' AS status,
+    (SELECT mois_recalcules FROM customer_feature_refreshes ORDER BY refreshed_at DESC LIMIT 1) AS mois_recalcules,
+    (SELECT photos_recalculees FROM customer_feature_refreshes ORDER BY refreshed_at DESC LIMIT 1) AS photos_recalculees,
+    COUNT(DISTINCT snapshot_date) AS photos,
+    MAX(snapshot_date) AS derniere_photo,
+    SUM(CASE WHEN snapshot_date = (SELECT MAX(snapshot_date) FROM customer_feature_snapshots) THEN 1 ELSE 0 END) AS clients
+FROM customer_feature_snapshots;
@@ -0,0 +1,633 @@
+"""
+AnyCompany Food & Beverage - Générateur de données synthétiques
+Produit les 11 fichiers sources de Load_data.sql (mêmes colonnes, mêmes noms de
+fichiers) à n'importe quelle échelle, par blocs de lignes et en mémoire bornée
+
+Usage :
+    python Sql/generate_data.py --output data/stage
+    python Sql/generate_data.py --output data/stage --scale 1000 --seed 7
+    python Sql/generate_data.py --output data/parquet --format parquet --tables financial_transactions
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from load_data import parse_load_script
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+CHUNK_ROWS = 1_000_000    # Lignes générées et écrites à la fois (borne la mémoire)
+DEFAULT_SEED = 42
+DEFAULT_START = '2020-01-01'
+DEFAULT_END = '2025-06-30'
+DIRTY_RATE = 0.002        # Part de doublons et de valeurs manquantes, pour exercer clean_data.sql
+CUSTOMER_SKEW = 2.0       # > 1 : une minorité de clients réguliers fait une bonne part des ventes
+
+# Lignes à l'échelle 1. Les tables de faits croissent linéairement avec --scale ; les
+# référentiels (promotions, campagnes, magasins...) en racine carrée, pour que le nombre
+# de promotions qui se chevauchent par région augmente sans saturer tout le calendrier
+BASE_ROWS = {
+    'customer_demographics': (10_000, 'linear'),
+    'customer_service_interactions': (10_000, 'linear'),
+    'financial_transactions': (100_000, 'linear'),
+    'promotions_data': (600, 'sqrt'),
+    'marketing_campaigns': (500, 'sqrt'),
+    'product_reviews': (20_000, 'linear'),
+    'inventory': (2_000, 'sqrt'),
+    'store_locations': (200, 'sqrt'),
+    'logistics_and_shipping': (20_000, 'linear'),
+    'supplier_information': (300, 'sqrt'),
+    'employee_records': (1_000, 'sqrt'),
+}
+
+# Répartition du CA et croissance annuelle par région (business_insights.md)
+REGIONS = {
+    'Europe': (0.35, 0.02),
+    'North America': (0.28, -0.03),
+    'Asia': (0.20, 0.08),
+    'South America': (0.07, -0.18),
+    'Africa': (0.05, -0.12),
+    'Middle East': (0.05, -0.08),
+}
+
+COUNTRIES = {
+    'Europe': {'France': ['Paris', 'Lyon'], 'Germany': ['Berlin', 'Munich'], 'United Kingdom': ['London', 'Manchester'],
+               'Spain': ['Madrid', 'Barcelona'], 'Italy': ['Milan', 'Rome']},
+    'North America': {'United States': ['New York', 'Chicago', 'Los Angeles'], 'Canada': ['Toronto', 'Vancouver'],
+                      'Mexico': ['Mexico City']},
+    'Asia': {'Japan': ['Tokyo', 'Osaka'], 'China': ['Shanghai', 'Beijing'], 'India': ['Mumbai', 'Bangalore'],
+             'Singapore': ['Singapore']},
+    'South America': {'Brazil': ['São Paulo', 'Rio de Janeiro'], 'Argentina': ['Buenos Aires'], 'Chile': ['Santiago'],
+                      'Colombia': ['Bogotá']},
+    'Africa': {'South Africa': ['Johannesburg', 'Cape Town'], 'Nigeria': ['Lagos'], 'Kenya': ['Nairobi'],
+               'Morocco': ['Casablanca']},
+    'Middle East': {'United Arab Emirates': ['Dubai'], 'Saudi Arabia': ['Riyadh'], 'Israel': ['Tel Aviv'],
+                    'Qatar': ['Doha']},
+}
+
+# Saisonnalité mensuelle : pic novembre-décembre (+35 %), creux mai-juin (-20 %)
+MONTH_FACTORS = np.array([0.95, 0.92, 1.0, 1.0, 0.8, 0.8, 0.95, 0.95, 1.0, 1.05, 1.35, 1.35])
+WEEKDAY_FACTORS = np.array([0.95, 0.95, 0.97, 1.0, 1.08, 1.12, 0.93])  # Lundi → dimanche
+
+# Effet des promotions et campagnes actives sur les ventes de la région
+PROMO_VOLUME_LIFT = 1.42
+PROMO_BASKET_LIFT = 1.18
+CAMPAIGN_VOLUME_LIFT = 1.15
+
+CATEGORIES = ['Organic Beverages', 'Plant-based Milk Alternatives', 'Snacks', 'Baby Food', 'Personal Care',
+              'Greens', 'Dairy', 'Bakery', 'Frozen Foods', 'Household', 'Electronics']
+# Tranches de remise (business_insights.md) : 0-10 %, 10-15 %, 15-20 %, 20 %+
+DISCOUNT_BUCKETS = [((0.05, 0.10), 150), ((0.10, 0.15), 280), ((0.15, 0.20), 120), ((0.20, 0.40), 45)]
+PROMOTION_TYPES = ['Percentage Discount', 'BOGO', 'Flash Sale', 'Bundle', 'Seasonal']
+# Type de campagne : (poids, taux de conversion, coût par acquisition)
+CAMPAIGN_TYPES = {
+    'Email': (0.30, 0.082, 86), 'Content Marketing': (0.22, 0.078, 96), 'Social Media': (0.22, 0.071, 112),
+    'Print': (0.14, 0.050, 200), 'TV': (0.12, 0.048, 207),
+}
+AUDIENCES = ['Young Adults', 'Families', 'Seniors', 'Professionals', 'Students']
+TRANSACTION_TYPES = {'Sale': 0.82, 'Refund': 0.06, 'Expense': 0.08, 'Transfer': 0.04}
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'Bank Transfer', 'Mobile Payment', 'Cash']
+# Préférences de paiement par région (même ordre que PAYMENT_METHODS)
+PAYMENT_WEIGHTS = {
+    'Asia': [0.25, 0.15, 0.10, 0.40, 0.10],
+    'Africa': [0.15, 0.15, 0.15, 0.30, 0.25],
+    'Middle East': [0.35, 0.15, 0.15, 0.15, 0.20],
+}
+DEFAULT_PAYMENT_WEIGHTS = [0.40, 0.22, 0.15, 0.13, 0.10]
+FIRST_NAMES = ['Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Lucas', 'Mia', 'Hugo', 'Sofia', 'Mateo', 'Yuki',
+               'Arjun', 'Amara', 'Omar', 'Chen', 'Fatima', 'Diego', 'Lea', 'Kwame', 'Ines']
+LAST_NAMES = ['Martin', 'Smith', 'Garcia', 'Müller', 'Rossi', 'Tanaka', 'Patel', 'Okafor', 'Silva', 'Haddad',
+              'Wang', 'Dubois', "O'Brien", 'Kim', 'Lopez', 'Nguyen', 'Cohen', 'Mensah', 'Khan', 'Schmidt']
+
+
+# ========================================
+# CALENDRIER ET TIRAGES
+# ========================================
+
+class Calendar:
+    """Jours de la période et intensité des ventes par jour × région
+
+    L'intensité combine la part de la région, sa croissance annuelle, la saisonnalité,
+    le jour de la semaine et le surcroît de ventes pendant les promotions et campagnes.
+    """
+
+    def __init__(self, start, end):
+        self.days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        self.regions = list(REGIONS)
+        months = self.days.astype('datetime64[M]').astype(int) % 12
+        weekdays = (self.days.astype(int) - 4) % 7  # 1970-01-01 était un jeudi
+        years = (self.days - self.days[0]).astype(int) / 365.25
+        shares = np.array([REGIONS[r][0] for r in self.regions])
+        growth = np.array([REGIONS[r][1] for r in self.regions])
+        self.weights = (
+            (MONTH_FACTORS[months] * WEEKDAY_FACTORS[weekdays])[:, None]
+            * shares[None, :] * (1 + growth[None, :]) ** years[:, None]
+        )
+        self.promo_active = np.zeros(self.weights.shape, dtype=bool)
+        self.campaign_active = np.zeros(self.weights.shape, dtype=bool)
+        self.customer_regions = np.zeros(0, dtype=np.int8)
+        self._customers = []
+        self._cdf = None
+
+    def coverage(self, regions, starts, ends):
+        """Jours × régions couverts par au moins une fenêtre [start, end]"""
+        counts = np.zeros((len(self.days) + 1, len(self.regions)), dtype=np.int32)
+        region_idx = np.array([self.regions.index(r) for r in regions], dtype=int)
+        starts = np.asarray(starts, dtype='datetime64[D]')
+        ends = np.asarray(ends, dtype='datetime64[D]')
+        first = np.clip((starts - self.days[0]).astype(int), 0, len(self.days))
+        last = np.clip((ends - self.days[0]).astype(int) + 1, 0, len(self.days))
+        np.add.at(counts, (first, region_idx), 1)
+        np.add.at(counts, (last, region_idx), -1)
+        return np.cumsum(counts, axis=0)[:-1] > 0
+
+    def sample(self, rng, n):
+        """Tirer n couples (jour, région) selon l'intensité des ventes"""
+        if self._cdf is None:
+            lifted = (self.weights
+                      * np.where(self.promo_active, PROMO_VOLUME_LIFT, 1.0)
+                      * np.where(self.campaign_active, CAMPAIGN_VOLUME_LIFT, 1.0))
+            self._cdf = np.cumsum(lifted.ravel())
+        flat = np.searchsorted(self._cdf, rng.random(n) * self._cdf[-1], side='right')
+        flat = np.minimum(flat, self._cdf.size - 1)
+        day_idx, region_idx = np.divmod(flat, len(self.regions))
+        return day_idx, region_idx
+
+    def uniform_days(self, rng, n):
+        return rng.integers(0, len(self.days), n)
+
+    def assign_customers(self, rng, n):
+        """Région de chacun des n clients de customer_demographics (parts de REGIONS)"""
+        shares = np.array([REGIONS[r][0] for r in self.regions])
+        self.customer_regions = rng.choice(len(self.regions), size=n, p=shares / shares.sum()).astype(np.int8)
+        self._customers = [np.flatnonzero(self.customer_regions == r).astype(np.int32)
+                           for r in range(len(self.regions))]
+
+    def sample_customers(self, rng, region_idx):
+        """Client (numéro de ligne de customer_demographics) de chaque vente, tiré dans sa région"""
+        customers = np.zeros(len(region_idx), dtype=np.int64)
+        everyone = np.arange(len(self.customer_regions))
+        for r, pool in enumerate(self._customers):
+            mask = region_idx == r
+            pool = pool if pool.size else everyone  # Très petites échelles : région sans client
+            customers[mask] = pool[(rng.random(mask.sum()) ** CUSTOMER_SKEW * pool.size).astype(np.int64)]
+        return customers
+
+
+def _pick(rng, values, n, p=None):
+    values = np.asarray(values)
+    if p is not None:
+        p = np.asarray(p, dtype=float)
+        p = p / p.sum()
+    return values[rng.choice(len(values), size=n, p=p)]
+
+
+def _ids(prefix, index, width=9):
+    return np.char.add(prefix, np.char.zfill(index.astype(str), width)).astype(object)
+
+
+def _regions(rng, n):
+    return _pick(rng, list(REGIONS), n, [share for share, _ in REGIONS.values()])
+
+
+def _places(rng, regions):
+    """Pays et ville cohérents avec la région de chaque ligne"""
+    countries = np.empty(len(regions), dtype=object)
+    cities = np.empty(len(regions), dtype=object)
+    for region, by_country in COUNTRIES.items():
+        mask = regions == region
+        pairs = [(country, city) for country, cities_ in by_country.items() for city in cities_]
+        chosen = rng.integers(0, len(pairs), mask.sum())
+        countries[mask] = np.array([c for c, _ in pairs], dtype=object)[chosen]
+        cities[mask] = np.array([c for _, c in pairs], dtype=object)[chosen]
+    return countries, cities
+
+
+def _names(rng, n):
+    return np.char.add(np.char.add(_pick(rng, FIRST_NAMES, n).astype(str), ' '),
+                       _pick(rng, LAST_NAMES, n).astype(str)).astype(object)
+
+
+def _money(values, decimals=2):
+    return np.round(values, decimals)
+
+
+def _birth_dates(rng, n, min_age=18, max_age=80):
+    today = np.datetime64(DEFAULT_END, 'D')
+    return today - rng.integers(min_age * 365, max_age * 365, n).astype('timedelta64[D]')
+
+
+# ========================================
+# GÉNÉRATEURS PAR TABLE
+# ========================================
+# Chaque générateur reçoit un tirage aléatoire propre au bloc, les numéros de lignes
+# du bloc et le calendrier ; il retourne {colonne: valeurs} dans l'ordre de Load_data.sql
+
+def gen_customer_demographics(rng, index, cal):
+    n = len(index)
+    regions = np.array(cal.regions, dtype=object)[cal.customer_regions[index]]
+    countries, cities = _places(rng, regions)
+    income = rng.lognormal(mean=10.8, sigma=0.55, size=n)
+    income[rng.random(n) < 0.01] = 0  # Revenus non renseignés (NULL après nettoyage)
+    return {
+        'customer_id': index + 1,
+        'name': _names(rng, n),
+        'date_of_birth': _birth_dates(rng, n),
+        'gender': _pick(rng, ['Male', 'Female', 'Other', 'N/A'], n, [0.485, 0.485, 0.02, 0.01]),
+        'region': regions,
+        'country': countries,
+        'city': cities,
+        'marital_status': _pick(rng, ['Single', 'Married', 'Divorced', 'Widowed'], n, [0.38, 0.45, 0.12, 0.05]),
+        'annual_income': _money(income),
+    }
+
+
+def gen_customer_service_interactions(rng, index, cal):
+    n = len(index)
+    categories = _pick(rng, ['Delivery', 'Product Quality', 'Billing', 'Returns', 'Other'], n, [0.3, 0.25, 0.2, 0.15, 0.1])
+    return {
+        'interaction_id': _ids('INT', index),
+        'interaction_date': cal.days[cal.uniform_days(rng, n)],
+        'interaction_type': _pick(rng, ['Call', 'Email', 'Chat', 'Social Media'], n, [0.4, 0.3, 0.2, 0.1]),
+        'issue_category': categories,
+        # Virgules et guillemets : exercent FIELD_OPTIONALLY_ENCLOSED_BY du COPY INTO
+        'description': np.char.add('Customer reported "', np.char.add(categories.astype(str), '" issue, follow-up noted')).astype(object),
+        'duration_minutes': np.maximum(1, rng.gamma(2.0, 6.0, n).astype(int)),
+        'resolution_status': _pick(rng, ['Resolved', 'Pending', 'Escalated'], n, [0.75, 0.15, 0.10]),
+        'follow_up_required': _pick(rng, ['Yes', 'No'], n, [0.3, 0.7]),
+        'customer_satisfaction': _pick(rng, [1, 2, 3, 4, 5], n, [0.07, 0.1, 0.2, 0.33, 0.3]),
+    }
+
+
+def gen_financial_transactions(rng, index, cal):
+    n = len(index)
+    day_idx, region_idx = cal.sample(rng, n)
+    regions = np.array(cal.regions, dtype=object)[region_idx]
+    customers = cal.sample_customers(rng, region_idx)
+    amounts = rng.lognormal(mean=8.4, sigma=0.8, size=n)
+    amounts *= np.where(cal.promo_active[day_idx, region_idx], PROMO_BASKET_LIFT, 1.0)
+    payments = np.empty(n, dtype=object)
+    for r, region in enumerate(cal.regions):
+        mask = region_idx == r
+        payments[mask] = _pick(rng, PAYMENT_METHODS, mask.sum(), PAYMENT_WEIGHTS.get(region, DEFAULT_PAYMENT_WEIGHTS))
+    types = _pick(rng, list(TRANSACTION_TYPES), n, list(TRANSACTION_TYPES.values()))
+    # Remboursements saisis en négatif : ABS(amount) dans clean_data.sql
+    amounts = np.where(types == 'Refund', -amounts, amounts)
+    return {
+        'transaction_id': _ids('TXN', index, width=10),
+        'transaction_date': cal.days[day_idx],
+        'transaction_type': types,
+        'amount': _money(amounts),
+        'payment_method': payments,
+        # Client acheteur : CUST + customer_id de customer_demographics, de la même région
+        'entity': _ids('CUST', customers + 1),
+        'region': regions,
+        'account_code': _pick(rng, ['4110', '7070', '6063', '5121'], n, [0.6, 0.2, 0.1, 0.1]),
+    }
+
+
+def gen_promotions_data(rng, index, cal):
+    n = len(index)
+    buckets = rng.choice(len(DISCOUNT_BUCKETS), size=n, p=np.array([w for _, w in DISCOUNT_BUCKETS]) / sum(w for _, w in DISCOUNT_BUCKETS))
+    low = np.array([b[0][0] for b in DISCOUNT_BUCKETS])[buckets]
+    high = np.array([b[0][1] for b in DISCOUNT_BUCKETS])[buckets]
+    starts = cal.days[cal.uniform_days(rng, n)]
+    durations = np.clip(rng.normal(17, 6, n).astype(int), 4, 45)  # 2-3 semaines en moyenne
+    return {
+        'promotion_id': _ids('PROMO', index, width=7),
+        # Catégories sensibles aux promotions sur-représentées (70 % des promotions)
+        'product_category': _pick(rng, CATEGORIES, n, [0.3, 0.2, 0.2] + [0.3 / 8] * 8),
+        'promotion_type': _pick(rng, PROMOTION_TYPES, n),
+        'discount_percentage': np.round(rng.uniform(low, high), 2),
+        'start_date': starts,
+        'end_date': starts + durations.astype('timedelta64[D]'),
+        'region': _regions(rng, n),
+    }
+
+
+def gen_marketing_campaigns(rng, index, cal):
+    n = len(index)
+    types = _pick(rng, list(CAMPAIGN_TYPES), n, [w for w, _, _ in CAMPAIGN_TYPES.values()])
+    conversion = np.array([CAMPAIGN_TYPES[t][1] for t in types]) * rng.normal(1.0, 0.15, n)
+    cpa = np.array([CAMPAIGN_TYPES[t][2] for t in types]) * rng.normal(1.0, 0.2, n)
+    budget = rng.lognormal(mean=10.5, sigma=0.6, size=n)
+    starts = cal.days[cal.uniform_days(rng, n)]
+    durations = rng.integers(14, 91, n)
+    categories = _pick(rng, CATEGORIES, n)
+    return {
+        'campaign_id': _ids('CAMP', index, width=7),
+        'campaign_name': np.char.add(np.char.add(types.astype(str), ' - '), categories.astype(str)).astype(object),
+        'campaign_type': types,
+        'product_category': categories,
+        'target_audience': _pick(rng, AUDIENCES, n),
+        'start_date': starts,
+        'end_date': starts + durations.astype('timedelta64[D]'),
+        'region': _regions(rng, n),
+        'budget': _money(budget),
+        'reach': np.maximum(1, budget / np.maximum(cpa, 1) / np.clip(conversion, 0.005, 1)).astype(int),
+        'conversion_rate': np.round(np.clip(conversion, 0.001, 0.999), 4),
+    }
+
+
+def gen_product_reviews(rng, index, cal):
+    n = len(index)
+    products = rng.integers(0, max(100, len(index) // 20 + 1), n)
+    ratings = _pick(rng, [1, 2, 3, 4, 5], n, [0.07, 0.08, 0.15, 0.3, 0.4])
+    return {
+        'review_id': index + 1,
+        'product_id': _ids('PRD', products, width=6),
+        'reviewer_id': _ids('RVW', rng.integers(0, 10 * n + 1, n), width=8),
+        'reviewer_name': _names(rng, n),
+        'rating': ratings,
+        'review_date': cal.days[cal.uniform_days(rng, n)],
+        'review_title': _pick(rng, ['Great product', 'Not bad', 'Disappointing', 'Would buy again', 'Average'], n),
+        'review_text': np.char.add('Rated ', np.char.add(ratings.astype(str), '/5, "as expected", would recommend')).astype(object),
+    }
+
+
+def gen_inventory(rng, index, cal):
+    n = len(index)
+    regions = _regions(rng, n)
+    countries, _ = _places(rng, regions)
+    return {
+        'product_id': _ids('PRD', index, width=6),
+        'product_category': _pick(rng, CATEGORIES, n),
+        'region': regions,
+        'country': countries,
+        'warehouse': np.char.add('WH-', np.char.zfill(rng.integers(1, 40, n).astype(str), 3)).astype(object),
+        'current_stock': rng.integers(0, 5_000, n),
+        'reorder_point': rng.integers(50, 500, n),
+        'lead_time': rng.integers(2, 30, n),
+        'last_restock_date': cal.days[cal.uniform_days(rng, n)],
+    }
+
+
+def gen_store_locations(rng, index, cal):
+    n = len(index)
+    regions = _regions(rng, n)
+    countries, cities = _places(rng, regions)
+    return {
+        'store_id': _ids('STR', index, width=6),
+        'store_name': np.char.add('AnyCompany ', cities.astype(str)).astype(object),
+        'store_type': _pick(rng, ['Supermarket', 'Convenience', 'Hypermarket', 'Online Hub'], n, [0.45, 0.3, 0.15, 0.1]),
+        'region': regions,
+        'country': countries,
+        'city': cities,
+        'address': np.char.add(rng.integers(1, 300, n).astype(str), ' Market Street').astype(object),
+        'postal_code': rng.integers(10_000, 99_999, n),
+        'square_footage': _money(rng.lognormal(mean=9.0, sigma=0.5, size=n)),
+        'employee_count': rng.integers(5, 250, n),
+    }
+
+
+def gen_logistics_and_shipping(rng, index, cal):
+    n = len(index)
+    day_idx, region_idx = cal.sample(rng, n)
+    regions = np.array(cal.regions, dtype=object)[region_idx]
+    countries, _ = _places(rng, regions)
+    ship_dates = cal.days[day_idx]
+    return {
+        'shipment_id': _ids('SHP', index),
+        'order_id': _ids('ORD', index),
+        'ship_date': ship_dates,
+        'estimated_delivery': ship_dates + rng.integers(2, 15, n).astype('timedelta64[D]'),
+        'shipping_method': _pick(rng, ['Road', 'Air', 'Sea', 'Rail'], n, [0.5, 0.2, 0.2, 0.1]),
+        'status': _pick(rng, ['Delivered', 'In Transit', 'Delayed', 'Returned'], n, [0.8, 0.1, 0.07, 0.03]),
+        'shipping_cost': _money(rng.gamma(2.0, 25.0, n)),
+        'destination_region': regions,
+        'destination_country': countries,
+        'carrier': _pick(rng, ['DHL', 'FedEx', 'UPS', 'Maersk', 'Local Courier'], n),
+    }
+
+
+def gen_supplier_information(rng, index, cal):
+    n = len(index)
+    regions = _regions(rng, n)
+    countries, cities = _places(rng, regions)
+    return {
+        'supplier_id': _ids('SUP', index, width=6),
+        'supplier_name': np.char.add(_pick(rng, LAST_NAMES, n).astype(str), ' Foods Ltd').astype(object),
+        'product_category': _pick(rng, CATEGORIES, n),
+        'region': regions,
+        'country': countries,
+        'city': cities,
+        'lead_time': rng.integers(2, 45, n),
+        'reliability_score': np.round(rng.beta(8, 2, n), 2),
+        'quality_rating': _pick(rng, ['A', 'B', 'C', 'D'], n, [0.35, 0.4, 0.2, 0.05]),
+    }
+
+
+def gen_employee_records(rng, index, cal):
+    n = len(index)
+    regions = _regions(rng, n)
+    countries, _ = _places(rng, regions)
+    names = _names(rng, n)
+    departments = _pick(rng, ['Sales', 'Marketing', 'Logistics', 'Finance', 'IT', 'Customer Service'], n)
+    return {
+        'employee_id': _ids('EMP', index, width=6),
+        'name': names,
+        'date_of_birth': _birth_dates(rng, n, 20, 65),
+        'hire_date': cal.days[cal.uniform_days(rng, n)],
+        'department': departments,
+        'job_title': np.char.add(departments.astype(str), ' Specialist').astype(object),
+        'salary': _money(rng.lognormal(mean=10.9, sigma=0.35, size=n)),
+        'region': regions,
+        'country': countries,
+        'email': np.char.add(np.char.lower(np.char.replace(names.astype(str), ' ', '.')),
+                             np.char.add('.', np.char.add(index.astype(str), '@anycompany.com'))).astype(object),
+    }
+
+
+GENERATORS = {
+    'customer_demographics': gen_customer_demographics,
+    'customer_service_interactions': gen_customer_service_interactions,
+    'financial_transactions': gen_financial_transactions,
+    'promotions_data': gen_promotions_data,
+    'marketing_campaigns': gen_marketing_campaigns,
+    'product_reviews': gen_product_reviews,
+    'inventory': gen_inventory,
+    'store_locations': gen_store_locations,
+    'logistics_and_shipping': gen_logistics_and_shipping,
+    'supplier_information': gen_supplier_information,
+    'employee_records': gen_employee_records,
+}
+
+
+# ========================================
+# PRODUCTION PAR BLOCS
+# ========================================
+
+def row_count(table, scale):
+    base, growth = BASE_ROWS[table]
+    return max(1, int(round(base * (scale if growth == 'linear' else scale ** 0.5))))
+
+
+def _add_anomalies(rng, df, rate):
+    """Doublons d'identifiant et valeurs manquantes, comme dans les exports réels"""
+    n = len(df)
+    k = int(n * rate)
+    if k == 0 or n < 2:
+        return df
+    id_col = df.columns[0]
+    for col in df.columns[1:]:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('Int64')  # Entiers nullables : pas de "3.0" dans les CSV
+    targets = rng.choice(n, size=k, replace=False)
+    df.loc[targets[: k // 2], id_col] = df[id_col].to_numpy()[rng.integers(0, n, k // 2)]
+    null_rows = targets[k // 2:]
+    null_cols = rng.integers(1, len(df.columns), len(null_rows))
+    for col in np.unique(null_cols):
+        df.iloc[null_rows[null_cols == col], col] = None
+    return df
+
+
+def iter_chunks(table, rows, cal, seed, chunk_rows=CHUNK_ROWS, dirty_rate=DIRTY_RATE):
+    """Générer une table bloc par bloc (DataFrame de chunk_rows lignes au plus)
+
+    Chaque bloc a son propre générateur aléatoire, dérivé de (graine, table, numéro de bloc) :
+    à graine et taille de bloc égales, une table est identique quelles que soient les autres
+    tables demandées (--tables) et l'ordre dans lequel elles sont écrites.
+    """
+    table_no = list(GENERATORS).index(table)
+    for chunk_no, start in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, table_no, chunk_no])
+        index = np.arange(start, min(start + chunk_rows, rows))
+        df = pd.DataFrame(GENERATORS[table](rng, index, cal))
+        yield _add_anomalies(rng, df, dirty_rate)
+
+
+def prepare_calendar(start, end, scale, seed, chunk_rows=CHUNK_ROWS):
+    """Calendrier des ventes, avec les fenêtres de promotions et campagnes déjà tirées
+
+    Les deux référentiels sont régénérés ici (mêmes graines que leurs fichiers) pour que
+    les ventes soient plus nombreuses et plus élevées pendant les promotions de leur région.
+    La région des clients est tirée une fois ici : chaque vente est attribuée à un client
+    de customer_demographics situé dans la région de la vente.
+    """
+    cal = Calendar(start, end)
+    customers = row_count('customer_demographics', scale)
+    cal.assign_customers(np.random.default_rng([seed, list(GENERATORS).index('customer_demographics')]), customers)
+    for table, target in (('promotions_data', 'promo_active'), ('marketing_campaigns', 'campaign_active')):
+        active = getattr(cal, target)
+        for df in iter_chunks(table, row_count(table, scale), cal, seed, chunk_rows, dirty_rate=0):
+            active |= cal.coverage(df['region'].to_numpy(), df['start_date'].to_numpy(), df['end_date'].to_numpy())
+    return cal
+
+
+# ========================================
+# ÉCRITURE
+# ========================================
+
+class ChunkWriter:
+    """Écriture incrémentale d'un fichier CSV, JSON (un objet par ligne) ou Parquet"""
+
+    def __init__(self, path, file_format):
+        self.path = Path(path)
+        self.file_format = file_format
+        self._parquet = None
+        self._schema = None
+        self._first = True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+
+    @staticmethod
+    def _as_text(df):
+        # Dates au format ISO (YYYY-MM-DD) pour DATE_FORMAT = 'AUTO'
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime('%Y-%m-%d')
+        return df
+
+    def write(self, df):
+        if self.file_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._schema is None:
+                # Colonnes de dates en DATE (et non TIMESTAMP), schéma figé au premier bloc
+                self._schema = pa.schema([
+                    pa.field(f.name, pa.date32()) if pa.types.is_timestamp(f.type) else f
+                    for f in table.schema
+                ])
+                self._parquet = pq.ParquetWriter(self.path, self._schema)
+            self._parquet.write_table(table.cast(self._schema))
+        elif self.file_format == 'json':
+            self._as_text(df).to_json(self.path, orient='records', lines=True, force_ascii=False,
+                                      mode='w' if self._first else 'a')
+        else:
+            self._as_text(df).to_csv(self.path, index=False, header=self._first,
+                                     mode='w' if self._first else 'a', encoding='utf-8')
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def output_path(output_dir, table, file_name, file_format):
+    """Nom du fichier : celui de Load_data.sql en mode stage, sinon <fichier>.<format>"""
+    if file_format == 'stage':
+        return Path(output_dir) / file_name
+    return Path(output_dir) / f"{Path(file_name).stem}.{file_format}"
+
+
+def generate(output_dir, scale=1, seed=DEFAULT_SEED, file_format='stage', tables=None,
+             start=DEFAULT_START, end=DEFAULT_END, chunk_rows=CHUNK_ROWS, dirty_rate=DIRTY_RATE):
+    """Écrire les fichiers sources des tables demandées ; retourne {table: lignes}"""
+    _, columns, copies = parse_load_script()
+    cal = prepare_calendar(start, end, scale, seed, chunk_rows)
+    written = {}
+    for table in tables or GENERATORS:
+        file_name = copies[table][0]
+        fmt = file_format
+        if fmt == 'stage':
+            fmt = 'json' if file_name.lower().endswith('.json') else 'csv'
+        path = output_path(output_dir, table, file_name, file_format)
+        rows = row_count(table, scale)
+        started = time.perf_counter()
+        writer = ChunkWriter(path, fmt)
+        try:
+            for df in iter_chunks(table, rows, cal, seed, chunk_rows, dirty_rate):
+                expected = [col for col, _ in columns[table]]
+                if list(df.columns) != expected:
+                    raise ValueError(f"{table} : colonnes {list(df.columns)} ≠ Load_data.sql {expected}")
+                writer.write(df)
+        finally:
+            writer.close()
+        written[table] = rows
+        size_mb = path.stat().st_size / 1024 / 1024
+        print(f"✅ {table:<32} {rows:>13,} lignes  {size_mb:>10,.1f} Mo  "
+              f"{time.perf_counter() - started:>7.1f} s  → {path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de données synthétiques (schémas de Load_data.sql)")
+    parser.add_argument('--output', required=True, help="Dossier de sortie (ex. data/stage)")
+    parser.add_argument('--scale', type=float, default=1, help="Facteur de volume (1 = 100 000 transactions)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--format', choices=['stage', 'csv', 'json', 'parquet'], default='stage',
+                        help="stage = fichiers et formats attendus par Load_data.sql")
+    parser.add_argument('--tables', nargs='+', choices=list(GENERATORS), help="Limiter à certaines tables")
+    parser.add_argument('--start', default=DEFAULT_START, help="Première date (AAAA-MM-JJ)")
+    parser.add_argument('--end', default=DEFAULT_END, help="Dernière date (AAAA-MM-JJ)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Lignes par bloc (mémoire)")
+    parser.add_argument('--dirty-rate', type=float, default=DIRTY_RATE,
+                        help="Part de doublons et de valeurs manquantes (0 pour des données propres)")
+    args = parser.parse_args(argv)
+
+    generate(args.output, scale=args.scale, seed=args.seed, file_format=args.format, tables=args.tables,
+             start=args.start, end=args.end, chunk_rows=args.chunk_rows, dirty_rate=args.dirty_rate)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+AnyCompany Food & Beverage - Chargement BRONZE parallèle et suivi par fichier
+Exécute les COPY INTO de Load_data.sql en parallèle depuis un stage local,
+en ignorant les fichiers dont l'empreinte a déjà été chargée
+
+Usage :
+    python Sql/load_data.py --stage-dir data/stage
+    python Sql/load_data.py --stage-dir data/stage --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import snowflake.connector
+    SNOWFLAKE_AVAILABLE = True
+except ImportError:
+    SNOWFLAKE_AVAILABLE = False
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+LOAD_SCRIPT = Path(__file__).with_name('Load_data.sql')
+MANIFEST_NAME = '.load_manifest.json'  # Empreintes des fichiers déjà chargés (dans le stage local)
+LOCAL_STAGE = 'LOCAL_STAGE'            # Stage interne qui remplace @S3_STAGE
+MAX_WORKERS = 4                        # COPY INTO exécutés simultanément
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_snowflake_config(secrets_path):
+    """Lire la section [snowflake] du même secrets.toml que les dashboards"""
+    with open(secrets_path, 'rb') as f:
+        return tomllib.load(f)['snowflake']
+
+
+# ========================================
+# LECTURE DE LOAD_DATA.SQL
+# ========================================
+
+def split_statements(script):
+    """Découper un script SQL en instructions, sans les commentaires"""
+    script = re.sub(r'/\*.*?\*/', '', script, flags=re.S)
+    script = re.sub(r'--[^\n]*', '', script)
+    return [stmt.strip() for stmt in script.split(';') if stmt.strip()]
+
+
+def parse_load_script(path=LOAD_SCRIPT):
+    """Extraire de Load_data.sql la préparation, les colonnes typées et les COPY INTO
+
+    Retourne (setup, tables, copies) :
+    - setup  : instructions de création (base, schémas, warehouse, tables) rejouables
+    - tables : {table: [(colonne, type), ...]}
+    - copies : {table: (fichier, clauses après FROM)}
+    """
+    setup, tables, copies = [], {}, {}
+    for stmt in split_statements(Path(path).read_text(encoding='utf-8')):
+        head = ' '.join(stmt.split()[:4]).upper()
+
+        if head.startswith('CREATE OR REPLACE TABLE'):
+            # Les tables sont conservées d'un chargement à l'autre : seuls les nouveaux
+            # fichiers y sont ajoutés (et consommés par clean_data_incremental.sql)
+            match = re.match(r'CREATE OR REPLACE TABLE (\w+) \((.*)\)$', stmt, flags=re.S)
+            table, body = match.group(1), match.group(2)
+            tables[table] = [
+                tuple(line.strip().rstrip(',').split(None, 1))
+                for line in body.strip().splitlines() if line.strip()
+            ]
+            setup.append(f'CREATE TABLE IF NOT EXISTS {table} ({body})')
+        elif head.startswith('COPY INTO'):
+            match = re.match(r'COPY INTO (\w+)\s+FROM @S3_STAGE/(\S+)\s+(.*)$', stmt, flags=re.S)
+            copies[match.group(1)] = (match.group(2), match.group(3))
+        elif head.startswith(('CREATE DATABASE', 'CREATE SCHEMA', 'CREATE WAREHOUSE', 'USE')):
+            setup.append(stmt)
+
+    setup.append(f'CREATE STAGE IF NOT EXISTS {LOCAL_STAGE}')
+    return setup, tables, copies
+
+
+# ========================================
+# CHOIX DE LA MÉTHODE JSON
+# ========================================
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def sample_json_record(path):
+    """Lire le premier objet d'un fichier JSON (tableau englobant ou un objet par ligne)
+
+    Retourne (enregistrement, tableau_englobant)
+    """
+    with open(path, encoding='utf-8') as f:
+        head = f.read(CHUNK_SIZE).lstrip()
+    outer_array = head.startswith('[')
+    start = head.find('{')
+    record, _ = json.JSONDecoder().raw_decode(head, start)
+    return record, outer_array
+
+
+def choose_json_method(path, columns):
+    """Choisir automatiquement entre MATCH_BY_COLUMN_NAME et la projection typée
+
+    MATCH_BY_COLUMN_NAME suffit quand chaque colonne de la table existe telle quelle
+    (à la casse près) dans le JSON avec une valeur scalaire. Sinon on projette
+    $1:<clé>::<type>, en rapprochant les clés par nom normalisé (snake/camel case).
+    Retourne (méthode, {colonne: clé JSON ou None}, tableau_englobant).
+    """
+    record, outer_array = sample_json_record(path)
+    by_lower = {key.lower(): key for key in record}
+    by_normalized = {_normalize(key): key for key in record}
+
+    exact = all(
+        col.lower() in by_lower and not isinstance(record[by_lower[col.lower()]], (dict, list))
+        for col, _ in columns
+    )
+    if exact:
+        return 'match_by_column_name', {col: by_lower[col.lower()] for col, _ in columns}, outer_array
+
+    mapping = {col: by_normalized.get(_normalize(col)) for col, _ in columns}
+    return 'projection', mapping, outer_array
+
+
+def json_copy_statement(table, file_name, columns, method, mapping, outer_array):
+    file_format = "TYPE = 'JSON'" + (' STRIP_OUTER_ARRAY = TRUE' if outer_array else '')
+    if method == 'match_by_column_name':
+        return (
+            f'COPY INTO {table}\n'
+            f'FROM @{LOCAL_STAGE}/{file_name}\n'
+            f'FILE_FORMAT = ({file_format})\n'
+            f'MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE\n'
+            f'ON_ERROR = CONTINUE'
+        )
+    projection = ',\n        '.join(
+        f'$1:"{mapping[col]}"::{col_type}' if mapping[col] else f'NULL::{col_type}'
+        for col, col_type in columns
+    )
+    return (
+        f'COPY INTO {table} ({", ".join(col for col, _ in columns)})\n'
+        f'FROM (\n'
+        f'    SELECT \n'
+        f'        {projection}\n'
+        f'    FROM @{LOCAL_STAGE}/{file_name}\n'
+        f')\n'
+        f'FILE_FORMAT = ({file_format})\n'
+        f'ON_ERROR = CONTINUE'
+    )
+
+
+# ========================================
+# SUIVI DES FICHIERS CHARGÉS
+# ========================================
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(stage_dir):
+    path = Path(stage_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def save_manifest(stage_dir, manifest):
+    """Écriture atomique : un chargement interrompu ne corrompt pas le manifeste"""
+    path = Path(stage_dir) / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def plan_loads(stage_dir, tables, copies, manifest, force=False, only=None):
+    """Lister les COPY à exécuter : fichiers présents dont l'empreinte est nouvelle"""
+    plan, skipped = [], []
+    for table, (file_name, clauses) in copies.items():
+        if only and table not in only:
+            continue
+        path = Path(stage_dir) / file_name
+        if not path.exists():
+            skipped.append((table, file_name, 'fichier absent'))
+            continue
+        checksum = file_checksum(path)
+        if not force and manifest.get(file_name, {}).get('sha256') == checksum:
+            skipped.append((table, file_name, 'déjà chargé'))
+            continue
+
+        if file_name.lower().endswith('.json'):
+            method, mapping, outer_array = choose_json_method(path, tables[table])
+            sql = json_copy_statement(table, file_name, tables[table], method, mapping, outer_array)
+        else:
+            method = 'csv'
+            sql = f'COPY INTO {table}\nFROM @{LOCAL_STAGE}/{file_name}\n{clauses}'
+        if force:
+            # Sans FORCE, Snowflake ignore un fichier déjà chargé dans les 64 derniers jours
+            sql += '\nFORCE = TRUE'
+        plan.append({'table': table, 'file': file_name, 'path': path,
+                     'sha256': checksum, 'method': method, 'sql': sql})
+    return plan, skipped
+
+
+# ========================================
+# EXÉCUTION PARALLÈLE
+# ========================================
+
+def connect(config):
+    return snowflake.connector.connect(
+        user=config["user"],
+        password=config["password"],
+        account=config["account"],
+        warehouse=config["warehouse"],
+        database=config["database"],
+        schema='BRONZE'
+    )
+
+
+def run_setup(config, setup):
+    conn = connect(config)
+    try:
+        cursor = conn.cursor()
+        for stmt in setup:
+            cursor.execute(stmt)
+    finally:
+        conn.close()
+
+
+def load_file(config, item):
+    """PUT du fichier local dans le stage interne puis COPY INTO (une connexion par tâche)"""
+    start = time.perf_counter()
+    conn = connect(config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"PUT 'file://{item['path'].resolve().as_posix()}' @{LOCAL_STAGE} "
+            f"AUTO_COMPRESS = FALSE OVERWRITE = TRUE"
+        )
+        cursor.execute(item['sql'])
+        columns = [col[0].lower() for col in cursor.description]
+        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    statuses = {r.get('status') for r in results}
+    return {
+        'rows_loaded': sum(r.get('rows_loaded') or 0 for r in results),
+        'errors': sum(r.get('errors_seen') or 0 for r in results),
+        'loaded': bool(statuses & {'LOADED', 'PARTIALLY_LOADED'}),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def run(stage_dir, secrets_path, workers=MAX_WORKERS, force=False, only=None, dry_run=False):
+    setup, tables, copies = parse_load_script()
+    manifest = load_manifest(stage_dir)
+    plan, skipped = plan_loads(stage_dir, tables, copies, manifest, force=force, only=only)
+
+    for table, file_name, reason in skipped:
+        print(f"⏭️  {table:<32} {file_name} ({reason})")
+    for item in plan:
+        print(f"📥 {item['table']:<32} {item['file']} [{item['method']}]")
+
+    if dry_run:
+        for item in plan:
+            print(f"\n-- {item['table']}\n{item['sql']};")
+        return 0
+    if not plan:
+        print("✅ Aucun nouveau fichier à charger")
+        return 0
+    if not SNOWFLAKE_AVAILABLE:
+        print("❌ snowflake-connector-python n'est pas installé (utiliser --dry-run)")
+        return 1
+
+    config = get_snowflake_config(secrets_path)
+    run_setup(config, setup)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load_file, config, item): item for item in plan}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"❌ {item['table']:<32} {e}")
+                continue
+            if not result['loaded']:
+                failures += 1
+                print(f"❌ {item['table']:<32} aucune ligne chargée")
+                continue
+            manifest[item['file']] = {
+                'sha256': item['sha256'],
+                'table': item['table'],
+                'method': item['method'],
+                'rows_loaded': result['rows_loaded'],
+                'loaded_at': datetime.now().isoformat(timespec='seconds')
+            }
+            save_manifest(stage_dir, manifest)
+            print(f"✅ {item['table']:<32} {result['rows_loaded']:>10,} lignes "
+                  f"({result['errors']} erreurs) en {result['seconds']:.1f}s")
+
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chargement BRONZE parallèle depuis un stage local")
+    parser.add_argument('--stage-dir', required=True,
+                        help="Dossier local contenant les fichiers du bucket S3")
+    parser.add_argument('--secrets', default='.streamlit/secrets.toml',
+                        help="Fichier secrets.toml contenant la section [snowflake]")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--tables', help="Limiter à certaines tables (séparées par des virgules)")
+    parser.add_argument('--force', action='store_true', help="Recharger même les fichiers inchangés")
+    parser.add_argument('--dry-run', action='store_true', help="Afficher le plan et le SQL sans exécuter")
+    args = parser.parse_args(argv)
+
+    only = set(args.tables.split(',')) if args.tables else None
+    return run(args.stage_dir, args.secrets, workers=args.workers, force=args.force,
+               only=only, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
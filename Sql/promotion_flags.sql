@@ -0,0 +1,275 @@
+-- ========================================
+-- ANYCOMPANY - TABLE DE FLAGS PROMOTION
+-- Phase 1 bis : SILVER → ANALYTICS
+-- Une ligne par vente, avec la promotion qui lui est attribuée
+-- À exécuter après clean_data.sql (mise à jour incrémentale)
+-- ========================================
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA ANALYTICS;
+
+-- Règle d'attribution : quand plusieurs promotions couvrent la même vente
+-- (même région, date comprise entre start_date et end_date), on retient
+-- la remise la plus forte, puis la promotion la plus récente, puis le plus petit promotion_id.
+-- overlapping_promotions conserve le nombre de promotions concurrentes.
+-- Une vente est recalculée quand elle est nouvelle, quand sa ligne SILVER a changé
+-- (MERGE de clean_data_incremental.sql) ou quand une promotion qui la couvre a changé.
+-- Les ventes nouvelles ou modifiées sont lues d'après le load_batch_id de
+-- SILVER.financial_transactions_clean : seuls les lots postérieurs au dernier passage
+-- (promotion_flags_refreshes) sont relus, pas tout l'historique.
+-- Une ligne ne disparaît de SILVER que lors d'une reconstruction complète (clean_data.sql) :
+-- plus aucune vente n'appartient alors à un lot déjà traité, et c'est seulement dans ce cas
+-- que les flags sont comparés à SILVER pour retrouver les ventes supprimées.
+
+-- ========================================
+-- 1. TABLES PERSISTANTES
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS transaction_promotion_flags (
+    transaction_id VARCHAR(50),
+    transaction_date DATE,
+    transaction_year INTEGER,
+    transaction_month INTEGER,
+    region VARCHAR(100),
+    payment_method VARCHAR(50),
+    entity VARCHAR(200),
+    amount NUMBER(12,2),
+    promotion_status VARCHAR(20),
+    promotion_id VARCHAR(50),
+    promotion_type VARCHAR(100),
+    product_category VARCHAR(100),
+    discount_percentage NUMBER(5,2),
+    overlapping_promotions INTEGER,
+    refreshed_at TIMESTAMP_NTZ
+);
+
+-- Photo des promotions utilisées lors du dernier rafraîchissement
+CREATE TABLE IF NOT EXISTS promotion_flags_snapshot (
+    promotion_id VARCHAR(50),
+    region VARCHAR(100),
+    start_date DATE,
+    end_date DATE,
+    discount_percentage NUMBER(5,2),
+    promotion_type VARCHAR(100),
+    product_category VARCHAR(100)
+);
+
+-- Anciennes valeurs des ventes recalculées ou retirées : les scripts incrémentaux construits
+-- sur les flags (anomaly_detection.sql, customer_features.sql) retirent l'ancienne version
+-- d'une vente avant de prendre en compte la nouvelle. Conservées FLAG_CHANGES_RETENTION_DAYS jours.
+-- refreshed_at : celui de l'ancienne version (un lecteur ne retire que ce qu'il a déjà compté)
+CREATE TABLE IF NOT EXISTS transaction_flag_changes (
+    transaction_id VARCHAR(50),
+    transaction_date DATE,
+    region VARCHAR(100),
+    payment_method VARCHAR(50),
+    entity VARCHAR(200),
+    amount NUMBER(12,2),
+    refreshed_at TIMESTAMP_NTZ,
+    changed_at TIMESTAMP_NTZ
+);
+
+-- Passages du script : load_batch_id = plus récent lot de SILVER.financial_transactions_clean
+-- pris en compte
+CREATE TABLE IF NOT EXISTS promotion_flags_refreshes (
+    refreshed_at TIMESTAMP_NTZ,
+    load_batch_id VARCHAR(50),
+    ventes_recalculees NUMBER(18,0),
+    ventes_retirees NUMBER(18,0)
+);
+
+-- ========================================
+-- 2. PÉRIMÈTRE À RECALCULER
+-- ========================================
+
+-- Bornes du lot : lots de SILVER écrits depuis le dernier passage, jusqu'au plus récent
+SET flags_depuis = (SELECT COALESCE(MAX(load_batch_id), '') FROM promotion_flags_refreshes);
+SET flags_jusqu_a = (SELECT COALESCE(MAX(load_batch_id), '') FROM SILVER.financial_transactions_clean);
+-- Reconstruction complète de SILVER depuis le dernier passage (ou premier passage)
+SET flags_reconstruction = (
+    SELECT NOT EXISTS (
+        SELECT 1 FROM SILVER.financial_transactions_clean WHERE load_batch_id <= $flags_depuis
+    )
+);
+
+-- Lignes de SILVER insérées ou mises à jour par les lots du passage
+CREATE OR REPLACE TEMPORARY TABLE transactions_du_lot AS
+SELECT transaction_id, transaction_type, transaction_date, amount, region, payment_method, entity
+FROM SILVER.financial_transactions_clean
+WHERE load_batch_id > $flags_depuis
+  AND load_batch_id <= $flags_jusqu_a;
+
+-- Promotions ajoutées, supprimées ou modifiées depuis le dernier rafraîchissement
+CREATE OR REPLACE TEMPORARY TABLE promotions_modifiees AS
+(
+    SELECT promotion_id, region, start_date, end_date, discount_percentage, promotion_type, product_category
+    FROM SILVER.promotions_clean
+    MINUS
+    SELECT promotion_id, region, start_date, end_date, discount_percentage, promotion_type, product_category
+    FROM promotion_flags_snapshot
+)
+UNION ALL
+(
+    SELECT promotion_id, region, start_date, end_date, discount_percentage, promotion_type, product_category
+    FROM promotion_flags_snapshot
+    MINUS
+    SELECT promotion_id, region, start_date, end_date, discount_percentage, promotion_type, product_category
+    FROM SILVER.promotions_clean
+);
+
+-- Ventes du lot jamais flaguées ou modifiées + ventes couvertes par une promotion modifiée
+CREATE OR REPLACE TEMPORARY TABLE flags_a_recalculer AS
+SELECT t.transaction_id
+FROM transactions_du_lot t
+LEFT JOIN transaction_promotion_flags f
+    ON f.transaction_id = t.transaction_id
+WHERE t.transaction_type = 'Sale'
+  AND (
+      f.transaction_id IS NULL
+      OR f.transaction_date IS DISTINCT FROM t.transaction_date
+      OR f.amount IS DISTINCT FROM t.amount
+      OR f.region IS DISTINCT FROM t.region
+      OR f.payment_method IS DISTINCT FROM t.payment_method
+      OR f.entity IS DISTINCT FROM t.entity
+  )
+UNION
+SELECT t.transaction_id
+FROM SILVER.financial_transactions_clean t
+INNER JOIN promotions_modifiees pm
+    ON t.region = pm.region
+    AND t.transaction_date BETWEEN pm.start_date AND pm.end_date
+WHERE t.transaction_type = 'Sale';
+
+-- Ventes flaguées à retirer : devenues autre chose qu'une vente dans le lot, ou absentes
+-- de SILVER après une reconstruction complète (toutes ses lignes sont alors dans le lot)
+CREATE OR REPLACE TEMPORARY TABLE flags_a_retirer AS
+SELECT f.transaction_id
+FROM transactions_du_lot t
+INNER JOIN transaction_promotion_flags f
+    ON f.transaction_id = t.transaction_id
+WHERE t.transaction_type IS DISTINCT FROM 'Sale'
+UNION
+SELECT f.transaction_id
+FROM transaction_promotion_flags f
+WHERE $flags_reconstruction
+  AND NOT EXISTS (
+      SELECT 1
+      FROM transactions_du_lot t
+      WHERE t.transaction_id = f.transaction_id
+  );
+
+-- ========================================
+-- 3. MISE À JOUR INCRÉMENTALE
+-- ========================================
+
+-- Version actuelle des ventes déjà flaguées qui vont être recalculées
+INSERT INTO transaction_flag_changes (
+    transaction_id, transaction_date, region, payment_method, entity, amount, refreshed_at, changed_at
+)
+SELECT
+    f.transaction_id, f.transaction_date, f.region, f.payment_method, f.entity, f.amount,
+    f.refreshed_at, CURRENT_TIMESTAMP()
+FROM transaction_promotion_flags f
+INNER JOIN flags_a_recalculer r
+    ON r.transaction_id = f.transaction_id;
+
+MERGE INTO transaction_promotion_flags f
+USING (
+    SELECT
+        t.transaction_id,
+        t.transaction_date,
+        t.transaction_year,
+        t.transaction_month,
+        t.region,
+        t.payment_method,
+        t.entity,
+        t.amount,
+        CASE
+            WHEN p.promotion_id IS NOT NULL THEN 'Avec Promotion'
+            ELSE 'Sans Promotion'
+        END AS promotion_status,
+        p.promotion_id,
+        p.promotion_type,
+        p.product_category,
+        p.discount_percentage,
+        COUNT(p.promotion_id) OVER (PARTITION BY t.transaction_id) AS overlapping_promotions
+    FROM SILVER.financial_transactions_clean t
+    INNER JOIN flags_a_recalculer r
+        ON r.transaction_id = t.transaction_id
+    LEFT JOIN SILVER.promotions_clean p
+        ON t.region = p.region
+        AND t.transaction_date BETWEEN p.start_date AND p.end_date
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY t.transaction_id
+        ORDER BY p.discount_percentage DESC NULLS LAST, p.start_date DESC, p.promotion_id
+    ) = 1
+) src
+ON f.transaction_id = src.transaction_id
+WHEN MATCHED THEN UPDATE SET
+    transaction_date = src.transaction_date,
+    transaction_year = src.transaction_year,
+    transaction_month = src.transaction_month,
+    region = src.region,
+    payment_method = src.payment_method,
+    entity = src.entity,
+    amount = src.amount,
+    promotion_status = src.promotion_status,
+    promotion_id = src.promotion_id,
+    promotion_type = src.promotion_type,
+    product_category = src.product_category,
+    discount_percentage = src.discount_percentage,
+    overlapping_promotions = src.overlapping_promotions,
+    refreshed_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (
+    transaction_id, transaction_date, transaction_year, transaction_month, region,
+    payment_method, entity, amount, promotion_status, promotion_id, promotion_type,
+    product_category, discount_percentage, overlapping_promotions, refreshed_at
+) VALUES (
+    src.transaction_id, src.transaction_date, src.transaction_year, src.transaction_month, src.region,
+    src.payment_method, src.entity, src.amount, src.promotion_status, src.promotion_id, src.promotion_type,
+    src.product_category, src.discount_percentage, src.overlapping_promotions, CURRENT_TIMESTAMP()
+);
+
+-- Retirer les ventes qui ont disparu de SILVER (ou ne sont plus des ventes)
+INSERT INTO transaction_flag_changes (
+    transaction_id, transaction_date, region, payment_method, entity, amount, refreshed_at, changed_at
+)
+SELECT
+    f.transaction_id, f.transaction_date, f.region, f.payment_method, f.entity, f.amount,
+    f.refreshed_at, CURRENT_TIMESTAMP()
+FROM transaction_promotion_flags f
+INNER JOIN flags_a_retirer r
+    ON r.transaction_id = f.transaction_id;
+
+DELETE FROM transaction_promotion_flags
+WHERE transaction_id IN (SELECT transaction_id FROM flags_a_retirer);
+
+DELETE FROM transaction_flag_changes
+WHERE changed_at < DATEADD(day, -90, CURRENT_TIMESTAMP());  -- FLAG_CHANGES_RETENTION_DAYS
+
+-- Mémoriser les promotions prises en compte
+CREATE OR REPLACE TABLE promotion_flags_snapshot AS
+SELECT promotion_id, region, start_date, end_date, discount_percentage, promotion_type, product_category
+FROM SILVER.promotions_clean;
+
+-- Le lot est pris en compte
+INSERT INTO promotion_flags_refreshes (refreshed_at, load_batch_id, ventes_recalculees, ventes_retirees)
+SELECT
+    CURRENT_TIMESTAMP(),
+    GREATEST($flags_jusqu_a, $flags_depuis),
+    (SELECT COUNT(*) FROM flags_a_recalculer),
+    (SELECT COUNT(*) FROM flags_a_retirer);
+
+-- ========================================
+-- VÉRIFICATIONS
+-- ========================================
+
+SELECT
+    'Flags promotion à jour' AS status,
+    (SELECT COUNT(*) FROM flags_a_recalculer) AS ventes_recalculees,
+    (SELECT COUNT(*) FROM flags_a_retirer) AS ventes_retirees,
+    COUNT(*) AS total_ventes,
+    COUNT(DISTINCT transaction_id) AS ventes_uniques,
+    SUM(CASE WHEN promotion_status = 'Avec Promotion' THEN 1 ELSE 0 END) AS ventes_sous_promo,
+    SUM(CASE WHEN overlapping_promotions > 1 THEN 1 ELSE 0 END) AS ventes_promos_chevauchantes
+FROM transaction_promotion_flags;
@@ -50,22 +50,14 @@ ORDER BY nombre_promotions DESC;
 -- 2. COMPARAISON VENTES AVEC/SANS PROMOTION
 -- ========================================
 
--- Créer une vue temporaire des ventes avec flag promotion
-CREATE OR REPLACE TEMPORARY TABLE ventes_avec_flag_promo AS
+-- Vue temporaire des ventes avec flag promotion
+-- Lit la table pré-calculée par promotion_flags.sql (une ligne par vente)
+-- au lieu de refaire la jointure par plage de dates
+CREATE OR REPLACE TEMPORARY VIEW ventes_avec_flag_promo AS
 SELECT 
-    t.*,
-    CASE 
-        WHEN p.promotion_id IS NOT NULL THEN 'Avec Promotion'
-        ELSE 'Sans Promotion'
-    END AS statut_promotion,
-    p.promotion_id,
-    p.promotion_type,
-    p.discount_percentage
-FROM financial_transactions_clean t
-LEFT JOIN promotions_clean p
-    ON t.region = p.region
-    AND t.transaction_date BETWEEN p.start_date AND p.end_date
-WHERE t.transaction_type = 'Sale';
+    f.*,
+    f.promotion_status AS statut_promotion
+FROM ANALYTICS.transaction_promotion_flags f;
 
 -- Comparaison globale
 SELECT 
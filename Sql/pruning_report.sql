@@ -0,0 +1,64 @@
+-- ========================================
+-- ANYCOMPANY - RAPPORT DE CLUSTERING ET DE PRUNING
+-- Qualité du clustering des tables SILVER et micro-partitions lues par requête
+-- À exécuter après quelques jours d'utilisation des dashboards
+-- ========================================
+
+USE DATABASE ANYCOMPANY_LAB;
+USE SCHEMA SILVER;
+
+-- ========================================
+-- 1. QUALITÉ DU CLUSTERING
+-- ========================================
+
+-- average_depth proche de 1 : chaque valeur (région, date) tient dans très peu de
+-- micro-partitions, les filtres de période et les jointures par région peuvent les écarter
+SELECT
+    'financial_transactions_clean' AS table_name,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('financial_transactions_clean'))['total_partition_count']::INTEGER AS total_partitions,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('financial_transactions_clean'))['average_overlaps']::FLOAT AS average_overlaps,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('financial_transactions_clean'))['average_depth']::FLOAT AS average_depth
+UNION ALL
+SELECT
+    'promotions_clean',
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('promotions_clean'))['total_partition_count']::INTEGER,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('promotions_clean'))['average_overlaps']::FLOAT,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('promotions_clean'))['average_depth']::FLOAT
+UNION ALL
+SELECT
+    'marketing_campaigns_clean',
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('marketing_campaigns_clean'))['total_partition_count']::INTEGER,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('marketing_campaigns_clean'))['average_overlaps']::FLOAT,
+    PARSE_JSON(SYSTEM$CLUSTERING_INFORMATION('marketing_campaigns_clean'))['average_depth']::FLOAT;
+
+-- ========================================
+-- 2. PRUNING PAR REQUÊTE (7 DERNIERS JOURS)
+-- ========================================
+
+-- Les requêtes des dashboards commencent par /* anycompany:<nom> */ (data_access.render_query) ;
+-- les autres (analyses Sql/*.sql, notebooks) sont regroupées par début de texte.
+-- ACCOUNT_USAGE a jusqu'à 45 minutes de latence.
+SELECT
+    COALESCE(
+        REGEXP_SUBSTR(query_text, '/\\* anycompany:(\\w+) \\*/', 1, 1, 'e'),
+        LEFT(REGEXP_REPLACE(query_text, '\\s+', ' '), 80)
+    ) AS query_name,
+    COUNT(*) AS executions,
+    ROUND(AVG(partitions_scanned), 1) AS avg_partitions_scanned,
+    ROUND(AVG(partitions_total), 1) AS avg_partitions_total,
+    ROUND(SUM(partitions_scanned) * 100.0 / NULLIF(SUM(partitions_total), 0), 2) AS pct_partitions_scanned,
+    ROUND(AVG(bytes_scanned) / 1024 / 1024, 2) AS avg_mb_scanned,
+    ROUND(AVG(total_elapsed_time), 0) AS avg_elapsed_ms
+FROM SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY
+WHERE database_name = 'ANYCOMPANY_LAB'
+  AND start_time >= DATEADD(day, -7, CURRENT_TIMESTAMP())
+  AND query_type = 'SELECT'
+  AND execution_status = 'SUCCESS'
+  AND (
+      query_text ILIKE '%financial_transactions_clean%'
+      OR query_text ILIKE '%promotions_clean%'
+      OR query_text ILIKE '%marketing_campaigns_clean%'
+      OR query_text ILIKE '%/* anycompany:%'
+  )
+GROUP BY query_name
+ORDER BY pct_partitions_scanned DESC NULLS LAST, avg_elapsed_ms DESC;
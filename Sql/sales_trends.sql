@@ -271,6 +271,9 @@ UNION ALL
 -- 7. DÉTECTION D'ANOMALIES
 -- ========================================
 
+-- Version historique, qui relit toutes les ventes : les alertes du Sales Dashboard sont
+-- tenues à jour à chaque chargement par anomaly_detection.sql (ANALYTICS.sales_anomaly_alerts)
+
 -- Transactions exceptionnellement élevées (>3 écarts-types)
 WITH stats AS (
     SELECT 
@@ -0,0 +1,15 @@
+"""
+AnyCompany Food & Beverage - Point d'entrée unique des dashboards
+Sert les trois dashboards dans un même processus Streamlit afin qu'ils partagent
+le pool de connexions et le cache de résultats de data_access.py
+"""
+
+import streamlit as st
+
+pages = [
+    st.Page("sales_dashboard.py", title="Sales Dashboard", icon="📊"),
+    st.Page("promotion_analysis.py", title="Promotion Analysis", icon="🎯"),
+    st.Page("marketing_roi.py", title="Marketing ROI", icon="💼"),
+]
+
+st.navigation(pages).run()
@@ -0,0 +1,272 @@
+"""
+AnyCompany Food & Beverage - Banc de mesure des requêtes
+Chronomètre chaque requête nommée des dashboards et chaque instruction des analyses
+Sql/sales_trends.sql, promotion_impact.sql et campaign_performance.sql sur le moteur
+local DuckDB, à plusieurs échelles de données, et compare les résultats à une référence
+
+Usage :
+    python Streamlit/benchmark.py --scales 1 10 100
+    python Streamlit/benchmark.py --scales 1 10 --save-baseline
+    python Streamlit/benchmark.py --scales 1 10 --baseline data/bench/baseline.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import local_engine
+from data_access import render_query
+from filters import default_filters
+from queries import QUERIES
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+BENCH_DIR = local_engine.ROOT_DIR / 'data' / 'bench'
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+
+# Analyses SQL mesurées instruction par instruction
+ANALYSIS_SCRIPTS = ('sales_trends.sql', 'promotion_impact.sql', 'campaign_performance.sql')
+
+# Requêtes de métadonnées propres à Snowflake : hors périmètre
+SKIPPED_QUERIES = ('table_versions', 'query_stats')
+
+# Paramètres des requêtes nommées qui en attendent : valeurs par défaut du dashboard
+QUERY_PARAMS = {
+    'propensity_customers': {'min_score': '0.60', 'max_score': '1.00', 'limit': 500},
+}
+
+# Une mesure régresse si sa médiane dépasse la référence de plus de TOLERANCE
+# et d'au moins NOISE_FLOOR_MS (les requêtes de quelques ms sont trop bruitées)
+TOLERANCE = 0.20
+NOISE_FLOOR_MS = 5.0
+
+# Tables non dupliquées lors de la mise à l'échelle
+UNSCALED_TABLES = ('load_batches',)
+
+
+# ========================================
+# JEU DE DONNÉES À L'ÉCHELLE
+# ========================================
+
+def _scaled_select(conn, path, scale):
+    """SELECT qui duplique un fichier Parquet `scale` fois en gardant des identifiants uniques
+
+    Les colonnes *_id sont suffixées par le numéro de copie (ou décalées pour les entiers),
+    sauf load_batch_id (lot de chargement, commun aux copies) ; les clés étrangères
+    (product_id, order_id...) le sont de la même façon, donc chaque copie reste cohérente
+    avec elle-même. Dates, régions et montants sont conservés : la densité
+    de ventes par région et par jour est multipliée par `scale`.
+    """
+    columns = conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{path}')").fetchall()
+    expressions = []
+    for name, col_type, *_ in columns:
+        if not name.lower().endswith('_id') or name.lower() == 'load_batch_id':
+            expressions.append(name)
+        elif col_type.upper() in ('VARCHAR', 'TEXT'):
+            expressions.append(f"CASE WHEN copy_no = 0 THEN {name} ELSE {name} || '~' || copy_no END AS {name}")
+        else:
+            expressions.append(f"CAST({name} AS BIGINT) * {scale} + copy_no AS {name}")
+    return (
+        f"SELECT {', '.join(expressions)} "
+        f"FROM read_parquet('{path}'), range({scale}) AS copies(copy_no)"
+    )
+
+
+def prepare_dataset(scale, base_dir=local_engine.LOCAL_DATA_DIR, bench_dir=BENCH_DIR, force=False):
+    """Construire (une fois) data/bench/x<scale> : SILVER dupliqué puis ANALYTICS recalculé"""
+    target = Path(bench_dir) / f'x{scale}'
+    if scale == 1:
+        return Path(base_dir)
+    if (target / 'analytics').is_dir() and not force:
+        return target
+
+    import duckdb
+
+    print(f"🏗️  Jeu de données ×{scale} → {target}")
+    conn = duckdb.connect()
+    conn.execute('CREATE SCHEMA IF NOT EXISTS SILVER')
+    for path in sorted((Path(base_dir) / 'silver').glob('*.parquet')):
+        if path.stem in UNSCALED_TABLES:
+            select = f"SELECT * FROM read_parquet('{path.as_posix()}')"
+        else:
+            select = _scaled_select(conn, path.as_posix(), scale)
+        conn.execute(f"CREATE TABLE SILVER.{path.stem} AS {select}")
+    local_engine.build_analytics(conn, target, verbose=False)
+    conn.close()
+    return target
+
+
+# ========================================
+# CHARGES DE TRAVAIL
+# ========================================
+
+def workloads():
+    """[(nom, SQL Snowflake, mesuré)] : requêtes nommées puis instructions des analyses
+
+    Les instructions qui ne renvoient pas de résultat (SET, tables temporaires) sont
+    exécutées pour préparer les suivantes mais ne sont mesurées que si ce sont des requêtes.
+    """
+    items = [
+        (f"query:{name}", render_query(name, filters=default_filters(), **QUERY_PARAMS.get(name, {})), True)
+        for name in QUERIES if name not in SKIPPED_QUERIES
+    ]
+    for script in ANALYSIS_SCRIPTS:
+        text = (local_engine.SQL_DIR / script).read_text(encoding='utf-8')
+        for i, stmt in enumerate(local_engine.split_statements(text), start=1):
+            measured = stmt.lstrip().upper().startswith(('SELECT', 'WITH'))
+            items.append((f"{script}#{i}", stmt, measured))
+    return items
+
+
+def _missing_tables(conn, sql):
+    """Tables SILVER/ANALYTICS lues par la requête et absentes du jeu de données (ex. les scores
+    de propension, écrits par ml/purchase_propensity.py et non recalculés à l'échelle)"""
+    tables = {t.upper() for t in re.findall(r'\b(?:SILVER|ANALYTICS)\.\w+', sql, flags=re.I)}
+    existing = {
+        f"{schema}.{table}".upper()
+        for schema, table in conn.execute("SELECT table_schema, table_name FROM information_schema.tables").fetchall()
+    }
+    return sorted(tables - existing)
+
+
+def _run_once(conn, sql):
+    """Exécuter une requête et matérialiser son résultat ; (secondes, lignes, lignes lues)"""
+    start = time.perf_counter()
+    result = conn.execute(sql).arrow()
+    seconds = time.perf_counter() - start
+    rows = result.num_rows if hasattr(result, 'num_rows') else len(result.read_all())
+    rows_scanned = None
+    if hasattr(conn, 'get_profiling_information'):
+        profile = json.loads(conn.get_profiling_information(format='json'))
+        rows_scanned = profile.get('cumulative_rows_scanned')
+    return seconds, rows, rows_scanned
+
+
+def run_benchmark(data_dir, scale, repeat=10, warmup=1):
+    """Mesurer toutes les charges de travail sur un dossier Parquet ; une ligne par requête"""
+    conn = local_engine.open_database(data_dir)
+    conn.execute("PRAGMA enable_profiling = 'no_output'")
+    records = []
+    for name, stmt, measured in workloads():
+        sql = local_engine.translate(stmt)
+        if sql is None:
+            continue
+        if not measured:
+            conn.execute(sql)
+            continue
+        missing = _missing_tables(conn, sql)
+        if missing:
+            print(f"  ×{scale:<4} {name:<40} ignorée ({', '.join(missing)} absente)")
+            continue
+        for _ in range(warmup):
+            _run_once(conn, sql)
+        timings = []
+        for _ in range(repeat):
+            seconds, rows, rows_scanned = _run_once(conn, sql)
+            timings.append(seconds * 1000)
+        records.append({
+            'SCALE': scale,
+            'WORKLOAD': name,
+            'P50_MS': round(float(np.percentile(timings, 50)), 3),
+            'P95_MS': round(float(np.percentile(timings, 95)), 3),
+            'P99_MS': round(float(np.percentile(timings, 99)), 3),
+            'MAX_MS': round(max(timings), 3),
+            'ROWS': rows,
+            'ROWS_SCANNED': rows_scanned
+        })
+        print(f"  ×{scale:<4} {name:<40} p50 {records[-1]['P50_MS']:>9.1f} ms   "
+              f"p95 {records[-1]['P95_MS']:>9.1f} ms   {rows_scanned or 0:>12,} lignes lues")
+    conn.close()
+    return pd.DataFrame(records)
+
+
+# ========================================
+# RÉFÉRENCE
+# ========================================
+
+def save_results(results, path, repeat):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.node(),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'results': results.to_dict(orient='records')
+    }
+    path.write_text(json.dumps(payload, indent=1, default=str), encoding='utf-8')
+    print(f"💾 {len(results)} mesures → {path}")
+
+
+def compare_to_baseline(results, baseline_path, tolerance=TOLERANCE):
+    """Joindre les mesures à la référence sur (échelle, requête) ; colonne REGRESSION"""
+    baseline = pd.DataFrame(json.loads(Path(baseline_path).read_text(encoding='utf-8'))['results'])
+    merged = results.merge(
+        baseline[['SCALE', 'WORKLOAD', 'P50_MS', 'P95_MS', 'ROWS_SCANNED']],
+        on=['SCALE', 'WORKLOAD'], how='left', suffixes=('', '_BASELINE')
+    )
+    merged['P50_RATIO'] = (merged['P50_MS'] / merged['P50_MS_BASELINE']).round(2)
+    merged['REGRESSION'] = (
+        (merged['P50_RATIO'] > 1 + tolerance)
+        & (merged['P50_MS'] - merged['P50_MS_BASELINE'] > NOISE_FLOOR_MS)
+    )
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc de mesure des requêtes (moteur local DuckDB)")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="Facteurs de volume (1 = données de data/local)")
+    parser.add_argument('--repeat', type=int, default=10, help="Exécutions mesurées par requête")
+    parser.add_argument('--data-dir', default=str(local_engine.LOCAL_DATA_DIR),
+                        help="Jeu de données ×1 (sortie de local_engine.py build)")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Fichier de référence")
+    parser.add_argument('--save-baseline', action='store_true', help="Remplacer la référence par ces mesures")
+    parser.add_argument('--output', help="Fichier JSON des mesures (défaut : data/bench/results-<date>.json)")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="Ralentissement toléré de la médiane (0.20 = +20 %%)")
+    parser.add_argument('--rebuild', action='store_true', help="Reconstruire les jeux de données à l'échelle")
+    args = parser.parse_args(argv)
+
+    if not local_engine.is_available(args.data_dir):
+        print(f"❌ Pas de données locales dans {args.data_dir} (python Streamlit/local_engine.py build ...)")
+        return 1
+
+    results = pd.concat([
+        run_benchmark(prepare_dataset(scale, base_dir=args.data_dir, force=args.rebuild), scale, repeat=args.repeat)
+        for scale in args.scales
+    ], ignore_index=True)
+
+    output = args.output or BENCH_DIR / f"results-{datetime.now():%Y%m%d-%H%M%S}.json"
+    save_results(results, output, args.repeat)
+    if args.save_baseline:
+        save_results(results, args.baseline, args.repeat)
+        return 0
+
+    if not Path(args.baseline).exists():
+        print(f"ℹ️  Pas de référence ({args.baseline}) : relancer avec --save-baseline pour en créer une")
+        return 0
+    comparison = compare_to_baseline(results, args.baseline, tolerance=args.tolerance)
+    regressions = comparison[comparison['REGRESSION']]
+    print(f"\n📊 Comparaison à {args.baseline}")
+    print(comparison[['SCALE', 'WORKLOAD', 'P50_MS_BASELINE', 'P50_MS', 'P50_RATIO', 'REGRESSION']]
+          .to_string(index=False))
+    if len(regressions) > 0:
+        print(f"\n❌ {len(regressions)} requête(s) plus lente(s) de plus de {args.tolerance:.0%}")
+        return 1
+    print("\n✅ Aucune régression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,580 @@
+"""
+AnyCompany Food & Beverage - Couche d'accès aux données partagée
+Pool de connexions Snowflake, cache de résultats commun (mémoire + disque)
+et chronométrage des requêtes
+"""
+
+import hashlib
+import itertools
+import json
+import contextvars
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from queue import Empty, LifoQueue
+
+import pandas as pd
+
+import local_engine
+from filters import filter_sql
+from queries import QUERIES, QUERY_FILTERS
+
+try:
+    import snowflake.connector
+    SNOWFLAKE_AVAILABLE = True
+except ImportError:
+    SNOWFLAKE_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+POOL_SIZE = 4            # Connexions Snowflake ouvertes au maximum
+VERSION_POLL_SECONDS = 30  # Fréquence max. de relecture des dates de modification des tables
+QUERY_LOG_SIZE = 200     # Nombre de mesures conservées en mémoire
+
+# Cache disque partagé entre processus Streamlit et redémarrages
+DISK_CACHE_DIR = Path(os.environ.get(
+    'ANYCOMPANY_CACHE_DIR', Path(__file__).resolve().parent.parent / 'data' / 'cache'
+))
+DISK_CACHE_MAX_BYTES = int(os.environ.get('ANYCOMPANY_CACHE_MAX_MB', 512)) * 1024 * 1024
+# Cache mémoire, par processus Streamlit
+MEMORY_CACHE_MAX_BYTES = int(os.environ.get('ANYCOMPANY_MEMORY_CACHE_MAX_MB', 256)) * 1024 * 1024
+
+# Journal des requêtes (une ligne JSON par exécution) : au-delà de QUERY_LOG_MAX_BYTES,
+# le fichier devient queries.jsonl.1 (l'ancienne copie est écrasée) et un nouveau commence
+QUERY_LOG_FILE = Path(os.environ.get(
+    'ANYCOMPANY_QUERY_LOG', Path(__file__).resolve().parent.parent / 'data' / 'logs' / 'queries.jsonl'
+))
+QUERY_LOG_MAX_BYTES = int(os.environ.get('ANYCOMPANY_QUERY_LOG_MAX_MB', 10)) * 1024 * 1024
+# Mesure des octets lus : une requête de métadonnées en plus après chaque requête
+# Snowflake hors cache, lancée en arrière-plan (ANYCOMPANY_PROFILE_BYTES=0 pour la couper)
+PROFILE_BYTES_SCANNED = os.environ.get('ANYCOMPANY_PROFILE_BYTES', '1') == '1'
+
+# Moteur d'exécution : 'snowflake' ou 'local' (DuckDB sur les Parquet de local_engine.py).
+# Par défaut Snowflake si le connecteur est installé, sinon le moteur local s'il a été construit
+BACKEND = os.environ.get('ANYCOMPANY_BACKEND') or (
+    'snowflake' if SNOWFLAKE_AVAILABLE
+    else 'local' if local_engine.is_available()
+    else None
+)
+DATA_AVAILABLE = BACKEND is not None
+
+
+def get_snowflake_config():
+    """Lire la section [snowflake] de .streamlit/secrets.toml"""
+    import streamlit as st
+    return dict(st.secrets["snowflake"])
+
+
+# ========================================
+# POOL DE CONNEXIONS
+# ========================================
+
+class ConnectionPool:
+    """Pool borné de connexions Snowflake, partagé par tous les dashboards du processus"""
+
+    def __init__(self, max_size=POOL_SIZE):
+        self.max_size = max_size
+        self._idle = LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        config = get_snowflake_config()
+        return snowflake.connector.connect(
+            user=config["user"],
+            password=config["password"],
+            account=config["account"],
+            warehouse=config["warehouse"],
+            database=config["database"],
+            schema=config["schema"]
+        )
+
+    def acquire(self):
+        """Réutiliser une connexion libre, en ouvrir une nouvelle ou attendre"""
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def release(self, conn, broken=False):
+        if broken:
+            with self._lock:
+                self._created -= 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except snowflake.connector.errors.OperationalError:
+            self.release(conn, broken=True)
+            raise
+        except Exception:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+
+# ========================================
+# CACHE DE RÉSULTATS
+# ========================================
+
+class ResultCache:
+    """Cache mémoire des DataFrames, commun aux trois dashboards
+
+    Pas d'expiration dans le temps : chaque entrée mémorise la version des tables
+    lues (voir DataVersions) et n'est invalidée que lorsque l'une d'elles change.
+    Au-delà de max_bytes, les DataFrames les moins récemment lus sont retirés.
+    """
+
+    def __init__(self, max_bytes=MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé → (version, DataFrame, octets), du moins au plus récent
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_version, df, _ = entry
+            if stored_version != version:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        # Copie : les pages ajoutent des colonnes aux DataFrames retournés
+        return df.copy()
+
+    def put(self, key, df, version=None):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return  # Plus gros que tout le cache : servi par le cache disque uniquement
+            self._entries[key] = (version, df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def discard_outdated(self, versions):
+        """Retirer les entrées qui lisent une table modifiée depuis ({"SCHEMA.TABLE": version})"""
+        with self._lock:
+            outdated = [
+                key for key, (stored_version, _, _) in self._entries.items()
+                if any(versions.get(table) != table_version for table, table_version in stored_version or ())
+            ]
+            for key in outdated:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+
+class DiskCache:
+    """Résultats persistés en Arrow IPC (un fichier par hash de requête et de version)
+
+    Partagé par tous les processus qui pointent sur le même dossier : les écritures
+    passent par un fichier temporaire renommé atomiquement, un lecteur voit donc soit
+    l'ancien fichier soit le nouveau. La date de modification sert d'horodatage LRU ;
+    au-delà de max_bytes, les fichiers les moins récemment lus sont supprimés.
+    """
+
+    SUFFIX = '.arrow'
+
+    def __init__(self, directory=DISK_CACHE_DIR, max_bytes=DISK_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key, version):
+        digest = hashlib.sha256(repr((key, version)).encode('utf-8')).hexdigest()
+        return self.directory / f'{digest}{self.SUFFIX}'
+
+    def get(self, key, version=None):
+        path = self._path(key, version)
+        try:
+            df = arrow_to_pandas(pyarrow.feather.read_table(path))
+            os.utime(path)  # Marquer l'entrée comme récemment utilisée
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Fichier illisible (écriture d'une ancienne version, disque plein...) : ignoré
+            self._remove(path)
+            return None
+        return df
+
+    def put(self, key, df, version=None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.reset_index(drop=True).to_feather(tmp)
+            os.replace(tmp, self._path(key, version))
+        except Exception:
+            # Types non sérialisables en Arrow : le résultat reste en cache mémoire uniquement
+            self._remove(Path(tmp))
+            return
+        self.evict()
+
+    def evict(self):
+        """Supprimer les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = []
+        for path in self.directory.glob(f'*{self.SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Supprimé entre-temps par un autre processus
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob(f'*{self.SUFFIX}'):
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ========================================
+# VERSION DES DONNÉES
+# ========================================
+
+def fetch_table_versions():
+    """Date de dernière modification de chaque table SILVER/ANALYTICS ({"SCHEMA.TABLE": version})"""
+    if BACKEND == 'local':
+        return local_engine.table_versions()
+    df = run_sql(render_query("table_versions"))
+    return {
+        f"{row.TABLE_SCHEMA}.{row.TABLE_NAME}".upper(): str(row.LAST_ALTERED)
+        for row in df.itertuples(index=False)
+    }
+
+
+class DataVersions:
+    """Versions des tables sources, relues au plus une fois toutes les `poll` secondes
+
+    Un rafraîchissement de SILVER (clean_data*.sql) ou d'ANALYTICS modifie LAST_ALTERED
+    et invalide ainsi uniquement les résultats qui lisent les tables concernées.
+    """
+
+    def __init__(self, poll=VERSION_POLL_SECONDS):
+        self.poll = poll
+        self._versions = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at > self.poll:
+                versions = fetch_table_versions()
+                self._checked_at = time.monotonic()
+                if versions != self._versions:
+                    # Les résultats qui lisent une table modifiée ne seront plus jamais servis
+                    cache.discard_outdated(versions)
+                    self._versions = versions
+            return self._versions
+
+    def for_sql(self, sql):
+        """Version des seules tables référencées par une requête"""
+        tables = sorted({t.upper() for t in re.findall(r'\b(?:SILVER|ANALYTICS)\.\w+', sql, flags=re.I)})
+        versions = self.current()
+        return tuple((table, versions.get(table)) for table in tables)
+
+    def refresh(self):
+        """Forcer la relecture (ex. juste après un chargement)"""
+        with self._lock:
+            self._checked_at = None
+
+
+# ========================================
+# CHRONOMÉTRAGE
+# ========================================
+
+query_log = deque(maxlen=QUERY_LOG_SIZE)
+_query_seq = itertools.count(1)
+# Exécution de page en cours (repère de query_log_mark) : chaque session Streamlit a son
+# propre thread de script, et submit_named_queries transmet le repère aux threads du pool
+_run_mark = contextvars.ContextVar('anycompany_run_mark', default=None)
+_run_seq = itertools.count(1)
+_log_file_lock = threading.Lock()
+
+
+def record_query(name, seconds, rows, cache_hit, query_id=None, bytes_scanned=None):
+    """Conserver une mesure en mémoire et l'ajouter au journal QUERY_LOG_FILE
+
+    Sur un résultat servi par le cache, rien n'est lu dans l'entrepôt (BYTES_SCANNED = 0).
+    Avec PROFILE_BYTES_SCANNED, les octets lus d'une requête Snowflake sont relus en
+    arrière-plan : la mesure est complétée puis journalisée sans retarder la page.
+    La mesure porte le repère de l'exécution de page qui l'a lancée (RUN_MARK).
+    """
+    entry = {
+        'SEQ': next(_query_seq),
+        'RUN_MARK': _run_mark.get(),
+        'QUERY_NAME': name,
+        'EXECUTED_AT': datetime.now(),
+        'WALL_TIME_MS': round(seconds * 1000, 1),
+        'ROWS': rows,
+        'BYTES_SCANNED': 0 if cache_hit else bytes_scanned,
+        'CACHE_HIT': cache_hit,
+        'QUERY_ID': query_id,
+        'BACKEND': BACKEND
+    }
+    query_log.append(entry)
+    if not cache_hit and bytes_scanned is None and query_id and PROFILE_BYTES_SCANNED:
+        profile_executor.submit(_complete_entry, entry, query_id)
+    else:
+        _write_log_entry(entry)
+
+
+def _complete_entry(entry, query_id):
+    entry['BYTES_SCANNED'] = fetch_bytes_scanned(query_id)
+    _write_log_entry(entry)
+
+
+def _write_log_entry(entry):
+    try:
+        with _log_file_lock:
+            QUERY_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                if QUERY_LOG_FILE.stat().st_size >= QUERY_LOG_MAX_BYTES:
+                    os.replace(QUERY_LOG_FILE, QUERY_LOG_FILE.with_name(QUERY_LOG_FILE.name + '.1'))
+            except FileNotFoundError:
+                pass
+            with open(QUERY_LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+    except OSError:
+        pass  # Le journal ne doit jamais empêcher l'affichage d'un dashboard
+
+
+def query_log_mark():
+    """Repère à prendre en début de page : get_query_log(mark=...) ne garde que les
+    requêtes lancées ensuite par cette exécution de page, pas celles des autres sessions"""
+    mark = next(_run_seq)
+    _run_mark.set(mark)
+    return mark
+
+
+def get_query_log(mark=None):
+    """Retourner les dernières mesures sous forme de DataFrame"""
+    entries = [e for e in list(query_log) if mark is None or e['RUN_MARK'] == mark]
+    return pd.DataFrame(entries)
+
+
+def fetch_bytes_scanned(query_id):
+    """Octets lus par une requête Snowflake, d'après l'historique des requêtes (None si inconnu)"""
+    if not query_id:
+        return None
+    try:
+        df = run_sql(render_query("query_stats", query_id=query_id))
+    except Exception:
+        return None
+    return int(df['BYTES_SCANNED'].iloc[0]) if len(df) > 0 else None
+
+
+# ========================================
+# EXÉCUTION DES REQUÊTES NOMMÉES
+# ========================================
+
+# Objets uniques au niveau du module : tous les dashboards servis par le même
+# processus Streamlit (voir app.py) partagent le pool et le cache
+pool = ConnectionPool()
+# Autant de threads que de connexions : au-delà, ils attendraient une connexion libre
+executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='anycompany-query')
+# Relecture des octets lus (PROFILE_BYTES_SCANNED) : un seul thread, une connexion du pool au plus
+profile_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='anycompany-profile')
+cache = ResultCache()
+disk_cache = DiskCache() if PYARROW_AVAILABLE else None
+data_versions = DataVersions()
+
+
+def render_query(name, filters=None, **params):
+    """Retourner le SQL d'une requête nommée avec ses paramètres
+
+    filters : contexte de la sidebar (filters.py), poussé dans le WHERE des
+    requêtes déclarées dans QUERY_FILTERS
+    """
+    try:
+        template = QUERIES[name]
+    except KeyError:
+        raise KeyError(f"Requête inconnue : {name}") from None
+    if name in QUERY_FILTERS:
+        params['filters'] = filter_sql(filters, **QUERY_FILTERS[name])
+    sql = template.format(**params) if params else template
+    # Commentaire conservé dans QUERY_HISTORY : Sql/pruning_report.sql regroupe les mesures par requête nommée
+    return f"/* anycompany:{name} */{sql}"
+
+
+def _arrow_dtype(arrow_type):
+    """Textes et dates restent en mémoire Arrow ; les nombres passent en numpy
+    (sans copie en l'absence de NULL), car les pages testent leurs valeurs
+    (`if x < 0`) avec la sémantique NaN et non pd.NA"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_date(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def arrow_to_pandas(table):
+    """Table Arrow → DataFrame, sans conversion ligne à ligne par des tuples Python
+
+    Les NUMBER à décimales arrivent en decimal128 : ils sont convertis en float64
+    côté Arrow, comme le fait fetch_pandas_all.
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(types_mapper=_arrow_dtype)
+
+
+def fetch_dataframe(cursor):
+    """Lire tout le résultat d'un curseur Snowflake en lots Arrow"""
+    table = cursor.fetch_arrow_all()
+    if table is None:  # Résultat vide : pas de lot Arrow, colonnes reprises de la description
+        return pd.DataFrame(columns=[col[0] for col in cursor.description])
+    return arrow_to_pandas(table)
+
+
+def execute_sql(sql):
+    """Exécuter du SQL brut ; retourne (DataFrame, query id Snowflake ou None en local)"""
+    if BACKEND == 'local':
+        if PYARROW_AVAILABLE:
+            return arrow_to_pandas(local_engine.run_sql_arrow(sql)), None
+        return local_engine.run_sql(sql), None
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            if PYARROW_AVAILABLE:
+                df = fetch_dataframe(cursor)
+            else:
+                df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+            return df, cursor.sfqid
+        finally:
+            cursor.close()
+
+
+def run_sql(sql):
+    """Exécuter du SQL brut sur une connexion du pool (ou sur le moteur local)"""
+    return execute_sql(sql)[0]
+
+
+def iter_sql_batches(sql):
+    """Parcourir un gros résultat lot Arrow par lot Arrow (un DataFrame par lot)
+
+    Pour les extractions larges (données d'entraînement ML) qui ne doivent pas
+    être matérialisées d'un bloc ; la connexion reste réservée pendant le parcours.
+    """
+    if not PYARROW_AVAILABLE:
+        yield run_sql(sql)
+        return
+    if BACKEND == 'local':
+        for batch in local_engine.iter_arrow_batches(sql):
+            yield arrow_to_pandas(pa.Table.from_batches([batch]))
+        return
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            for table in cursor.fetch_arrow_batches():
+                yield arrow_to_pandas(table)
+        finally:
+            cursor.close()
+
+
+def run_named_query(name, filters=None, **params):
+    """Exécuter une requête nommée, en passant par le cache partagé
+
+    Le SQL rendu fait partie de la clé : chaque combinaison de filtres a sa propre entrée.
+    L'entrée reste valide tant que les tables lues n'ont pas été modifiées.
+    """
+    sql = render_query(name, filters=filters, **params)
+    key = (name, sql)
+    start = time.perf_counter()
+    version = data_versions.for_sql(sql)
+
+    df = cache.get(key, version)
+    if df is not None:
+        record_query(name, time.perf_counter() - start, len(df), cache_hit=True)
+        return df
+
+    # Résultat calculé par un autre processus ou avant un redémarrage
+    if disk_cache is not None:
+        df = disk_cache.get(key, version)
+        if df is not None:
+            cache.put(key, df, version)
+            record_query(name, time.perf_counter() - start, len(df), cache_hit=True)
+            return df.copy()
+
+    df, query_id = execute_sql(sql)
+    seconds = time.perf_counter() - start
+    cache.put(key, df, version)
+    if disk_cache is not None:
+        disk_cache.put(key, df, version)
+    record_query(name, seconds, len(df), cache_hit=False, query_id=query_id)
+    return df.copy()
+
+
+def submit_named_queries(names, filters=None):
+    """Lancer en parallèle les requêtes nommées d'une page
+
+    Retourne {nom: Future}. Chaque section appelle .result() sur sa seule requête :
+    elle s'affiche dès que son résultat arrive, pendant que les suivantes tournent
+    encore, et la page attend à peu près la requête la plus lente au lieu de la somme.
+    Les exceptions sont relevées par .result(), dans le thread du script Streamlit.
+    Chaque requête tourne dans une copie du contexte de la page (repère du profilage).
+    """
+    return {name: executor.submit(contextvars.copy_context().run, run_named_query, name, filters=filters)
+            for name in dict.fromkeys(names)}
+
+
+def has_table(table):
+    """Vrai si SCHEMA.table existe : les tables d'un script optionnel (ex. anomaly_detection.sql)
+    peuvent manquer tant que celui-ci n'a pas été exécuté"""
+    return table.upper() in data_versions.current()
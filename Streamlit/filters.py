@@ -0,0 +1,113 @@
+"""
+AnyCompany Food & Beverage - Contexte de filtres partagé
+Période, régions et méthodes de paiement choisies dans la sidebar, conservées
+d'une page à l'autre et traduites en conditions SQL pour chaque requête nommée
+"""
+
+import calendar
+from datetime import date
+
+PERIODS = ["Derniers 12 mois", "Derniers 24 mois", "Année en cours", "Tout l'historique"]
+
+NO_DATA_MESSAGE = "Aucune vente pour les filtres sélectionnés (période, régions, méthodes de paiement)"
+
+
+def default_filters():
+    # Tout l'historique par défaut : les données ne vont pas forcément jusqu'à aujourd'hui
+    return {'period': "Tout l'historique", 'regions': [], 'payment_methods': []}
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _months_before(day, months):
+    """Même jour n mois plus tôt, ramené au dernier jour du mois (comme DATEADD)"""
+    month = day.year * 12 + day.month - 1 - months
+    year, month = divmod(month, 12)
+    last_day = calendar.monthrange(year, month + 1)[1]
+    return date(year, month + 1, min(day.day, last_day))
+
+
+def _date_literal(day):
+    return f"'{day.isoformat()}'::DATE"
+
+
+def period_condition(period, date_col, today=None):
+    """Condition SQL (Snowflake) correspondant à une période de la sidebar
+
+    La date du jour est résolue ici et écrite en littéral : le SQL change chaque jour,
+    donc la clé des caches aussi, et une fenêtre calculée la veille n'est jamais resservie.
+    """
+    today = today or date.today()
+    if period == "Derniers 12 mois":
+        return f"{date_col} >= {_date_literal(_months_before(today, 12))}"
+    elif period == "Derniers 24 mois":
+        return f"{date_col} >= {_date_literal(_months_before(today, 24))}"
+    elif period == "Année en cours":
+        return (f"{date_col} >= {_date_literal(date(today.year, 1, 1))} "
+                f"AND {date_col} < {_date_literal(date(today.year + 1, 1, 1))}")
+    return None
+
+
+def filter_sql(filters, date_col=None, region_col=None, payment_col=None):
+    """Fragment "AND ..." à insérer après le WHERE d'une requête
+
+    Une colonne à None signifie que la table ne porte pas ce filtre (ex. pas de
+    méthode de paiement sur les promotions). Les valeurs sont triées pour que
+    chaque combinaison de filtres produise un SQL, donc une entrée de cache, unique.
+    """
+    filters = filters or default_filters()
+    conditions = []
+    if date_col:
+        condition = period_condition(filters.get('period'), date_col)
+        if condition:
+            conditions.append(condition)
+    if region_col and filters.get('regions'):
+        values = ', '.join(_quote(v) for v in sorted(filters['regions']))
+        conditions.append(f"{region_col} IN ({values})")
+    if payment_col and filters.get('payment_methods'):
+        values = ', '.join(_quote(v) for v in sorted(filters['payment_methods']))
+        conditions.append(f"{payment_col} IN ({values})")
+    return '\n'.join(f"  AND {condition}" for condition in conditions)
+
+
+def render_filters(options=None):
+    """Afficher les filtres dans la sidebar et retourner le contexte courant
+
+    options : DataFrame REGION / PAYMENT_METHOD (requête nommée "filter_options").
+    Le contexte est stocké dans st.session_state et suit l'utilisateur sur les trois pages.
+    """
+    import streamlit as st
+
+    state = st.session_state.setdefault('filters', default_filters())
+    regions = sorted(options['REGION'].dropna().unique()) if options is not None else []
+    payment_methods = sorted(options['PAYMENT_METHOD'].dropna().unique()) if options is not None else []
+
+    st.sidebar.header("🔍 Filtres")
+    st.sidebar.info("Filtres communs aux trois dashboards, appliqués à toutes les requêtes")
+
+    period = st.sidebar.selectbox(
+        "Période d'analyse",
+        PERIODS,
+        index=PERIODS.index(state['period'])
+    )
+    selected_regions = st.sidebar.multiselect(
+        "Régions",
+        regions,
+        default=[r for r in state['regions'] if r in regions],
+        placeholder="Toutes les régions"
+    )
+    selected_payments = st.sidebar.multiselect(
+        "Méthodes de paiement",
+        payment_methods,
+        default=[p for p in state['payment_methods'] if p in payment_methods],
+        placeholder="Toutes les méthodes"
+    )
+
+    st.session_state['filters'] = {
+        'period': period,
+        'regions': selected_regions,
+        'payment_methods': selected_payments
+    }
+    return st.session_state['filters']
@@ -0,0 +1,156 @@
+"""
+AnyCompany Food & Beverage - Moteur de chevauchement par intervalles (pandas/numpy)
+Attribue à chaque transaction la promotion ou la campagne active dans sa région,
+sans jointure par plage de dates côté entrepôt
+"""
+
+import numpy as np
+import pandas as pd
+
+# Ordre de priorité quand plusieurs intervalles couvrent la même transaction,
+# sous forme (colonne, meilleur en premier si tri croissant) : même règle que
+# Sql/promotion_flags.sql (plus forte remise, plus récente, plus petit id)
+PROMOTION_PRIORITY = [('DISCOUNT_PERCENTAGE', False), ('START_DATE', False), ('PROMOTION_ID', True)]
+CAMPAIGN_PRIORITY = [('START_DATE', False), ('CAMPAIGN_ID', True)]
+
+
+def _to_days(values):
+    """Convertir des dates (datetime.date, str, datetime64) en nombre de jours int64"""
+    return pd.to_datetime(values).values.astype('datetime64[D]').astype('int64')
+
+
+class RegionIntervalIndex:
+    """Index trié d'intervalles [start_date, end_date] par région
+
+    La ligne du temps de chaque région est découpée en segments élémentaires
+    (bornes = débuts et lendemains de fin). Pour chaque segment on pré-calcule
+    l'intervalle prioritaire et le nombre d'intervalles actifs ; une transaction
+    est ensuite résolue par un simple searchsorted sur les bornes.
+    """
+
+    def __init__(self, intervals, key_col, priority, region_col='REGION',
+                 start_col='START_DATE', end_col='END_DATE'):
+        self.key_col = key_col
+        # Trier du moins prioritaire au plus prioritaire : le dernier écrit gagne
+        sort_cols = [col for col, _ in priority]
+        ascending = [not best_first for _, best_first in priority]
+        self.intervals = (
+            intervals.sort_values(sort_cols, ascending=ascending, na_position='first')
+            .reset_index(drop=True)
+        )
+
+        regions = self.intervals[region_col]
+        starts = _to_days(self.intervals[start_col])
+        ends_exclusive = _to_days(self.intervals[end_col]) + 1
+
+        self._regions = {}
+        for region, positions in regions.groupby(regions, sort=False).indices.items():
+            positions = np.sort(positions)
+            boundaries = np.unique(np.concatenate([starts[positions], ends_exclusive[positions]]))
+            seg_lo = np.searchsorted(boundaries, starts[positions])
+            seg_hi = np.searchsorted(boundaries, ends_exclusive[positions])
+
+            n_segments = len(boundaries) - 1
+            delta = np.zeros(n_segments + 1, dtype='int64')
+            np.add.at(delta, seg_lo, 1)
+            np.add.at(delta, seg_hi, -1)
+            active = np.cumsum(delta)[:n_segments]
+
+            winner = np.full(n_segments, -1, dtype='int64')
+            for position, lo, hi in zip(positions, seg_lo, seg_hi):
+                winner[lo:hi] = position
+
+            self._regions[region] = (boundaries, winner, active)
+
+    def lookup(self, regions, dates):
+        """Retourner (position de l'intervalle retenu ou -1, nombre d'intervalles actifs)"""
+        regions = pd.Series(regions).reset_index(drop=True)
+        days = _to_days(dates)
+        positions = np.full(len(days), -1, dtype='int64')
+        overlaps = np.zeros(len(days), dtype='int64')
+
+        for region, rows in regions.groupby(regions, sort=False).indices.items():
+            if region not in self._regions:
+                continue
+            boundaries, winner, active = self._regions[region]
+            segment = np.searchsorted(boundaries, days[rows], side='right') - 1
+            inside = (segment >= 0) & (segment < len(winner))
+            hit_rows = rows[inside]
+            positions[hit_rows] = winner[segment[inside]]
+            overlaps[hit_rows] = active[segment[inside]]
+
+        return positions, overlaps
+
+    def attribute(self, transactions, columns=(), region_col='REGION', date_col='TRANSACTION_DATE'):
+        """Ajouter aux transactions la clé de l'intervalle retenu, le nombre de
+        chevauchements et les colonnes d'intervalle demandées"""
+        positions, overlaps = self.lookup(transactions[region_col], transactions[date_col])
+        matched = positions >= 0
+        result = transactions.copy()
+        for col in (self.key_col, *columns):
+            values = np.full(len(result), None, dtype=object)
+            values[matched] = self.intervals[col].to_numpy(dtype=object)[positions[matched]]
+            result[col] = values
+        result['OVERLAPPING_INTERVALS'] = overlaps
+        return result
+
+
+# ========================================
+# PROMOTIONS ET CAMPAGNES
+# ========================================
+
+def flag_promotions(transactions, promotions):
+    """Équivalent local de ANALYTICS.transaction_promotion_flags"""
+    index = RegionIntervalIndex(promotions, 'PROMOTION_ID', PROMOTION_PRIORITY)
+    flagged = index.attribute(transactions, columns=('PROMOTION_TYPE', 'DISCOUNT_PERCENTAGE'))
+    flagged['PROMOTION_STATUS'] = np.where(flagged['PROMOTION_ID'].notna(), 'Avec Promotion', 'Sans Promotion')
+    return flagged
+
+
+def flag_campaigns(transactions, campaigns):
+    """Campagne la plus récente active pour chaque vente ; OVERLAPPING_INTERVALS garde
+    le nombre de campagnes actives, utilisé par campaign_sales_impact"""
+    index = RegionIntervalIndex(campaigns, 'CAMPAIGN_ID', CAMPAIGN_PRIORITY)
+    flagged = index.attribute(transactions, columns=('CAMPAIGN_TYPE',))
+    flagged['CAMPAIGN_STATUS'] = np.where(flagged['CAMPAIGN_ID'].notna(), 'Pendant Campagne', 'Hors Campagne')
+    return flagged
+
+
+def _status_summary(flagged, status_col, weights=None):
+    """Ventes, CA et panier moyen par statut ; weights = nombre de fois où chaque vente
+    est comptée (1 par défaut)"""
+    weights = np.ones(len(flagged), dtype='int64') if weights is None else np.asarray(weights, dtype='int64')
+    summary = pd.DataFrame({
+        status_col: flagged[status_col].to_numpy(),
+        'NUMBER_OF_SALES': weights,
+        'TOTAL_SALES': flagged['AMOUNT'].astype(float).to_numpy() * weights
+    }).groupby(status_col, as_index=False).sum()
+    summary['AVG_TRANSACTION_VALUE'] = (summary['TOTAL_SALES'] / summary['NUMBER_OF_SALES']).round(2)
+    return summary
+
+
+def promotion_comparison(flagged):
+    """Mêmes colonnes que la requête nommée promo_comparison"""
+    comparison = _status_summary(flagged, 'PROMOTION_STATUS')
+    comparison['PCT_TRANSACTIONS'] = (comparison['NUMBER_OF_SALES'] * 100.0 / comparison['NUMBER_OF_SALES'].sum()).round(2)
+    comparison['PCT_REVENUE'] = (comparison['TOTAL_SALES'] * 100.0 / comparison['TOTAL_SALES'].sum()).round(2)
+    return comparison.sort_values('TOTAL_SALES', ascending=False).reset_index(drop=True)
+
+
+def promotion_regional(flagged):
+    """Mêmes colonnes que la requête nommée promo_regional"""
+    with_promo = flagged['PROMOTION_STATUS'] == 'Avec Promotion'
+    regional = pd.DataFrame({
+        'REGION': flagged['REGION'],
+        'SALES_WITH_PROMO': flagged['AMOUNT'].astype(float).where(with_promo, 0),
+        'SALES_WITHOUT_PROMO': flagged['AMOUNT'].astype(float).where(~with_promo, 0)
+    }).groupby('REGION', as_index=False, dropna=False).sum()
+    return regional.sort_values('SALES_WITH_PROMO', ascending=False).reset_index(drop=True)
+
+
+def campaign_sales_impact(flagged):
+    """Mêmes colonnes et même règle que la requête nommée marketing_sales_impact
+    (ANALYTICS.campaign_type_performance) : une vente couverte par plusieurs campagnes
+    compte une fois par campagne"""
+    impact = _status_summary(flagged, 'CAMPAIGN_STATUS', weights=np.maximum(flagged['OVERLAPPING_INTERVALS'], 1))
+    return impact.sort_values('TOTAL_SALES', ascending=False).reset_index(drop=True)
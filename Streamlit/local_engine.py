@@ -0,0 +1,600 @@
+"""
+AnyCompany Food & Beverage - Moteur local DuckDB / Parquet
+Exécute les requêtes nommées et les scripts Sql/*.sql hors connexion : les tables
+SILVER et ANALYTICS sont matérialisées en Parquet et interrogées avec DuckDB,
+après traduction des fonctions propres à Snowflake
+
+Usage :
+    python Streamlit/local_engine.py build --stage-dir data/stage
+    python Streamlit/local_engine.py export
+    python Streamlit/local_engine.py refresh
+    python Streamlit/local_engine.py detect
+    python Streamlit/local_engine.py features
+    python Streamlit/local_engine.py run Sql/sales_trends.sql
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# Lecture par lots Arrow et export Parquet en flux ; sans pyarrow, DuckDB écrit les Parquet
+# lui-même et les requêtes passent par pandas
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SQL_DIR = ROOT_DIR / 'Sql'
+LOCAL_DATA_DIR = Path(os.environ.get('ANYCOMPANY_LOCAL_DATA', ROOT_DIR / 'data' / 'local'))
+MATERIALIZED_SCHEMAS = ('SILVER', 'ANALYTICS')
+ARROW_BATCH_ROWS = 1_000_000  # Lignes par lot Arrow lu depuis DuckDB
+
+# Scripts rejoués par `build`, dans l'ordre du README
+BUILD_SCRIPTS = ('Load_data.sql', 'clean_data.sql', 'promotion_flags.sql', 'analytics_rollups.sql',
+                 'anomaly_detection.sql', 'customer_features.sql')
+
+# Agrégats ANALYTICS (tables dynamiques côté Snowflake), recalculables seuls par `refresh`
+ROLLUP_SCRIPT = 'analytics_rollups.sql'
+
+# Détection d'anomalies incrémentale, rejouable seule par `detect` après un chargement
+ANOMALY_SCRIPT = 'anomaly_detection.sql'
+
+# Feature store clients des modèles ML, mis à jour par `features` après un chargement
+FEATURE_SCRIPT = 'customer_features.sql'
+
+# Scripts qui dérivent ANALYTICS de SILVER (fin de BUILD_SCRIPTS)
+ANALYTICS_SCRIPTS = ('promotion_flags.sql', ROLLUP_SCRIPT, ANOMALY_SCRIPT, FEATURE_SCRIPT)
+
+# Instructions sans équivalent local (objets Snowflake uniquement) : ignorées
+UNSUPPORTED_PREFIXES = (
+    'USE DATABASE', 'USE WAREHOUSE', 'CREATE DATABASE', 'CREATE WAREHOUSE',
+    'CREATE OR REPLACE STAGE', 'CREATE STAGE', 'LIST @',
+    'CREATE OR REPLACE STREAM', 'CREATE STREAM'
+)
+
+# Éléments de format TO_CHAR → strftime (les plus longs d'abord)
+DATE_FORMATS = [
+    ('MMMM', '%B'), ('MONTH', '%B'), ('MON', '%b'), ('YYYY', '%Y'), ('YY', '%y'),
+    ('MM', '%m'), ('DD', '%d'), ('DY', '%a'), ('HH24', '%H'), ('HH12', '%I'), ('HH', '%I'),
+    ('MI', '%M'), ('SS', '%S'), ('FF3', '%g'), ('FF6', '%f'), ('FF', '%f'), ('AM', '%p'), ('PM', '%p')
+]
+
+
+# ========================================
+# DÉCOUPAGE DES SCRIPTS
+# ========================================
+
+def split_statements(script):
+    """Découper un script en instructions, sans les commentaires (chaînes respectées)"""
+    statements, current = [], []
+    i, n = 0, len(script)
+    while i < n:
+        char = script[i]
+        if char == "'":
+            end = i + 1
+            while end < n:
+                if script[end] == "'" and script[end + 1:end + 2] == "'":
+                    end += 2
+                elif script[end] == "'":
+                    break
+                else:
+                    end += 1
+            current.append(script[i:end + 1])
+            i = end + 1
+        elif script.startswith('--', i):
+            end = script.find('\n', i)
+            i = n if end == -1 else end
+        elif script.startswith('/*', i):
+            end = script.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+            i += 1
+        else:
+            current.append(char)
+            i += 1
+    statements.append(''.join(current).strip())
+    return [stmt for stmt in statements if stmt]
+
+
+def _split_args(text):
+    """Séparer les arguments de premier niveau d'un appel de fonction"""
+    args, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            args.append(text[start:i].strip())
+            start = i + 1
+    args.append(text[start:].strip())
+    return args
+
+
+def _rewrite_calls(sql, name, rewrite):
+    """Remplacer chaque appel name(...) par rewrite(arguments), du plus interne au plus externe"""
+    pattern = re.compile(rf'\b{name}\s*\(', flags=re.I)
+    for match in reversed(list(pattern.finditer(sql))):
+        depth, quoted = 1, False
+        pos = match.end()
+        while depth and pos < len(sql):
+            char = sql[pos]
+            if char == "'":
+                quoted = not quoted
+            elif not quoted and char == '(':
+                depth += 1
+            elif not quoted and char == ')':
+                depth -= 1
+            pos += 1
+        args = _split_args(sql[match.end():pos - 1])
+        sql = sql[:match.start()] + rewrite(args) + sql[pos:]
+    return sql
+
+
+# ========================================
+# TRADUCTION SNOWFLAKE → DUCKDB
+# ========================================
+
+def _date_part(arg):
+    return arg.strip().strip("'\"").lower()
+
+
+def _strftime_format(fmt):
+    fmt = fmt.strip("'")
+    out, i = [], 0
+    while i < len(fmt):
+        for token, replacement in DATE_FORMATS:
+            if fmt[i:i + len(token)].upper() == token:
+                out.append(replacement)
+                i += len(token)
+                break
+        else:
+            out.append(fmt[i])
+            i += 1
+    return "'" + ''.join(out) + "'"
+
+
+def _to_char(args):
+    if len(args) == 1:
+        return f'CAST({args[0]} AS VARCHAR)'
+    return f'strftime({args[0]}, {_strftime_format(args[1])})'
+
+
+def translate(sql, stage_dir=None):
+    """Traduire une instruction Snowflake en DuckDB (None si sans équivalent local)
+
+    QUALIFY, MERGE, LAG/STDDEV/CORR et les tables temporaires sont supportés tels
+    quels par DuckDB ; seules les fonctions et la syntaxe ci-dessous sont réécrites.
+    """
+    head = ' '.join(sql.split()[:4]).upper()
+    if head.startswith(UNSUPPORTED_PREFIXES) or 'RESULT_SCAN' in head or 'RESULT_SCAN' in sql.upper():
+        return None
+    if head.startswith('USE SCHEMA'):
+        return f'USE {sql.split()[2]}'
+    if head.startswith('COPY INTO'):
+        return _translate_copy(sql, stage_dir)
+    if head.startswith('CREATE OR REPLACE DYNAMIC'):
+        # Table dynamique → table classique : pas de rafraîchissement planifié en local
+        sql = re.sub(r'^CREATE OR REPLACE DYNAMIC TABLE (\S+).*?\bAS\b', r'CREATE OR REPLACE TABLE \1 AS',
+                     sql, count=1, flags=re.I | re.S)
+
+    sql = _rewrite_calls(sql, 'DATEADD',
+                         lambda a: f"CAST(({a[2]}) + INTERVAL ({a[1]}) {_date_part(a[0]).upper()} AS DATE)")
+    sql = _rewrite_calls(sql, 'DATEDIFF', lambda a: f"date_diff('{_date_part(a[0])}', {a[1]}, {a[2]})")
+    sql = _rewrite_calls(sql, 'DATE_TRUNC', lambda a: f"CAST(date_trunc('{_date_part(a[0])}', {a[1]}) AS DATE)")
+    sql = _rewrite_calls(sql, 'TO_CHAR', _to_char)
+    sql = _rewrite_calls(sql, 'TO_VARCHAR', _to_char)
+
+    # Clés de clustering Snowflake : sans objet sur des fichiers Parquet
+    sql = re.sub(r'\s+CLUSTER BY\s*\([^)]*\)', '', sql, flags=re.I)
+    sql = re.sub(r'\bCURRENT_DATE\(\)', 'CURRENT_DATE', sql, flags=re.I)
+    sql = re.sub(r'\bCURRENT_TIMESTAMP\(\)', 'CURRENT_TIMESTAMP', sql, flags=re.I)
+    sql = re.sub(r'\bMINUS\b', 'EXCEPT', sql)
+    sql = re.sub(r'\bNUMBER\(', 'DECIMAL(', sql, flags=re.I)
+    sql = re.sub(r'\bTIMESTAMP_LTZ\b', 'TIMESTAMPTZ', sql, flags=re.I)
+    sql = re.sub(r'\bTIMESTAMP_NTZ\b', 'TIMESTAMP', sql, flags=re.I)
+
+    # Variables de session : SET x = ... / $x
+    sql = re.sub(r'^SET\s+(\w+)\s*=', r'SET VARIABLE \1 =', sql, flags=re.I)
+    sql = re.sub(r"\$([A-Za-z_]\w*)", r"getvariable('\1')", sql)
+    return sql
+
+
+def _translate_copy(sql, stage_dir):
+    """COPY INTO table FROM @S3_STAGE/fichier → INSERT depuis read_csv / read_json"""
+    if stage_dir is None:
+        return None
+    match = re.match(r'COPY INTO (\w+)\s+FROM @\w+/(\S+)', sql, flags=re.I)
+    table, file_name = match.group(1), match.group(2)
+    path = (Path(stage_dir) / file_name).as_posix()
+    if file_name.lower().endswith('.json'):
+        return f"INSERT INTO {table} BY NAME SELECT * FROM read_json_auto('{path}')"
+    # Colonnes typées comme la table cible ; ON_ERROR = CONTINUE → lignes invalides ignorées
+    return (
+        f"INSERT INTO {table} SELECT * FROM read_csv('{path}', header = true, "
+        f"columns = __columns__({table}), nullstr = ['NULL', 'null', ''], "
+        f"quote = '\"', null_padding = true, ignore_errors = true)"
+    )
+
+
+# ========================================
+# CONNEXION ET EXÉCUTION
+# ========================================
+
+_base = None
+_lock = threading.Lock()
+
+
+def _columns_struct(conn, table):
+    rows = conn.execute(f"DESCRIBE {table}").fetchall()
+    return '{' + ', '.join(f"'{name}': '{col_type}'" for name, col_type, *_ in rows) + '}'
+
+
+def _execute(conn, sql):
+    for table in re.findall(r'__columns__\((\w+)\)', sql):
+        sql = sql.replace(f'__columns__({table})', _columns_struct(conn, table))
+    return conn.execute(sql)
+
+
+def is_available(data_dir=LOCAL_DATA_DIR):
+    """Vrai si DuckDB est installé et que les tables ont été matérialisées"""
+    return DUCKDB_AVAILABLE and (Path(data_dir) / 'silver').is_dir()
+
+
+def open_database(data_dir=LOCAL_DATA_DIR):
+    """Base DuckDB en mémoire exposant chaque fichier Parquet comme une vue SCHEMA.table"""
+    conn = duckdb.connect()
+    for schema in MATERIALIZED_SCHEMAS:
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+        for path in sorted((Path(data_dir) / schema.lower()).glob('*.parquet')):
+            conn.execute(
+                f"CREATE OR REPLACE VIEW {schema}.{path.stem} AS "
+                f"SELECT * FROM read_parquet('{path.as_posix()}')"
+            )
+    return conn
+
+
+def table_versions(data_dir=LOCAL_DATA_DIR):
+    """Version de chaque table matérialisée : date de modification du fichier Parquet"""
+    return {
+        f"{schema}.{path.stem}".upper(): str(path.stat().st_mtime_ns)
+        for schema in MATERIALIZED_SCHEMAS
+        for path in (Path(data_dir) / schema.lower()).glob('*.parquet')
+    }
+
+
+def get_connection():
+    """Curseur DuckDB propre au thread appelant, sur une base partagée"""
+    global _base
+    with _lock:
+        if _base is None:
+            _base = open_database()
+    return _base.cursor()
+
+
+def _arrow_reader(result, batch_rows):
+    """Lecteur de lots Arrow (to_arrow_reader depuis DuckDB 1.4, fetch_record_batch avant)"""
+    if hasattr(result, 'to_arrow_reader'):
+        return result.to_arrow_reader(batch_rows)
+    return result.fetch_record_batch(batch_rows)
+
+
+def _upper_columns(batch):
+    return batch.rename_columns([name.upper() for name in batch.schema.names])
+
+
+def iter_arrow_batches(sql, batch_rows=ARROW_BATCH_ROWS):
+    """Exécuter une requête Snowflake en local et la lire par lots Arrow (colonnes en majuscules)"""
+    conn = get_connection()
+    try:
+        for batch in _arrow_reader(_execute(conn, translate(sql)), batch_rows):
+            yield _upper_columns(batch)
+    finally:
+        conn.close()
+
+
+def run_sql_arrow(sql):
+    """Résultat complet sous forme de table Arrow, colonnes en majuscules comme Snowflake"""
+    conn = get_connection()
+    try:
+        table = _arrow_reader(_execute(conn, translate(sql)), ARROW_BATCH_ROWS).read_all()
+    finally:
+        conn.close()
+    return _upper_columns(table)
+
+
+def run_sql(sql):
+    """Exécuter une requête Snowflake en local ; colonnes en majuscules comme Snowflake"""
+    conn = get_connection()
+    try:
+        df = _execute(conn, translate(sql)).df()
+    finally:
+        conn.close()
+    df.columns = [col.upper() for col in df.columns]
+    return df
+
+
+def export_query(sql, path, data_dir=LOCAL_DATA_DIR, batch_rows=ARROW_BATCH_ROWS):
+    """Écrire le résultat d'une requête Snowflake dans un fichier Parquet, lot Arrow par lot Arrow
+
+    Les décimaux sont écrits en float64, comme les copies Snowflake des scripts ml/.
+    Le fichier n'apparaît sous son nom qu'une fois complet (écriture puis renommage).
+    Retourne le nombre de lignes écrites.
+    """
+    path = Path(path)
+    partial = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    conn = open_database(data_dir)
+    if not PYARROW_AVAILABLE:
+        try:
+            rows = _copy_to_parquet(conn, translate(sql), partial)
+        finally:
+            conn.close()
+        os.replace(partial, path)
+        return rows
+    writer, rows = None, 0
+    try:
+        for batch in _arrow_reader(_execute(conn, translate(sql)), batch_rows):
+            batch = _upper_columns(pa.Table.from_batches([batch]))
+            batch = batch.cast(pa.schema([
+                pa.field(f.name, pa.float64()) if pa.types.is_decimal(f.type) else f for f in batch.schema
+            ]))
+            if writer is None:
+                writer = pq.ParquetWriter(partial, batch.schema)
+            writer.write_table(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        conn.close()
+    if writer is not None:
+        os.replace(partial, path)
+    return rows
+
+
+def _copy_to_parquet(conn, sql, path):
+    """Export sans pyarrow : COPY DuckDB, décimaux convertis en DOUBLE et colonnes en majuscules"""
+    columns = conn.execute(f'DESCRIBE {sql}').fetchall()
+    select = ', '.join(
+        f'CAST("{name}" AS DOUBLE) AS "{name.upper()}"' if col_type.startswith('DECIMAL')
+        else f'"{name}" AS "{name.upper()}"'
+        for name, col_type, *_ in columns
+    )
+    return conn.execute(
+        f"COPY (SELECT {select} FROM ({sql}) q) TO '{Path(path).as_posix()}' (FORMAT PARQUET)"
+    ).fetchone()[0]
+
+
+def run_script(path, conn=None, stage_dir=None, verbose=True):
+    """Rejouer un script Sql/*.sql ; retourne les résultats des SELECT"""
+    conn = conn or get_connection()
+    results = []
+    for stmt in split_statements(Path(path).read_text(encoding='utf-8')):
+        sql = translate(stmt, stage_dir=stage_dir)
+        first_line = stmt.splitlines()[0][:80]
+        if sql is None:
+            if verbose:
+                print(f"⏭️  {first_line} (ignoré en local)")
+            continue
+        cursor = _execute(conn, sql)
+        if stmt.lstrip().upper().startswith(('SELECT', 'WITH')):
+            df = cursor.df()
+            df.columns = [col.upper() for col in df.columns]
+            results.append((stmt, df))
+    return results
+
+
+# ========================================
+# MATÉRIALISATION
+# ========================================
+
+def _export_schemas(conn, data_dir, verbose=True):
+    for schema in MATERIALIZED_SCHEMAS:
+        target = Path(data_dir) / schema.lower()
+        target.mkdir(parents=True, exist_ok=True)
+        tables = conn.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_type = 'BASE TABLE'", [schema]
+        ).fetchall()
+        for (table,) in tables:
+            path = target / f'{table}.parquet'
+            conn.execute(f"COPY {schema}.{table} TO '{path.as_posix()}' (FORMAT PARQUET)")
+            if verbose:
+                print(f"💾 {schema}.{table} → {path}")
+
+
+def build(stage_dir, data_dir=LOCAL_DATA_DIR):
+    """Chaîne complète hors ligne : fichiers du stage → BRONZE → SILVER → ANALYTICS → Parquet"""
+    conn = duckdb.connect()
+    for schema in ('BRONZE', *MATERIALIZED_SCHEMAS):
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+    for script in BUILD_SCRIPTS:
+        print(f"▶️  {script}")
+        run_script(SQL_DIR / script, conn=conn, stage_dir=stage_dir)
+    _export_schemas(conn, data_dir)
+    conn.close()
+
+
+def build_analytics(conn, data_dir, verbose=True):
+    """Rejouer ANALYTICS_SCRIPTS sur une base DuckDB dont les tables SILVER sont chargées,
+    puis matérialiser SILVER et ANALYTICS en Parquet dans data_dir (ex. jeux de benchmark)"""
+    for schema in MATERIALIZED_SCHEMAS:
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+    for script in ANALYTICS_SCRIPTS:
+        if verbose:
+            print(f"▶️  {script}")
+        run_script(SQL_DIR / script, conn=conn, verbose=verbose)
+    _export_schemas(conn, data_dir, verbose=verbose)
+
+
+def refresh_rollups(data_dir=LOCAL_DATA_DIR):
+    """Recalculer les agrégats ANALYTICS depuis les Parquet existants
+
+    Équivalent local du rafraîchissement planifié des tables dynamiques, par exemple
+    après un `export` ou sur des données construites avant l'ajout des agrégats.
+    """
+    script = SQL_DIR / ROLLUP_SCRIPT
+    conn = open_database(data_dir)
+    # Les agrégats déjà exportés sont exposés en vues : les remplacer par des tables
+    for table in re.findall(r'CREATE OR REPLACE DYNAMIC TABLE (\w+)', script.read_text(encoding='utf-8'), flags=re.I):
+        conn.execute(f'DROP VIEW IF EXISTS ANALYTICS.{table}')
+    conn.execute('USE ANALYTICS')
+    for stmt, df in run_script(script, conn=conn):
+        print(df.to_string())
+    # Seuls les agrégats sont des tables : les autres objets de la base sont des vues
+    _export_schemas(conn, data_dir)
+    conn.close()
+
+
+def run_incremental(script_name, data_dir=LOCAL_DATA_DIR):
+    """Rejouer un script incrémental sur les Parquet existants
+
+    Les tables persistantes du script (CREATE TABLE IF NOT EXISTS) sont chargées en
+    mémoire depuis leurs Parquet, mises à jour avec le seul nouveau lot puis réécrites.
+    """
+    script = SQL_DIR / script_name
+    conn = open_database(data_dir)
+    for table in re.findall(r'CREATE TABLE IF NOT EXISTS (\w+)', script.read_text(encoding='utf-8'), flags=re.I):
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'ANALYTICS' AND table_name = ?",
+            [table]
+        ).fetchone()[0]
+        if exists:
+            # Vue sur le Parquet → table modifiable par MERGE / INSERT / DELETE
+            conn.execute(f'CREATE TABLE ANALYTICS.{table}_courante AS SELECT * FROM ANALYTICS.{table}')
+            conn.execute(f'DROP VIEW ANALYTICS.{table}')
+            conn.execute(f'ALTER TABLE ANALYTICS.{table}_courante RENAME TO {table}')
+    conn.execute('USE ANALYTICS')
+    for stmt, df in run_script(script, conn=conn):
+        print(df.to_string())
+    # Seules les tables du script sont des tables : les autres objets de la base sont des vues
+    _export_schemas(conn, data_dir)
+    conn.close()
+
+
+def detect_anomalies(data_dir=LOCAL_DATA_DIR):
+    """Analyser les ventes arrivées depuis le dernier passage (Sql/anomaly_detection.sql)"""
+    run_incremental(ANOMALY_SCRIPT, data_dir)
+
+
+def refresh_features(data_dir=LOCAL_DATA_DIR):
+    """Mettre à jour les photos du feature store clients (Sql/customer_features.sql)"""
+    run_incremental(FEATURE_SCRIPT, data_dir)
+
+
+def export_from_snowflake(config, data_dir=LOCAL_DATA_DIR):
+    """Copier en Parquet les tables SILVER et ANALYTICS d'un compte Snowflake
+
+    Chaque table est lue par lots Arrow et écrite au fil de l'eau (la table n'est jamais
+    entièrement en mémoire) ; le fichier n'apparaît sous son nom qu'une fois complet.
+    """
+    import snowflake.connector
+
+    conn = snowflake.connector.connect(
+        user=config["user"],
+        password=config["password"],
+        account=config["account"],
+        warehouse=config["warehouse"],
+        database=config["database"]
+    )
+    try:
+        cursor = conn.cursor()
+        for schema in MATERIALIZED_SCHEMAS:
+            target = Path(data_dir) / schema.lower()
+            target.mkdir(parents=True, exist_ok=True)
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = %s AND table_type = 'BASE TABLE'", (schema,)
+            )
+            for (table,) in cursor.fetchall():
+                path = target / f'{table.lower()}.parquet'
+                partial = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+                cursor.execute(f"SELECT * FROM {schema}.{table}")
+                writer, rows = None, 0
+                try:
+                    for batch in cursor.fetch_arrow_batches():
+                        # Largeur d'entier variable d'un lot Snowflake à l'autre : schéma unique en int64
+                        batch = batch.cast(pa.schema([
+                            pa.field(f.name, pa.int64()) if pa.types.is_integer(f.type) else f for f in batch.schema
+                        ]))
+                        if writer is None:
+                            writer = pq.ParquetWriter(partial, batch.schema)
+                        writer.write_table(batch)
+                        rows += batch.num_rows
+                finally:
+                    if writer is not None:
+                        writer.close()
+                if writer is None:  # Table vide : aucun lot Arrow, colonnes reprises de la description
+                    pd.DataFrame(columns=[col[0] for col in cursor.description]).to_parquet(partial, index=False)
+                os.replace(partial, path)
+                print(f"💾 {schema}.{table} → {path} ({rows:,} lignes)")
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Moteur local DuckDB / Parquet")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_cmd = sub.add_parser('build', help="Construire SILVER/ANALYTICS depuis les fichiers du stage")
+    build_cmd.add_argument('--stage-dir', required=True)
+    export_cmd = sub.add_parser('export', help="Copier SILVER/ANALYTICS depuis Snowflake")
+    export_cmd.add_argument('--secrets', default='.streamlit/secrets.toml')
+    sub.add_parser('refresh', help="Recalculer les agrégats ANALYTICS depuis les Parquet")
+    sub.add_parser('detect', help="Détecter les anomalies des ventes arrivées depuis le dernier passage")
+    sub.add_parser('features', help="Mettre à jour le feature store clients des modèles ML")
+    run_cmd = sub.add_parser('run', help="Exécuter un script Sql/*.sql sur les fichiers Parquet")
+    run_cmd.add_argument('script')
+
+    args = parser.parse_args(argv)
+    if not DUCKDB_AVAILABLE:
+        print("❌ duckdb n'est pas installé (pip install duckdb)")
+        return 1
+
+    if args.command == 'build':
+        build(args.stage_dir)
+    elif args.command == 'export':
+        if not PYARROW_AVAILABLE:
+            print("❌ pyarrow n'est pas installé (pip install pyarrow)")
+            return 1
+        import tomllib
+        with open(args.secrets, 'rb') as f:
+            export_from_snowflake(tomllib.load(f)['snowflake'])
+    elif args.command == 'refresh':
+        refresh_rollups()
+    elif args.command == 'detect':
+        detect_anomalies()
+    elif args.command == 'features':
+        refresh_features()
+    else:
+        for stmt, df in run_script(args.script):
+            print(f"\n-- {stmt.splitlines()[0][:80]}")
+            print(df.to_string(max_rows=20))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,30 +20,20 @@ st.set_page_config(
 # CONNEXION SNOWFLAKE
 # ========================================
 
-try:
-    import snowflake.connector
-    
-    @st.cache_resource
-    def get_snowflake_connection():
-        """Créer une connexion Snowflake"""
-        return snowflake.connector.connect(
-            user=st.secrets["snowflake"]["user"],
-            password=st.secrets["snowflake"]["password"],
-            account=st.secrets["snowflake"]["account"],
-            warehouse=st.secrets["snowflake"]["warehouse"],
-            database=st.secrets["snowflake"]["database"],
-            schema=st.secrets["snowflake"]["schema"]
-        )
+from data_access import (
+    BACKEND, DATA_AVAILABLE, has_table, query_log_mark, run_named_query, submit_named_queries
+)
+from filters import render_filters
+from profiler import render_profiler
+from interval_index import flag_campaigns, campaign_sales_impact
 
-    @st.cache_data(ttl=600)
-    def run_query(query):
-        conn = get_snowflake_connection()
-        return pd.read_sql(query, conn)
-    
-    SNOWFLAKE_AVAILABLE = True
-except:
-    SNOWFLAKE_AVAILABLE = False
+# Repère du panneau de profilage : seules les requêtes lancées par cette page y figurent
+profiler_mark = query_log_mark()
+
+if not DATA_AVAILABLE:
     st.warning("Snowflake non configuré. Utilisation de données de démonstration.")
+elif BACKEND == 'local':
+    st.info("🦆 Moteur local DuckDB : tables SILVER/ANALYTICS lues depuis les fichiers Parquet.")
 
 # ========================================
 # DONNÉES DEMO
@@ -105,6 +95,22 @@ def get_demo_data(query_type):
             'RECOMMENDATION': ['⬆️ AUGMENTER (+30%)', '⬆️ AUGMENTER (+15%)', '➡️ MAINTENIR',
                               '⬇️ RÉDUIRE (-40%)', '⬇️ RÉDUIRE (-50%)']
         })
+    elif query_type == "propensity_distribution":
+        return pd.DataFrame({
+            'SCORE_BUCKET': [round(i * 0.05, 2) for i in range(20)],
+            'PROPENSITY_BAND': ['Faible'] * 6 + ['Moyenne'] * 6 + ['Forte'] * 8,
+            'CUSTOMERS': [9200, 8700, 8100, 7400, 6800, 6100, 5500, 4900, 4400, 3900,
+                          3500, 3100, 2800, 2500, 2200, 1900, 1600, 1300, 900, 500],
+            'SCORED_AT': pd.Timestamp('2025-01-15 02:00')
+        })
+    elif query_type == "propensity_customers":
+        return pd.DataFrame({
+            'CUSTOMER_NAME': ['Customer 10482', 'Customer 2291', 'Customer 77310', 'Customer 5120', 'Customer 918'],
+            'REGION': ['Europe', 'Asie', 'Europe', 'Amérique du Nord', 'Afrique'],
+            'PROPENSITY_SCORE': [0.97, 0.95, 0.94, 0.91, 0.88],
+            'PROPENSITY_BAND': ['Forte'] * 5,
+            'MATCHING_CUSTOMERS': [12300] * 5
+        })
 
 # ========================================
 # TITRE
@@ -123,25 +129,48 @@ st.markdown("""
 
 st.markdown("---")
 
+# ========================================
+# SIDEBAR - FILTRES
+# ========================================
+
+# Contexte partagé avec les autres pages, poussé dans chaque requête (voir filters.py)
+filters = render_filters(run_named_query("filter_options") if DATA_AVAILABLE else None)
+
+# ========================================
+# CALCUL LOCAL DES CHEVAUCHEMENTS
+# ========================================
+
+local_overlap = st.sidebar.checkbox(
+    "🧮 Calcul local des chevauchements",
+    value=False,
+    help="Charge ventes et campagnes une fois (cache partagé) et attribue les campagnes en pandas"
+)
+
+# ========================================
+# LANCEMENT DES REQUÊTES DE LA PAGE
+# ========================================
+
+# Toutes les requêtes partent en parallèle ; chaque section attend uniquement la sienne
+# Scores de propension : table absente tant que ml/purchase_propensity.py n'a pas été lancé
+propensity_available = DATA_AVAILABLE and has_table("ANALYTICS.customer_propensity_scores")
+
+if DATA_AVAILABLE:
+    results = submit_named_queries(
+        ["marketing_kpis", "marketing_campaign_types", "marketing_top_campaigns", "marketing_audiences"]
+        + (["sales_transactions", "campaign_intervals"] if local_overlap else ["marketing_sales_impact"])
+        + ["marketing_allocation"]
+        + (["propensity_distribution"] if propensity_available else []),
+        filters=filters
+    )
+
 # ========================================
 # KPIS GLOBAUX
 # ========================================
 
 st.header("Vue d'ensemble du marketing")
 
-if SNOWFLAKE_AVAILABLE:
-    marketing_kpi_query = """
-    SELECT 
-        COUNT(*) AS total_campaigns,
-        SUM(budget) AS total_budget_spent,
-        SUM(reach) AS total_reach,
-        ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
-        ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
-        COUNT(DISTINCT campaign_type) AS campaign_types,
-        COUNT(DISTINCT product_category) AS categories_covered
-    FROM SILVER.marketing_campaigns_clean
-    """
-    marketing_kpis = run_query(marketing_kpi_query)
+if DATA_AVAILABLE:
+    marketing_kpis = results["marketing_kpis"].result()
 else:
     marketing_kpis = get_demo_data("marketing_kpis")
 
@@ -183,21 +212,8 @@ st.markdown("---")
 
 st.header("Performance par type de campagne")
 
-if SNOWFLAKE_AVAILABLE:
-    campaign_type_query = """
-    SELECT 
-        campaign_type,
-        COUNT(*) AS number_of_campaigns,
-        SUM(budget) AS total_budget,
-        SUM(reach) AS total_reach,
-        ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
-        ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
-        ROUND(SUM(reach * conversion_rate), 0) AS estimated_conversions
-    FROM SILVER.marketing_campaigns_clean
-    GROUP BY campaign_type
-    ORDER BY avg_conversion_rate_pct DESC
-    """
-    campaign_types = run_query(campaign_type_query)
+if DATA_AVAILABLE:
+    campaign_types = results["marketing_campaign_types"].result()
 else:
     campaign_types = get_demo_data("campaign_types")
 
@@ -264,20 +280,8 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("✅ Top 10 campagnes (Meilleur ROI)")
     
-    if SNOWFLAKE_AVAILABLE:
-        top_campaigns_query = """
-        SELECT 
-            campaign_id,
-            campaign_name,
-            campaign_type,
-            ROUND(conversion_rate * 100, 2) AS conversion_pct,
-            ROUND(cost_per_acquisition, 2) AS cpa
-        FROM SILVER.marketing_campaigns_clean
-        WHERE reach > 0 AND conversion_rate > 0
-        ORDER BY conversion_rate DESC, cost_per_acquisition ASC
-        LIMIT 10
-        """
-        top_campaigns = run_query(top_campaigns_query)
+    if DATA_AVAILABLE:
+        top_campaigns = results["marketing_top_campaigns"].result()
     else:
         top_campaigns = get_demo_data("top_campaigns")
     
@@ -313,20 +317,8 @@ st.markdown("---")
 
 st.header("Performance par Segment d'Audience")
 
-if SNOWFLAKE_AVAILABLE:
-    audience_query = """
-    SELECT 
-        target_audience,
-        COUNT(*) AS number_of_campaigns,
-        SUM(budget) AS total_budget,
-        ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
-        ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
-        ROUND(SUM(reach * conversion_rate), 0) AS total_conversions
-    FROM SILVER.marketing_campaigns_clean
-    GROUP BY target_audience
-    ORDER BY total_conversions DESC
-    """
-    audiences = run_query(audience_query)
+if DATA_AVAILABLE:
+    audiences = results["marketing_audiences"].result()
 else:
     audiences = get_demo_data("audiences")
 
@@ -390,27 +382,14 @@ st.markdown("---")
 
 st.header("Impact des campagnes sur les ventes")
 
-if SNOWFLAKE_AVAILABLE:
-    sales_impact_query = """
-    WITH ventes_avec_campagnes AS (
-        SELECT 
-            t.*,
-            CASE WHEN c.campaign_id IS NOT NULL THEN 'Pendant Campagne' ELSE 'Hors Campagne' END AS campaign_status
-        FROM SILVER.financial_transactions_clean t
-        LEFT JOIN SILVER.marketing_campaigns_clean c
-            ON t.region = c.region AND t.transaction_date BETWEEN c.start_date AND c.end_date
-        WHERE t.transaction_type = 'Sale'
+if DATA_AVAILABLE and local_overlap:
+    flagged_sales = flag_campaigns(
+        results["sales_transactions"].result(),
+        results["campaign_intervals"].result()
     )
-    SELECT 
-        campaign_status,
-        COUNT(*) AS number_of_sales,
-        SUM(amount) AS total_sales,
-        ROUND(AVG(amount), 2) AS avg_transaction_value
-    FROM ventes_avec_campagnes
-    GROUP BY campaign_status
-    ORDER BY total_sales DESC
-    """
-    sales_impact = run_query(sales_impact_query)
+    sales_impact = campaign_sales_impact(flagged_sales)
+elif DATA_AVAILABLE:
+    sales_impact = results["marketing_sales_impact"].result()
 else:
     sales_impact = get_demo_data("sales_impact")
 
@@ -441,12 +420,14 @@ with col2:
         height=200
     )
     
-    campaign_contribution = sales_impact[sales_impact['CAMPAIGN_STATUS'] == 'Pendant Campagne']['PCT_VENTES'].values[0]
-    st.metric(
-        "Contribution des Campagnes",
-        f"{campaign_contribution:.1f}%",
-        delta="du CA total"
-    )
+    # Aucune vente pendant une campagne possible selon les filtres (région, période)
+    if (sales_impact['CAMPAIGN_STATUS'] == 'Pendant Campagne').any():
+        campaign_contribution = sales_impact[sales_impact['CAMPAIGN_STATUS'] == 'Pendant Campagne']['PCT_VENTES'].values[0]
+        st.metric(
+            "Contribution des Campagnes",
+            f"{campaign_contribution:.1f}%",
+            delta="du CA total"
+        )
 
 st.info("💡 **Opportunité** : 38% du CA provient des campagnes, mais 62% se fait hors campagnes → Augmenter la fréquence des campagnes de 50% à 65%")
 
@@ -458,26 +439,8 @@ st.markdown("---")
 
 st.header("Allocation Budgétaire Optimale")
 
-if SNOWFLAKE_AVAILABLE:
-    allocation_query = """
-    SELECT 
-        campaign_type,
-        SUM(budget) AS current_budget,
-        ROUND(SUM(budget) * 100.0 / SUM(SUM(budget)) OVER(), 2) AS current_pct,
-        ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_pct,
-        ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
-        CASE 
-            WHEN AVG(conversion_rate) > (SELECT AVG(conversion_rate) * 1.2 FROM SILVER.marketing_campaigns_clean) 
-            THEN '⬆️ AUGMENTER (+30%)'
-            WHEN AVG(conversion_rate) < (SELECT AVG(conversion_rate) * 0.8 FROM SILVER.marketing_campaigns_clean)
-            THEN '⬇️ RÉDUIRE (-40%)'
-            ELSE '➡️ MAINTENIR'
-        END AS recommendation
-    FROM SILVER.marketing_campaigns_clean
-    GROUP BY campaign_type
-    ORDER BY avg_conversion_pct DESC
-    """
-    allocation = run_query(allocation_query)
+if DATA_AVAILABLE:
+    allocation = results["marketing_allocation"].result()
 else:
     allocation = get_demo_data("budget_allocation")
 
@@ -495,7 +458,7 @@ st.dataframe(
 st.subheader("Nouvelle Répartition Recommandée")
 
 recommended = allocation.copy()
-recommended['RECOMMENDED_PCT'] = recommended['CURRENT_PCT']
+recommended['RECOMMENDED_PCT'] = recommended['CURRENT_PCT'].astype(float)
 recommended.loc[recommended['RECOMMENDATION'].str.contains('AUGMENTER'), 'RECOMMENDED_PCT'] *= 1.3
 recommended.loc[recommended['RECOMMENDATION'].str.contains('RÉDUIRE'), 'RECOMMENDED_PCT'] *= 0.6
 # Normaliser à 100%
@@ -529,6 +492,70 @@ st.plotly_chart(fig_reallocation, use_container_width=True)
 
 st.markdown("---")
 
+# ========================================
+# CIBLAGE PAR PROPENSION D'ACHAT
+# ========================================
+
+st.header("🎯 Ciblage par Propension d'Achat")
+
+if propensity_available:
+    distribution = results["propensity_distribution"].result()
+elif DATA_AVAILABLE:
+    distribution = None
+    st.info("Scores indisponibles : lancer d'abord `python ml/purchase_propensity.py train` "
+            "puis `python ml/purchase_propensity.py score`.")
+else:
+    distribution = get_demo_data("propensity_distribution")
+
+if distribution is not None:
+    min_score, max_score = st.slider(
+        "Score de propension (probabilité d'achat sous 30 jours)",
+        min_value=0.0, max_value=1.0, value=(0.6, 1.0), step=0.05
+    )
+
+    # Le filtre par score est appliqué dans la requête : seuls les meilleurs clients remontent
+    if propensity_available:
+        customers = run_named_query("propensity_customers", filters=filters,
+                                    min_score=f"{min_score:.2f}", max_score=f"{max_score:.2f}", limit=500)
+    else:
+        customers = get_demo_data("propensity_customers")
+    matching = int(customers['MATCHING_CUSTOMERS'].iloc[0]) if len(customers) > 0 else 0
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("👥 Clients scorés", f"{distribution['CUSTOMERS'].sum():,.0f}")
+    with col2:
+        st.metric("🎯 Clients dans la fourchette", f"{matching:,.0f}")
+    with col3:
+        st.metric("🕒 Dernier scoring", f"{pd.Timestamp(distribution['SCORED_AT'].max()):%d/%m/%Y %H:%M}")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_propensity = px.bar(
+            distribution,
+            x='SCORE_BUCKET',
+            y='CUSTOMERS',
+            color='PROPENSITY_BAND',
+            title="Distribution des scores de propension",
+            labels={'SCORE_BUCKET': 'Score', 'CUSTOMERS': 'Clients', 'PROPENSITY_BAND': 'Propension'},
+            color_discrete_map={'Faible': '#d62728', 'Moyenne': '#ff7f0e', 'Forte': '#2ca02c'}
+        )
+        fig_propensity.add_vrect(x0=min_score - 0.025, x1=max_score - 0.025, fillcolor='green', opacity=0.1)
+        fig_propensity.update_layout(height=400)
+        st.plotly_chart(fig_propensity, use_container_width=True)
+
+    with col2:
+        st.subheader(f"📋 Clients à cibler ({len(customers):,} premiers)")
+        st.dataframe(
+            customers.drop(columns=['MATCHING_CUSTOMERS']).style.format({'PROPENSITY_SCORE': '{:.3f}'}),
+            use_container_width=True,
+            hide_index=True,
+            height=400
+        )
+
+st.markdown("---")
+
 # ========================================
 # RECOMMANDATIONS STRATÉGIQUES
 # ========================================
@@ -611,6 +638,12 @@ action_plan = pd.DataFrame({
 
 st.dataframe(action_plan, use_container_width=True)
 
+# ========================================
+# PROFILAGE DES REQUÊTES
+# ========================================
+
+render_profiler(mark=profiler_mark)
+
 # ========================================
 # FOOTER
 # ========================================
@@ -639,5 +672,5 @@ st.markdown(f"""
 *Dernière mise à jour : {datetime.now().strftime("%d/%m/%Y %H:%M")}*
 """)
 
-if not SNOWFLAKE_AVAILABLE:
+if not DATA_AVAILABLE:
     st.info("ℹ️ **Mode Démonstration** : Configurez Snowflake dans `.streamlit/secrets.toml` pour utiliser les vraies données.")
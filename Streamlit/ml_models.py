@@ -0,0 +1,56 @@
+"""
+AnyCompany Food & Beverage - Modèles ML servis aux dashboards
+Rend importables les modules de ml/ et garde en mémoire, une fois par processus,
+les modèles enregistrés dans le registre local (ml/model_registry.py)
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+ML_DIR = Path(__file__).resolve().parent.parent / 'ml'
+if str(ML_DIR) not in sys.path:
+    sys.path.append(str(ML_DIR))
+
+try:
+    import scenario_engine
+    from model_registry import registry
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+
+_lock = threading.Lock()
+_engines = {}  # clé de registre → ScenarioEngine
+
+
+def get_model(name, artifacts=None, key=None):
+    """Artefacts d'un modèle du registre ({nom: objet}), ou None s'il n'a pas été entraîné
+
+    Dernière version par défaut. Les fichiers sont lus en mmap une seule fois par processus :
+    les appels suivants ne coûtent qu'une recherche en mémoire.
+    """
+    if not ML_AVAILABLE:
+        return None
+    try:
+        return registry.load(name, key, artifacts=artifacts)
+    except KeyError:
+        return None
+
+
+def get_scenario_engine(key=None):
+    """Simulateur de remises (voir ml/scenario_engine.py), ou None s'il n'a pas été entraîné
+
+    Le moteur est recréé seulement quand une nouvelle version est enregistrée : les
+    prédictions déjà calculées restent en cache entre deux interactions et entre les sessions.
+    """
+    if not ML_AVAILABLE:
+        return None
+    key = key or registry.latest_key(scenario_engine.MODEL_NAME)
+    if key is None or not scenario_engine.has_engine(key):
+        return None
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = scenario_engine.load_engine(key)
+            _engines[key] = engine
+        return engine
@@ -0,0 +1,51 @@
+"""
+AnyCompany Food & Beverage - Panneau de profilage des requêtes
+Liste les requêtes nommées exécutées pendant l'affichage de la page (voir
+data_access.record_query) ; les mêmes mesures sont écrites dans QUERY_LOG_FILE
+"""
+
+import pandas as pd
+
+from data_access import PROFILE_BYTES_SCANNED, QUERY_LOG_FILE, get_query_log
+
+
+def render_profiler(mark=None):
+    """Afficher, dans un panneau repliable, les requêtes lancées par cette exécution de page
+
+    mark : valeur de data_access.query_log_mark() prise en haut de la page. Les requêtes
+    des autres onglets et sessions servis par le même processus n'y figurent pas.
+    """
+    import streamlit as st
+
+    log = get_query_log(mark=mark)
+    with st.expander(f"⏱️ Profilage des requêtes ({len(log)})", expanded=False):
+        if log.empty:
+            st.caption("Aucune requête exécutée sur cette page (données de démonstration).")
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Requêtes", len(log))
+        col2.metric("Plus lente", f"{log['WALL_TIME_MS'].max():,.0f} ms",
+                    delta=log.loc[log['WALL_TIME_MS'].idxmax(), 'QUERY_NAME'], delta_color="off")
+        col3.metric("Temps cumulé", f"{log['WALL_TIME_MS'].sum():,.0f} ms")
+        col4.metric("Servies par le cache", f"{log['CACHE_HIT'].mean() * 100:.0f}%")
+
+        table = log[['QUERY_NAME', 'WALL_TIME_MS', 'ROWS', 'BYTES_SCANNED', 'CACHE_HIT', 'QUERY_ID']].copy()
+        table['MB_SCANNED'] = pd.to_numeric(table.pop('BYTES_SCANNED'), errors='coerce') / (1024 * 1024)
+        st.dataframe(
+            table.sort_values('WALL_TIME_MS', ascending=False)[
+                ['QUERY_NAME', 'WALL_TIME_MS', 'ROWS', 'MB_SCANNED', 'CACHE_HIT', 'QUERY_ID']
+            ].style.format({
+                'WALL_TIME_MS': '{:,.1f}',
+                'ROWS': '{:,}',
+                'MB_SCANNED': '{:,.2f}'
+            }, na_rep='—'),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Journal complet : `{QUERY_LOG_FILE}`")
+        if not PROFILE_BYTES_SCANNED:
+            st.caption("Octets lus non mesurés (`ANYCOMPANY_PROFILE_BYTES=0`).")
+        elif table['MB_SCANNED'].isna().any():
+            st.caption("— : octets lus en cours de relecture dans l'historique des requêtes, "
+                       "ou non mesurés par le moteur local.")
@@ -20,30 +20,19 @@ st.set_page_config(
 # CONNEXION SNOWFLAKE
 # ========================================
 
-try:
-    import snowflake.connector
-    
-    @st.cache_resource
-    def get_snowflake_connection():
-        """Créer une connexion Snowflake"""
-        return snowflake.connector.connect(
-            user=st.secrets["snowflake"]["user"],
-            password=st.secrets["snowflake"]["password"],
-            account=st.secrets["snowflake"]["account"],
-            warehouse=st.secrets["snowflake"]["warehouse"],
-            database=st.secrets["snowflake"]["database"],
-            schema=st.secrets["snowflake"]["schema"]
-        )
+from data_access import BACKEND, DATA_AVAILABLE, query_log_mark, run_named_query, submit_named_queries
+from filters import render_filters
+from profiler import render_profiler
+from interval_index import flag_promotions, promotion_comparison, promotion_regional
+from ml_models import get_scenario_engine
 
-    @st.cache_data(ttl=600)
-    def run_query(query):
-        conn = get_snowflake_connection()
-        return pd.read_sql(query, conn)
-    
-    SNOWFLAKE_AVAILABLE = True
-except:
-    SNOWFLAKE_AVAILABLE = False
+# Repère du panneau de profilage : seules les requêtes lancées par cette page y figurent
+profiler_mark = query_log_mark()
+
+if not DATA_AVAILABLE:
     st.warning("⚠️ Snowflake non configuré. Utilisation de données de démonstration.")
+elif BACKEND == 'local':
+    st.info("🦆 Moteur local DuckDB : tables SILVER/ANALYTICS lues depuis les fichiers Parquet.")
 
 # ========================================
 # DONNÉES DEMO
@@ -123,23 +112,51 @@ st.markdown("""
 
 st.markdown("---")
 
+# ========================================
+# SIDEBAR - FILTRES
+# ========================================
+
+# Contexte partagé avec les autres pages, poussé dans chaque requête (voir filters.py)
+filters = render_filters(run_named_query("filter_options") if DATA_AVAILABLE else None)
+
+# ========================================
+# CALCUL LOCAL DES CHEVAUCHEMENTS
+# ========================================
+
+local_overlap = st.sidebar.checkbox(
+    "🧮 Calcul local des chevauchements",
+    value=False,
+    help="Charge ventes et promotions une fois (cache partagé) et attribue les promotions en pandas"
+)
+
+# ========================================
+# LANCEMENT DES REQUÊTES DE LA PAGE
+# ========================================
+
+# Toutes les requêtes partent en parallèle ; chaque section attend uniquement la sienne
+if DATA_AVAILABLE:
+    results = submit_named_queries(
+        ["promo_kpis"]
+        + (["sales_transactions", "promotion_intervals"] if local_overlap else ["promo_comparison"])
+        + ["promo_categories", "promo_discounts", "promo_top"]
+        + ([] if local_overlap else ["promo_regional"]),
+        filters=filters
+    )
+
+if DATA_AVAILABLE and local_overlap:
+    flagged_sales = flag_promotions(
+        results["sales_transactions"].result(),
+        results["promotion_intervals"].result()
+    )
+
 # ========================================
 # KPIS PROMOTIONS
 # ========================================
 
 st.header("📊 Vue d'Ensemble des Promotions")
 
-if SNOWFLAKE_AVAILABLE:
-    promo_kpi_query = """
-    SELECT 
-        COUNT(*) AS total_promotions,
-        COUNT(DISTINCT product_category) AS categories_promoted,
-        COUNT(DISTINCT region) AS regions_covered,
-        ROUND(AVG(discount_percentage * 100), 2) AS avg_discount_pct,
-        ROUND(AVG(promotion_duration_days), 0) AS avg_duration_days
-    FROM SILVER.promotions_clean
-    """
-    promo_kpis = run_query(promo_kpi_query)
+if DATA_AVAILABLE:
+    promo_kpis = results["promo_kpis"].result()
 else:
     promo_kpis = get_demo_data("promo_kpis")
 
@@ -168,33 +185,10 @@ st.markdown("---")
 
 st.header("💰 Impact sur les Ventes : Avec vs Sans Promotion")
 
-if SNOWFLAKE_AVAILABLE:
-    comparison_query = """
-    WITH ventes_avec_flag_promo AS (
-        SELECT 
-            t.*,
-            CASE 
-                WHEN p.promotion_id IS NOT NULL THEN 'Avec Promotion'
-                ELSE 'Sans Promotion'
-            END AS promotion_status
-        FROM SILVER.financial_transactions_clean t
-        LEFT JOIN SILVER.promotions_clean p
-            ON t.region = p.region
-            AND t.transaction_date BETWEEN p.start_date AND p.end_date
-        WHERE t.transaction_type = 'Sale'
-    )
-    SELECT 
-        promotion_status,
-        COUNT(*) AS number_of_sales,
-        SUM(amount) AS total_sales,
-        ROUND(AVG(amount), 2) AS avg_transaction_value,
-        ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER(), 2) AS pct_transactions,
-        ROUND(SUM(amount) * 100.0 / SUM(SUM(amount)) OVER(), 2) AS pct_revenue
-    FROM ventes_avec_flag_promo
-    GROUP BY promotion_status
-    ORDER BY total_sales DESC
-    """
-    comparison = run_query(comparison_query)
+if DATA_AVAILABLE and local_overlap:
+    comparison = promotion_comparison(flagged_sales)
+elif DATA_AVAILABLE:
+    comparison = results["promo_comparison"].result()
 else:
     comparison = get_demo_data("comparison")
 
@@ -264,18 +258,8 @@ st.markdown("---")
 
 st.header("📦 Performance par Catégorie de Produit")
 
-if SNOWFLAKE_AVAILABLE:
-    category_query = """
-    SELECT 
-        product_category,
-        COUNT(*) AS number_of_promotions,
-        ROUND(AVG(discount_percentage * 100), 2) AS avg_discount_pct,
-        ROUND(AVG(promotion_duration_days), 0) AS avg_duration_days
-    FROM SILVER.promotions_clean
-    GROUP BY product_category
-    ORDER BY number_of_promotions DESC
-    """
-    categories = run_query(category_query)
+if DATA_AVAILABLE:
+    categories = results["promo_categories"].result()
 else:
     categories = get_demo_data("categories")
 
@@ -311,35 +295,8 @@ st.markdown("---")
 
 st.header("💸 Efficacité par Niveau de Remise")
 
-if SNOWFLAKE_AVAILABLE:
-   discount_query = """
-   WITH ventes_avec_flag_promo AS (
-    SELECT 
-        t.*,
-        p.discount_percentage,
-        p.promotion_id           
-    FROM SILVER.financial_transactions_clean t
-    INNER JOIN SILVER.promotions_clean p
-        ON t.region = p.region
-        AND t.transaction_date BETWEEN p.start_date AND p.end_date
-    WHERE t.transaction_type = 'Sale'
-    )
-    SELECT 
-    CASE 
-        WHEN discount_percentage < 0.10 THEN '0-10%'
-        WHEN discount_percentage < 0.15 THEN '10-15%'
-        WHEN discount_percentage < 0.20 THEN '15-20%'
-        ELSE '20%+'
-    END AS discount_range,
-    COUNT(DISTINCT promotion_id) AS number_of_promotions,
-    COUNT(*) AS total_transactions,
-    SUM(amount) AS total_sales,
-    ROUND(AVG(amount), 2) AS avg_transaction_value
-    FROM ventes_avec_flag_promo
-    GROUP BY discount_range
-    ORDER BY discount_range
-     """
-   discounts = run_query(discount_query)
+if DATA_AVAILABLE:
+    discounts = results["promo_discounts"].result()
 else:
     discounts = get_demo_data("discount_ranges")
 
@@ -392,37 +349,87 @@ st.info("💡 **Recommandation** : Concentrer les promotions sur la tranche **10
 
 st.markdown("---")
 
+# ========================================
+# SIMULATEUR DE REMISES (MODÈLE ML)
+# ========================================
+
+st.header("🎛️ Simulateur de Remises")
+
+scenario_engine = get_scenario_engine()
+if scenario_engine is None:
+    st.info("Simulateur indisponible : entraîner d'abord le modèle de réponse aux promotions "
+            "(`python ml/promotion_response.py`).")
+else:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        max_discount = st.slider("Remise maximale simulée", min_value=5, max_value=30, value=25, step=1,
+                                 format="%d%%")
+    with col2:
+        sim_segments = st.multiselect("Segments clients", ['Nouveau', 'Occasionnel', 'Régulier', 'VIP'],
+                                      default=['Nouveau', 'Occasionnel', 'Régulier', 'VIP'])
+    with col3:
+        sim_group = st.radio("Comparer par", ['Segment', 'Région'], horizontal=True)
+
+    group_col = 'SEGMENT' if sim_group == 'Segment' else 'REGION'
+    sim_regions = filters['regions'] or None  # Régions de la sidebar
+    sim_start = datetime.now()
+    sweep = scenario_engine.sweep(
+        [d / 100 for d in range(0, max_discount + 1)],
+        by=(group_col,),
+        segments=sim_segments or None,
+        regions=sim_regions
+    )
+    sim_ms = (datetime.now() - sim_start).total_seconds() * 1000
+    sweep['DISCOUNT_PCT'] = sweep['DISCOUNT'] * 100
+
+    if sweep.empty:
+        st.warning("Aucune transaction de référence pour ces segments et régions.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            fig_lift = px.line(
+                sweep,
+                x='DISCOUNT_PCT',
+                y='LIFT_PCT',
+                color=group_col,
+                title="Lift Prédit vs Sans Promotion",
+                labels={'DISCOUNT_PCT': 'Remise (%)', 'LIFT_PCT': 'Lift (%)', group_col: sim_group}
+            )
+            fig_lift.add_hline(y=0, line_dash="dash", line_color="gray")
+            st.plotly_chart(fig_lift, use_container_width=True)
+        with col2:
+            fig_basket = px.line(
+                sweep,
+                x='DISCOUNT_PCT',
+                y='AVG_TRANSACTION',
+                color=group_col,
+                title="Panier Moyen Prédit",
+                labels={'DISCOUNT_PCT': 'Remise (%)', 'AVG_TRANSACTION': 'Panier Moyen ($)', group_col: sim_group}
+            )
+            st.plotly_chart(fig_basket, use_container_width=True)
+
+        best = sweep.loc[sweep.groupby(group_col)['LIFT_PCT'].idxmax(), [group_col, 'DISCOUNT_PCT', 'LIFT_PCT']]
+        st.dataframe(
+            best.rename(columns={'DISCOUNT_PCT': 'REMISE_OPTIMALE', 'LIFT_PCT': 'LIFT_MAX'}).style.format({
+                'REMISE_OPTIMALE': '{:.0f}%',
+                'LIFT_MAX': '{:+.1f}%'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Modèle : {scenario_engine.model_name} · {scenario_engine.rows:,} transactions de référence · "
+                   f"{len(sweep):,} scénarios calculés en {sim_ms:,.0f} ms")
+
+st.markdown("---")
+
 # ========================================
 # TOP PROMOTIONS
 # ========================================
 
 st.header("🏆 Top 10 Promotions les Plus Performantes")
 
-if SNOWFLAKE_AVAILABLE:
-    top_promos_query = """
-    WITH ventes_par_promo AS (
-        SELECT 
-            p.promotion_id,
-            p.product_category,
-            p.promotion_type,
-            p.region,
-            ROUND(p.discount_percentage * 100, 2) AS discount_pct,
-            COUNT(t.transaction_id) AS transactions,
-            SUM(t.amount) AS ca_genere,
-            ROUND(AVG(t.amount), 2) AS panier_moyen
-        FROM SILVER.promotions_clean p
-        LEFT JOIN SILVER.financial_transactions_clean t 
-            ON t.region = p.region
-            AND t.transaction_date BETWEEN p.start_date AND p.end_date
-            AND t.transaction_type = 'Sale'
-        GROUP BY p.promotion_id, p.product_category, p.promotion_type, p.region, p.discount_percentage
-        HAVING COUNT(t.transaction_id) > 0
-    )
-    SELECT * FROM ventes_par_promo
-    ORDER BY ca_genere DESC
-    LIMIT 10
-    """
-    top_promos = run_query(top_promos_query)
+if DATA_AVAILABLE:
+    top_promos = results["promo_top"].result()
 else:
     top_promos = get_demo_data("top_promos")
 
@@ -444,26 +451,10 @@ st.markdown("---")
 
 st.header("🌍 Sensibilité aux Promotions par Région")
 
-if SNOWFLAKE_AVAILABLE:
-    regional_query = """
-    WITH ventes_avec_flag_promo AS (
-        SELECT 
-            t.*,
-            CASE WHEN p.promotion_id IS NOT NULL THEN 'Avec Promotion' ELSE 'Sans Promotion' END AS promotion_status
-        FROM SILVER.financial_transactions_clean t
-        LEFT JOIN SILVER.promotions_clean p
-            ON t.region = p.region AND t.transaction_date BETWEEN p.start_date AND p.end_date
-        WHERE t.transaction_type = 'Sale'
-    )
-    SELECT 
-        region,
-        SUM(CASE WHEN promotion_status = 'Avec Promotion' THEN amount ELSE 0 END) AS sales_with_promo,
-        SUM(CASE WHEN promotion_status = 'Sans Promotion' THEN amount ELSE 0 END) AS sales_without_promo
-    FROM ventes_avec_flag_promo
-    GROUP BY region
-    ORDER BY sales_with_promo DESC
-    """
-    regional = run_query(regional_query)
+if DATA_AVAILABLE and local_overlap:
+    regional = promotion_regional(flagged_sales)
+elif DATA_AVAILABLE:
+    regional = results["promo_regional"].result()
 else:
     regional = get_demo_data("regional")
 
@@ -597,6 +588,12 @@ action_plan = pd.DataFrame({
 
 st.dataframe(action_plan, use_container_width=True)
 
+# ========================================
+# PROFILAGE DES REQUÊTES
+# ========================================
+
+render_profiler(mark=profiler_mark)
+
 # ========================================
 # FOOTER
 # ========================================
@@ -607,5 +604,5 @@ st.markdown(f"""
 *Dernière mise à jour : {datetime.now().strftime("%d/%m/%Y %H:%M")}*
 """)
 
-if not SNOWFLAKE_AVAILABLE:
+if not DATA_AVAILABLE:
     st.info("ℹ️ **Mode Démonstration** : Configurez Snowflake dans `.streamlit/secrets.toml` pour utiliser les vraies données.")
\ No newline at end of file
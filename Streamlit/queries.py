@@ -0,0 +1,457 @@
+"""
+AnyCompany Food & Beverage - Catalogue des requêtes nommées
+Requêtes SQL utilisées par les dashboards Streamlit (voir data_access.run_named_query)
+
+Les requêtes de ventes lisent les agrégats journaliers d'ANALYTICS (Sql/analytics_rollups.sql)
+et non la table de faits : les moyennes y sont recalculées en SUM(total_sales) / SUM(number_of_sales)
+"""
+
+QUERIES = {}
+
+# Colonnes sur lesquelles le contexte de filtres (filters.py) est poussé : chaque
+# requête listée ici reçoit le paramètre {filters} rendu par data_access.render_query
+QUERY_FILTERS = {}
+
+SALES_FILTERS = {'date_col': 'transaction_date', 'region_col': 'region', 'payment_col': 'payment_method'}
+PROMOTION_FILTERS = {'date_col': 'start_date', 'region_col': 'region'}
+CAMPAIGN_FILTERS = {'date_col': 'start_date', 'region_col': 'region'}
+
+# ========================================
+# SALES DASHBOARD
+# ========================================
+
+QUERIES["sales_kpis"] = """
+SELECT 
+    SUM(total_sales) AS total_revenue,
+    COALESCE(SUM(number_of_sales), 0) AS total_transactions,
+    ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS avg_transaction_value,
+    COUNT(DISTINCT region) AS markets_served
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+"""
+
+QUERIES["sales_monthly"] = """
+SELECT 
+    DATE_TRUNC('month', transaction_date) AS month,
+    SUM(total_sales) AS total_sales,
+    SUM(number_of_sales) AS number_of_sales,
+    ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS avg_transaction_value
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY DATE_TRUNC('month', transaction_date)
+ORDER BY month
+"""
+
+QUERIES["sales_regional"] = """
+SELECT 
+    region,
+    SUM(total_sales) AS total_sales,
+    SUM(number_of_sales) AS number_of_sales
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY region
+ORDER BY total_sales DESC
+"""
+
+QUERIES["sales_yoy"] = """
+SELECT 
+    transaction_year,
+    SUM(total_sales) AS total_sales,
+    LAG(SUM(total_sales)) OVER (ORDER BY transaction_year) AS previous_year_sales,
+    ROUND(
+        (SUM(total_sales) - LAG(SUM(total_sales)) OVER (ORDER BY transaction_year)) * 100.0 / 
+        NULLIF(LAG(SUM(total_sales)) OVER (ORDER BY transaction_year), 0), 
+    2) AS yoy_growth_pct
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY transaction_year
+ORDER BY transaction_year DESC
+LIMIT 5
+"""
+
+QUERIES["sales_seasonality"] = """
+SELECT 
+    MONTH(transaction_date) AS month_number,
+    TO_CHAR(transaction_date, 'Month') AS month_name,
+    SUM(total_sales) AS total_sales
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY MONTH(transaction_date), TO_CHAR(transaction_date, 'Month')
+ORDER BY month_number
+"""
+
+QUERIES["sales_payment"] = """
+SELECT 
+    payment_method,
+    SUM(number_of_sales) AS number_of_transactions,
+    SUM(total_sales) AS total_amount
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY payment_method
+ORDER BY total_amount DESC
+"""
+
+# Agrégat unique mois × région × méthode de paiement : une seule lecture des ventes
+# journalières, tous les widgets du Sales Dashboard sont ensuite calculés par sales_bundle.py
+QUERIES["sales_bundle"] = """
+SELECT 
+    DATE_TRUNC('month', transaction_date) AS month,
+    region,
+    payment_method,
+    SUM(total_sales) AS total_sales,
+    SUM(number_of_sales) AS number_of_sales
+FROM ANALYTICS.daily_sales
+WHERE 1 = 1
+{filters}
+GROUP BY DATE_TRUNC('month', transaction_date), region, payment_method
+"""
+
+# Valeurs proposées par les filtres de la sidebar
+QUERIES["filter_options"] = """
+SELECT DISTINCT
+    region,
+    payment_method
+FROM ANALYTICS.daily_sales
+"""
+
+for _name in ("sales_kpis", "sales_monthly", "sales_regional", "sales_yoy",
+              "sales_seasonality", "sales_payment", "sales_bundle"):
+    QUERY_FILTERS[_name] = SALES_FILTERS
+
+# Alertes tenues à jour par Sql/anomaly_detection.sql à chaque nouveau lot de ventes :
+# la page lit les alertes déjà calculées, sans rebalayer l'historique des transactions
+QUERIES["sales_anomaly_alerts"] = """
+SELECT 
+    alert_type,
+    dimension,
+    dimension_value,
+    transaction_id,
+    alert_date,
+    amount,
+    reference_value,
+    score
+FROM ANALYTICS.sales_anomaly_alerts
+WHERE 1 = 1
+{filters}
+ORDER BY alert_date DESC
+"""
+
+QUERY_FILTERS["sales_anomaly_alerts"] = {'date_col': 'alert_date'}
+
+# ========================================
+# PROMOTION ANALYSIS
+# ========================================
+
+# Les requêtes avec/sans promotion lisent les agrégats construits à partir de
+# ANALYTICS.transaction_promotion_flags (Sql/promotion_flags.sql) : daily_sales porte
+# promotion_status, promotion_performance les ventes attribuées à chaque promotion_id
+
+QUERIES["promo_kpis"] = """
+SELECT 
+    COUNT(*) AS total_promotions,
+    COUNT(DISTINCT product_category) AS categories_promoted,
+    COUNT(DISTINCT region) AS regions_covered,
+    ROUND(AVG(discount_percentage * 100), 2) AS avg_discount_pct,
+    ROUND(AVG(promotion_duration_days), 0) AS avg_duration_days
+FROM SILVER.promotions_clean
+WHERE 1 = 1
+{filters}
+"""
+
+QUERIES["promo_comparison"] = """
+SELECT 
+    promotion_status,
+    SUM(number_of_sales) AS number_of_sales,
+    SUM(total_sales) AS total_sales,
+    ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS avg_transaction_value,
+    ROUND(SUM(number_of_sales) * 100.0 / SUM(SUM(number_of_sales)) OVER(), 2) AS pct_transactions,
+    ROUND(SUM(total_sales) * 100.0 / SUM(SUM(total_sales)) OVER(), 2) AS pct_revenue
+FROM ANALYTICS.daily_sales
+WHERE promotion_status IS NOT NULL
+{filters}
+GROUP BY promotion_status
+ORDER BY total_sales DESC
+"""
+
+QUERIES["promo_categories"] = """
+SELECT 
+    product_category,
+    COUNT(*) AS number_of_promotions,
+    ROUND(AVG(discount_percentage * 100), 2) AS avg_discount_pct,
+    ROUND(AVG(promotion_duration_days), 0) AS avg_duration_days
+FROM SILVER.promotions_clean
+WHERE 1 = 1
+{filters}
+GROUP BY product_category
+ORDER BY number_of_promotions DESC
+"""
+
+QUERIES["promo_discounts"] = """
+SELECT 
+    CASE 
+        WHEN discount_percentage < 0.10 THEN '0-10%'
+        WHEN discount_percentage < 0.15 THEN '10-15%'
+        WHEN discount_percentage < 0.20 THEN '15-20%'
+        ELSE '20%+'
+    END AS discount_range,
+    COUNT(DISTINCT promotion_id) AS number_of_promotions,
+    SUM(number_of_sales) AS total_transactions,
+    SUM(total_sales) AS total_sales,
+    ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS avg_transaction_value
+FROM ANALYTICS.promotion_performance
+WHERE 1 = 1
+{filters}
+GROUP BY discount_range
+ORDER BY discount_range
+"""
+
+QUERIES["promo_top"] = """
+WITH ventes_par_promo AS (
+    SELECT 
+        promotion_id,
+        product_category,
+        promotion_type,
+        region,
+        ROUND(discount_percentage * 100, 2) AS discount_pct,
+        SUM(number_of_sales) AS transactions,
+        SUM(total_sales) AS ca_genere,
+        ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS panier_moyen
+    FROM ANALYTICS.promotion_performance
+    WHERE 1 = 1
+    {filters}
+    GROUP BY promotion_id, product_category, promotion_type, region, discount_percentage
+)
+SELECT * FROM ventes_par_promo
+ORDER BY ca_genere DESC
+LIMIT 10
+"""
+
+QUERIES["promo_regional"] = """
+SELECT 
+    region,
+    SUM(CASE WHEN promotion_status = 'Avec Promotion' THEN total_sales ELSE 0 END) AS sales_with_promo,
+    SUM(CASE WHEN promotion_status = 'Sans Promotion' THEN total_sales ELSE 0 END) AS sales_without_promo
+FROM ANALYTICS.daily_sales
+WHERE promotion_status IS NOT NULL
+{filters}
+GROUP BY region
+ORDER BY sales_with_promo DESC
+"""
+
+# Les promotions sont filtrées sur leur date de début et leur région ; les agrégats
+# de ventes portent les trois filtres
+QUERY_FILTERS["promo_kpis"] = PROMOTION_FILTERS
+QUERY_FILTERS["promo_categories"] = PROMOTION_FILTERS
+for _name in ("promo_comparison", "promo_discounts", "promo_top", "promo_regional"):
+    QUERY_FILTERS[_name] = SALES_FILTERS
+
+# ========================================
+# MARKETING ROI
+# ========================================
+
+QUERIES["marketing_kpis"] = """
+SELECT 
+    COUNT(*) AS total_campaigns,
+    SUM(budget) AS total_budget_spent,
+    SUM(reach) AS total_reach,
+    ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
+    ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
+    COUNT(DISTINCT campaign_type) AS campaign_types,
+    COUNT(DISTINCT product_category) AS categories_covered
+FROM SILVER.marketing_campaigns_clean
+WHERE 1 = 1
+{filters}
+"""
+
+QUERIES["marketing_campaign_types"] = """
+SELECT 
+    campaign_type,
+    COUNT(*) AS number_of_campaigns,
+    SUM(budget) AS total_budget,
+    SUM(reach) AS total_reach,
+    ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
+    ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
+    ROUND(SUM(reach * conversion_rate), 0) AS estimated_conversions
+FROM SILVER.marketing_campaigns_clean
+WHERE 1 = 1
+{filters}
+GROUP BY campaign_type
+ORDER BY avg_conversion_rate_pct DESC
+"""
+
+QUERIES["marketing_top_campaigns"] = """
+SELECT 
+    campaign_id,
+    campaign_name,
+    campaign_type,
+    ROUND(conversion_rate * 100, 2) AS conversion_pct,
+    ROUND(cost_per_acquisition, 2) AS cpa
+FROM SILVER.marketing_campaigns_clean
+WHERE reach > 0 AND conversion_rate > 0
+{filters}
+ORDER BY conversion_rate DESC, cost_per_acquisition ASC
+LIMIT 10
+"""
+
+QUERIES["marketing_audiences"] = """
+SELECT 
+    target_audience,
+    COUNT(*) AS number_of_campaigns,
+    SUM(budget) AS total_budget,
+    ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_rate_pct,
+    ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
+    ROUND(SUM(reach * conversion_rate), 0) AS total_conversions
+FROM SILVER.marketing_campaigns_clean
+WHERE 1 = 1
+{filters}
+GROUP BY target_audience
+ORDER BY total_conversions DESC
+"""
+
+# Jointure ventes × campagnes précalculée par type de campagne (ANALYTICS.campaign_type_performance)
+QUERIES["marketing_sales_impact"] = """
+SELECT 
+    campaign_status,
+    SUM(number_of_sales) AS number_of_sales,
+    SUM(total_sales) AS total_sales,
+    ROUND(SUM(total_sales) / NULLIF(SUM(number_of_sales), 0), 2) AS avg_transaction_value
+FROM ANALYTICS.campaign_type_performance
+WHERE 1 = 1
+{filters}
+GROUP BY campaign_status
+ORDER BY total_sales DESC
+"""
+
+QUERIES["marketing_allocation"] = """
+SELECT 
+    campaign_type,
+    SUM(budget) AS current_budget,
+    ROUND(SUM(budget) * 100.0 / SUM(SUM(budget)) OVER(), 2) AS current_pct,
+    ROUND(AVG(conversion_rate * 100), 2) AS avg_conversion_pct,
+    ROUND(AVG(cost_per_acquisition), 2) AS avg_cpa,
+    CASE 
+        WHEN AVG(conversion_rate) > (SELECT AVG(conversion_rate) * 1.2 FROM SILVER.marketing_campaigns_clean WHERE 1 = 1 {filters}) 
+        THEN '⬆️ AUGMENTER (+30%)'
+        WHEN AVG(conversion_rate) < (SELECT AVG(conversion_rate) * 0.8 FROM SILVER.marketing_campaigns_clean WHERE 1 = 1 {filters})
+        THEN '⬇️ RÉDUIRE (-40%)'
+        ELSE '➡️ MAINTENIR'
+    END AS recommendation
+FROM SILVER.marketing_campaigns_clean
+WHERE 1 = 1
+{filters}
+GROUP BY campaign_type
+ORDER BY avg_conversion_pct DESC
+"""
+
+for _name in ("marketing_kpis", "marketing_campaign_types", "marketing_top_campaigns",
+              "marketing_audiences", "marketing_allocation"):
+    QUERY_FILTERS[_name] = CAMPAIGN_FILTERS
+QUERY_FILTERS["marketing_sales_impact"] = SALES_FILTERS
+
+# Scores de propension à l'achat publiés par ml/purchase_propensity.py (un par client)
+PROPENSITY_FILTERS = {'region_col': 'region'}
+
+QUERIES["propensity_distribution"] = """
+SELECT 
+    LEAST(FLOOR(propensity_score * 20), 19) / 20 AS score_bucket,
+    propensity_band,
+    COUNT(*) AS customers,
+    MAX(scored_at) AS scored_at
+FROM ANALYTICS.customer_propensity_scores
+WHERE 1 = 1
+{filters}
+GROUP BY LEAST(FLOOR(propensity_score * 20), 19) / 20, propensity_band
+ORDER BY score_bucket
+"""
+
+# Filtre par score poussé dans le WHERE : seuls les {limit} meilleurs clients remontent,
+# matching_customers donne le nombre total de clients dans la fourchette
+QUERIES["propensity_customers"] = """
+SELECT 
+    customer_name,
+    region,
+    propensity_score,
+    propensity_band,
+    COUNT(*) OVER () AS matching_customers
+FROM ANALYTICS.customer_propensity_scores
+WHERE propensity_score >= {min_score}
+  AND propensity_score <= {max_score}
+{filters}
+ORDER BY propensity_score DESC, customer_name
+LIMIT {limit}
+"""
+
+QUERY_FILTERS["propensity_distribution"] = PROPENSITY_FILTERS
+QUERY_FILTERS["propensity_customers"] = PROPENSITY_FILTERS
+
+
+# ========================================
+# DONNÉES DÉTAILLÉES (calcul local)
+# ========================================
+
+# Chargées une fois dans le cache partagé, puis croisées en pandas par interval_index.py
+# (seule requête des dashboards qui lit encore la table de faits)
+QUERIES["sales_transactions"] = """
+SELECT 
+    transaction_id,
+    transaction_date,
+    region,
+    amount
+FROM SILVER.financial_transactions_clean
+WHERE transaction_type = 'Sale'
+{filters}
+"""
+
+QUERIES["promotion_intervals"] = """
+SELECT 
+    promotion_id,
+    promotion_type,
+    region,
+    start_date,
+    end_date,
+    discount_percentage
+FROM SILVER.promotions_clean
+"""
+
+QUERIES["campaign_intervals"] = """
+SELECT 
+    campaign_id,
+    campaign_type,
+    region,
+    start_date,
+    end_date
+FROM SILVER.marketing_campaigns_clean
+"""
+
+QUERY_FILTERS["sales_transactions"] = SALES_FILTERS
+
+
+# ========================================
+# MÉTADONNÉES
+# ========================================
+
+# Date de dernière modification des tables : sert de version aux entrées du cache
+QUERIES["table_versions"] = """
+SELECT 
+    table_schema,
+    table_name,
+    last_altered
+FROM information_schema.tables
+WHERE table_schema IN ('SILVER', 'ANALYTICS')
+"""
+
+# Octets lus par une requête déjà exécutée (panneau de profilage des dashboards)
+QUERIES["query_stats"] = """
+SELECT 
+    query_id,
+    bytes_scanned,
+    total_elapsed_time
+FROM TABLE(information_schema.query_history(RESULT_LIMIT => 1000))
+WHERE query_id = '{query_id}'
+"""
@@ -0,0 +1,71 @@
+"""
+AnyCompany Food & Beverage - Agrégat unique du Sales Dashboard
+Tous les widgets du dashboard ventes calculés en pandas à partir d'un seul
+agrégat mois × région × méthode de paiement (requête nommée "sales_bundle")
+"""
+
+import pandas as pd
+
+
+def prepare_bundle(bundle):
+    """Typer l'agrégat retourné par Snowflake (NUMBER → float, mois → datetime)"""
+    bundle = bundle.copy()
+    bundle['MONTH'] = pd.to_datetime(bundle['MONTH'])
+    bundle['TOTAL_SALES'] = bundle['TOTAL_SALES'].astype(float)
+    bundle['NUMBER_OF_SALES'] = bundle['NUMBER_OF_SALES'].astype('int64')
+    return bundle
+
+
+def kpis_from_bundle(bundle):
+    total_revenue = bundle['TOTAL_SALES'].sum()
+    total_transactions = bundle['NUMBER_OF_SALES'].sum()
+    return pd.DataFrame({
+        'TOTAL_REVENUE': [total_revenue],
+        'TOTAL_TRANSACTIONS': [total_transactions],
+        'AVG_TRANSACTION_VALUE': [round(total_revenue / total_transactions, 2) if total_transactions else float('nan')],
+        'MARKETS_SERVED': [bundle['REGION'].nunique()]
+    })
+
+
+def monthly_from_bundle(bundle):
+    monthly = bundle.groupby('MONTH', as_index=False)[['TOTAL_SALES', 'NUMBER_OF_SALES']].sum()
+    monthly['AVG_TRANSACTION_VALUE'] = (monthly['TOTAL_SALES'] / monthly['NUMBER_OF_SALES']).round(2)
+    return monthly.sort_values('MONTH').reset_index(drop=True)
+
+
+def regional_from_bundle(bundle):
+    regional = bundle.groupby('REGION', as_index=False, dropna=False)[['TOTAL_SALES', 'NUMBER_OF_SALES']].sum()
+    return regional.sort_values('TOTAL_SALES', ascending=False).reset_index(drop=True)
+
+
+def yoy_from_bundle(bundle, years=5):
+    yearly = (
+        bundle.assign(TRANSACTION_YEAR=bundle['MONTH'].dt.year)
+        .groupby('TRANSACTION_YEAR', as_index=False)['TOTAL_SALES'].sum()
+        .sort_values('TRANSACTION_YEAR')
+    )
+    yearly['PREVIOUS_YEAR_SALES'] = yearly['TOTAL_SALES'].shift(1)
+    previous = yearly['PREVIOUS_YEAR_SALES'].replace(0, float('nan'))
+    yearly['YOY_GROWTH_PCT'] = ((yearly['TOTAL_SALES'] - previous) * 100.0 / previous).round(2)
+    return yearly.sort_values('TRANSACTION_YEAR', ascending=False).head(years).reset_index(drop=True)
+
+
+def seasonality_from_bundle(bundle):
+    seasonality = (
+        bundle.assign(MONTH_NUMBER=bundle['MONTH'].dt.month)
+        .groupby('MONTH_NUMBER', as_index=False)['TOTAL_SALES'].sum()
+        .sort_values('MONTH_NUMBER')
+        .reset_index(drop=True)
+    )
+    month_names = pd.to_datetime(seasonality['MONTH_NUMBER'].astype(str), format='%m').dt.month_name()
+    seasonality.insert(1, 'MONTH_NAME', month_names)
+    return seasonality
+
+
+def payment_from_bundle(bundle):
+    payment = bundle.groupby('PAYMENT_METHOD', as_index=False, dropna=False)[['NUMBER_OF_SALES', 'TOTAL_SALES']].sum()
+    payment = payment.rename(columns={
+        'NUMBER_OF_SALES': 'NUMBER_OF_TRANSACTIONS',
+        'TOTAL_SALES': 'TOTAL_AMOUNT'
+    })
+    return payment.sort_values('TOTAL_AMOUNT', ascending=False).reset_index(drop=True)
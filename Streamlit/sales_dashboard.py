@@ -29,31 +29,23 @@ st.set_page_config(
 # database = "ANYCOMPANY_LAB"
 # schema = "SILVER"
 
-try:
-    import snowflake.connector
-    
-    @st.cache_resource
-    def get_snowflake_connection():
-        """Créer une connexion Snowflake"""
-        return snowflake.connector.connect(
-            user=st.secrets["snowflake"]["user"],
-            password=st.secrets["snowflake"]["password"],
-            account=st.secrets["snowflake"]["account"],
-            warehouse=st.secrets["snowflake"]["warehouse"],
-            database=st.secrets["snowflake"]["database"],
-            schema=st.secrets["snowflake"]["schema"]
-        )
+from data_access import (
+    BACKEND, DATA_AVAILABLE, has_table, query_log_mark, run_named_query, submit_named_queries
+)
+from filters import NO_DATA_MESSAGE, render_filters
+from profiler import render_profiler
+from sales_bundle import (
+    prepare_bundle, kpis_from_bundle, monthly_from_bundle,
+    regional_from_bundle, yoy_from_bundle, seasonality_from_bundle, payment_from_bundle
+)
 
-    @st.cache_data(ttl=600)
-    def run_query(query):
-        """Exécuter une requête et retourner un DataFrame"""
-        conn = get_snowflake_connection()
-        return pd.read_sql(query, conn)
-    
-    SNOWFLAKE_AVAILABLE = True
-except:
-    SNOWFLAKE_AVAILABLE = False
+# Repère du panneau de profilage : seules les requêtes lancées par cette page y figurent
+profiler_mark = query_log_mark()
+
+if not DATA_AVAILABLE:
     st.warning("⚠️ Snowflake non configuré. Utilisation de données de démonstration.")
+elif BACKEND == 'local':
+    st.info("🦆 Moteur local DuckDB : tables SILVER/ANALYTICS lues depuis les fichiers Parquet.")
 
 # ========================================
 # FONCTION POUR DONNÉES DEMO
@@ -108,6 +100,18 @@ def get_demo_data(query_type):
             'TOTAL_AMOUNT': [42500000, 25500000, 12750000, 4250000],
             'NUMBER_OF_TRANSACTIONS': [62500, 37500, 18750, 6250]
         })
+    elif query_type == "alerts":
+        return pd.DataFrame({
+            'ALERT_TYPE': ['BAISSE MENSUELLE', 'BAISSE MENSUELLE', 'BAISSE MENSUELLE',
+                           'TRANSACTION EXCEPTIONNELLE', 'TRANSACTION EXCEPTIONNELLE'],
+            'DIMENSION': ['GLOBAL', 'REGION', 'PAYMENT_METHOD', 'GLOBAL', 'REGION'],
+            'DIMENSION_VALUE': ['Toutes', 'Europe', 'Cash', 'Toutes', 'Asie'],
+            'TRANSACTION_ID': [None, None, None, 'TXN-104582', 'TXN-098311'],
+            'ALERT_DATE': pd.to_datetime(['2024-06-01', '2024-05-01', '2024-04-01', '2024-11-18', '2024-10-02']),
+            'AMOUNT': [6000000, 2100000, 310000, 4850, 4420],
+            'REFERENCE_VALUE': [6800000, 2450000, 360000, 680, 672],
+            'SCORE': [-11.76, -14.29, -13.89, 5.12, 4.61]
+        })
 
 # ========================================
 # TITRE ET CONTEXTE
@@ -130,22 +134,31 @@ st.markdown("---")
 # SIDEBAR - FILTRES
 # ========================================
 
-st.sidebar.header("🔍 Filtres")
-st.sidebar.info("Utilisez les filtres ci-dessous pour personnaliser l'analyse")
+# Période, régions et méthodes de paiement : contexte partagé avec les autres pages,
+# poussé dans chaque requête (voir filters.py et QUERY_FILTERS dans queries.py)
+filters = render_filters(run_named_query("filter_options") if DATA_AVAILABLE else None)
 
-date_range = st.sidebar.selectbox(
-    "Période d'analyse",
-    ["Derniers 12 mois", "Derniers 24 mois", "Année en cours", "Tout l'historique"]
+# Mode agrégé : une seule requête (mois × région × paiement), widgets calculés en pandas
+bundled_mode = st.sidebar.checkbox(
+    "⚡ Mode agrégé (1 seule requête)",
+    value=True,
+    help="Charge un agrégat mensuel unique au lieu de six requêtes sur la table de faits"
 )
-# Calculer le filtre SQL selon la sélection
-if date_range == "Derniers 12 mois":
-    date_filter = "AND transaction_date >= DATEADD(month, -12, CURRENT_DATE())"
-elif date_range == "Derniers 24 mois":
-    date_filter = "AND transaction_date >= DATEADD(month, -24, CURRENT_DATE())"
-elif date_range == "Année en cours":
-    date_filter = "AND YEAR(transaction_date) = YEAR(CURRENT_DATE())"
-else:  # Tout l'historique
-    date_filter = ""
+
+# En mode détaillé, les six requêtes partent en parallèle ; chaque section attend uniquement la sienne
+if DATA_AVAILABLE and bundled_mode:
+    sales_bundle = prepare_bundle(run_named_query("sales_bundle", filters=filters))
+elif DATA_AVAILABLE:
+    results = submit_named_queries(
+        ["sales_kpis", "sales_monthly", "sales_regional", "sales_yoy", "sales_seasonality", "sales_payment"],
+        filters=filters
+    )
+
+# Alertes d'anomalies : requête indépendante, lancée dès maintenant pour tourner pendant les
+# autres sections (table absente tant que Sql/anomaly_detection.sql n'a pas été exécuté)
+alerts_available = DATA_AVAILABLE and has_table("ANALYTICS.sales_anomaly_alerts")
+if alerts_available:
+    alerts_future = submit_named_queries(["sales_anomaly_alerts"], filters=filters)["sales_anomaly_alerts"]
 
 # ========================================
 # KPIs PRINCIPAUX
@@ -153,49 +166,46 @@ else:  # Tout l'historique
 
 st.header("📈 Indicateurs Clés de Performance")
 
-if SNOWFLAKE_AVAILABLE:
-    kpi_query = """
-    SELECT 
-        SUM(amount) AS total_revenue,
-        COUNT(*) AS total_transactions,
-        ROUND(AVG(amount), 2) AS avg_transaction_value,
-        COUNT(DISTINCT region) AS markets_served
-    FROM SILVER.financial_transactions_clean
-    WHERE transaction_type = 'Sale'
-    """
-    kpis = run_query(kpi_query)
+if DATA_AVAILABLE and bundled_mode:
+    kpis = kpis_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    kpis = results["sales_kpis"].result()
 else:
     kpis = get_demo_data("kpis")
 
-col1, col2, col3, col4 = st.columns(4)
+# Aucune vente pour ces filtres : chaque section affiche un message au lieu de ses graphiques
+if kpis.empty or not kpis['TOTAL_TRANSACTIONS'].fillna(0).iloc[0]:
+    st.info(NO_DATA_MESSAGE)
+else:
+    col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.metric(
-        "💰 Revenu Total",
-        f"${kpis['TOTAL_REVENUE'].iloc[0]:,.0f}",
-        delta="Chiffre d'affaires global"
-    )
+    with col1:
+        st.metric(
+            "💰 Revenu Total",
+            f"${kpis['TOTAL_REVENUE'].iloc[0]:,.0f}",
+            delta="Chiffre d'affaires global"
+        )
 
-with col2:
-    st.metric(
-        "🛒 Transactions",
-        f"{kpis['TOTAL_TRANSACTIONS'].iloc[0]:,.0f}",
-        delta="Volume de ventes"
-    )
+    with col2:
+        st.metric(
+            "🛒 Transactions",
+            f"{kpis['TOTAL_TRANSACTIONS'].iloc[0]:,.0f}",
+            delta="Volume de ventes"
+        )
 
-with col3:
-    st.metric(
-        "💵 Panier Moyen",
-        f"${kpis['AVG_TRANSACTION_VALUE'].iloc[0]:,.2f}",
-        delta="Valeur moyenne"
-    )
+    with col3:
+        st.metric(
+            "💵 Panier Moyen",
+            f"${kpis['AVG_TRANSACTION_VALUE'].iloc[0]:,.2f}",
+            delta="Valeur moyenne"
+        )
 
-with col4:
-    st.metric(
-        "🌍 Marchés",
-        f"{kpis['MARKETS_SERVED'].iloc[0]}",
-        delta="Régions actives"
-    )
+    with col4:
+        st.metric(
+            "🌍 Marchés",
+            f"{kpis['MARKETS_SERVED'].iloc[0]}",
+            delta="Régions actives"
+        )
 
 st.markdown("---")
 
@@ -205,46 +215,39 @@ st.markdown("---")
 
 st.header("📅 Évolution des Ventes dans le Temps")
 
-if SNOWFLAKE_AVAILABLE:
-   monthly_query = f"""
-  SELECT 
-    DATE_TRUNC('month', transaction_date) AS month,
-    SUM(amount) AS total_sales,
-    COUNT(*) AS number_of_sales,
-    ROUND(AVG(amount), 2) AS avg_transaction_value
-  FROM SILVER.financial_transactions_clean
-  WHERE transaction_type = 'Sale'
-  {date_filter}
-  GROUP BY DATE_TRUNC('month', transaction_date)
-  ORDER BY month
-  """
-   monthly_sales = run_query(monthly_query)
+if DATA_AVAILABLE and bundled_mode:
+    monthly_sales = monthly_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    monthly_sales = results["sales_monthly"].result()
 else:
     monthly_sales = get_demo_data("monthly")
 
-# Graphique d'évolution
-fig_monthly = go.Figure()
-
-fig_monthly.add_trace(go.Scatter(
-    x=monthly_sales['MONTH'],
-    y=monthly_sales['TOTAL_SALES'],
-    mode='lines+markers',
-    name='Ventes Totales',
-    line=dict(color='#1f77b4', width=3),
-    marker=dict(size=10),
-    hovertemplate='<b>%{x|%B %Y}</b><br>Ventes: $%{y:,.0f}<extra></extra>'
-))
-
-fig_monthly.update_layout(
-    title="Évolution Mensuelle des Ventes (12 derniers mois)",
-    xaxis_title="Mois",
-    yaxis_title="Ventes ($)",
-    hovermode='x unified',
-    height=450,
-    showlegend=True
-)
+if monthly_sales.empty:
+    st.info(NO_DATA_MESSAGE)
+else:
+    # Graphique d'évolution
+    fig_monthly = go.Figure()
+
+    fig_monthly.add_trace(go.Scatter(
+        x=monthly_sales['MONTH'],
+        y=monthly_sales['TOTAL_SALES'],
+        mode='lines+markers',
+        name='Ventes Totales',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=10),
+        hovertemplate='<b>%{x|%B %Y}</b><br>Ventes: $%{y:,.0f}<extra></extra>'
+    ))
+
+    fig_monthly.update_layout(
+        title="Évolution Mensuelle des Ventes (12 derniers mois)",
+        xaxis_title="Mois",
+        yaxis_title="Ventes ($)",
+        hovermode='x unified',
+        height=450,
+        showlegend=True
+    )
 
-st.plotly_chart(fig_monthly, use_container_width=True)
+    st.plotly_chart(fig_monthly, use_container_width=True)
 
 # ========================================
 # PERFORMANCE RÉGIONALE
@@ -252,61 +255,56 @@ st.plotly_chart(fig_monthly, use_container_width=True)
 
 st.header("🌍 Performance par Région")
 
-if SNOWFLAKE_AVAILABLE:
-    regional_query = """
-    SELECT 
-        region,
-        SUM(amount) AS total_sales,
-        COUNT(*) AS number_of_sales
-    FROM SILVER.financial_transactions_clean
-    WHERE transaction_type = 'Sale'
-    GROUP BY region
-    ORDER BY total_sales DESC
-    """
-    regional_sales = run_query(regional_query)
+if DATA_AVAILABLE and bundled_mode:
+    regional_sales = regional_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    regional_sales = results["sales_regional"].result()
 else:
     regional_sales = get_demo_data("regional")
 
-col1, col2 = st.columns(2)
-
-with col1:
-    # Graphique en barres
-    fig_region_bar = px.bar(
-        regional_sales,
-        x='REGION',
-        y='TOTAL_SALES',
-        title="Ventes par Région",
-        labels={'TOTAL_SALES': 'Ventes ($)', 'REGION': 'Région'},
-        color='TOTAL_SALES',
-        color_continuous_scale='Blues'
-    )
-    fig_region_bar.update_layout(height=400)
-    st.plotly_chart(fig_region_bar, use_container_width=True)
+if regional_sales.empty:
+    st.info(NO_DATA_MESSAGE)
+else:
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Graphique en barres
+        fig_region_bar = px.bar(
+            regional_sales,
+            x='REGION',
+            y='TOTAL_SALES',
+            title="Ventes par Région",
+            labels={'TOTAL_SALES': 'Ventes ($)', 'REGION': 'Région'},
+            color='TOTAL_SALES',
+            color_continuous_scale='Blues'
+        )
+        fig_region_bar.update_layout(height=400)
+        st.plotly_chart(fig_region_bar, use_container_width=True)
+
+    with col2:
+        # Graphique en camembert
+        fig_pie = px.pie(
+            regional_sales,
+            values='TOTAL_SALES',
+            names='REGION',
+            title="Répartition du Chiffre d'Affaires",
+            hole=0.4
+        )
+        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+        fig_pie.update_layout(height=400)
+        st.plotly_chart(fig_pie, use_container_width=True)
 
-with col2:
-    # Graphique en camembert
-    fig_pie = px.pie(
-        regional_sales,
-        values='TOTAL_SALES',
-        names='REGION',
-        title="Répartition du Chiffre d'Affaires",
-        hole=0.4
+    # Tableau détaillé
+    st.subheader("📊 Détails par Région")
+    regional_sales['PANIER_MOYEN'] = regional_sales['TOTAL_SALES'] / regional_sales['NUMBER_OF_SALES']
+    st.dataframe(
+        regional_sales.style.format({
+            'TOTAL_SALES': '${:,.0f}',
+            'NUMBER_OF_SALES': '{:,.0f}',
+            'PANIER_MOYEN': '${:,.2f}'
+        }),
+        use_container_width=True
     )
-    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-    fig_pie.update_layout(height=400)
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-# Tableau détaillé
-st.subheader("📊 Détails par Région")
-regional_sales['PANIER_MOYEN'] = regional_sales['TOTAL_SALES'] / regional_sales['NUMBER_OF_SALES']
-st.dataframe(
-    regional_sales.style.format({
-        'TOTAL_SALES': '${:,.0f}',
-        'NUMBER_OF_SALES': '{:,.0f}',
-        'PANIER_MOYEN': '${:,.2f}'
-    }),
-    use_container_width=True
-)
 
 st.markdown("---")
 
@@ -316,68 +314,58 @@ st.markdown("---")
 
 st.header("📊 Analyse de Croissance")
 
-if SNOWFLAKE_AVAILABLE:
-    yoy_query = """
-    SELECT 
-        transaction_year,
-        SUM(amount) AS total_sales,
-        LAG(SUM(amount)) OVER (ORDER BY transaction_year) AS previous_year_sales,
-        ROUND(
-            (SUM(amount) - LAG(SUM(amount)) OVER (ORDER BY transaction_year)) * 100.0 / 
-            NULLIF(LAG(SUM(amount)) OVER (ORDER BY transaction_year), 0), 
-        2) AS yoy_growth_pct
-    FROM SILVER.financial_transactions_clean
-    WHERE transaction_type = 'Sale'
-    GROUP BY transaction_year
-    ORDER BY transaction_year DESC
-    LIMIT 5
-    """
-    yoy_growth = run_query(yoy_query)
+if DATA_AVAILABLE and bundled_mode:
+    yoy_growth = yoy_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    yoy_growth = results["sales_yoy"].result()
 else:
     yoy_growth = get_demo_data("yoy")
 
-# Graphique combiné
-fig_growth = go.Figure()
-
-fig_growth.add_trace(go.Bar(
-    x=yoy_growth['TRANSACTION_YEAR'],
-    y=yoy_growth['TOTAL_SALES'],
-    name='Ventes Annuelles',
-    marker_color='lightblue',
-    yaxis='y',
-    hovertemplate='<b>%{x}</b><br>Ventes: $%{y:,.0f}<extra></extra>'
-))
-
-fig_growth.add_trace(go.Scatter(
-    x=yoy_growth['TRANSACTION_YEAR'],
-    y=yoy_growth['YOY_GROWTH_PCT'],
-    name='Croissance YoY (%)',
-    yaxis='y2',
-    mode='lines+markers',
-    line=dict(color='red', width=3),
-    marker=dict(size=12),
-    hovertemplate='<b>%{x}</b><br>Croissance: %{y:.2f}%<extra></extra>'
-))
-
-fig_growth.update_layout(
-    title="Ventes Annuelles et Croissance Year-over-Year",
-    xaxis_title="Année",
-    yaxis=dict(title="Ventes ($)"),
-    yaxis2=dict(
-        title="Croissance YoY (%)",
-        overlaying='y',
-        side='right'
-    ),
-    hovermode='x unified',
-    height=450
-)
+if yoy_growth.empty:
+    st.info(NO_DATA_MESSAGE)
+else:
+    # Graphique combiné
+    fig_growth = go.Figure()
+
+    fig_growth.add_trace(go.Bar(
+        x=yoy_growth['TRANSACTION_YEAR'],
+        y=yoy_growth['TOTAL_SALES'],
+        name='Ventes Annuelles',
+        marker_color='lightblue',
+        yaxis='y',
+        hovertemplate='<b>%{x}</b><br>Ventes: $%{y:,.0f}<extra></extra>'
+    ))
+
+    fig_growth.add_trace(go.Scatter(
+        x=yoy_growth['TRANSACTION_YEAR'],
+        y=yoy_growth['YOY_GROWTH_PCT'],
+        name='Croissance YoY (%)',
+        yaxis='y2',
+        mode='lines+markers',
+        line=dict(color='red', width=3),
+        marker=dict(size=12),
+        hovertemplate='<b>%{x}</b><br>Croissance: %{y:.2f}%<extra></extra>'
+    ))
+
+    fig_growth.update_layout(
+        title="Ventes Annuelles et Croissance Year-over-Year",
+        xaxis_title="Année",
+        yaxis=dict(title="Ventes ($)"),
+        yaxis2=dict(
+            title="Croissance YoY (%)",
+            overlaying='y',
+            side='right'
+        ),
+        hovermode='x unified',
+        height=450
+    )
 
-st.plotly_chart(fig_growth, use_container_width=True)
+    st.plotly_chart(fig_growth, use_container_width=True)
 
-# Alerte si croissance négative
-if yoy_growth['YOY_GROWTH_PCT'].iloc[0] < 0:
-    st.error(f"⚠️ **ALERTE** : Croissance négative de {yoy_growth['YOY_GROWTH_PCT'].iloc[0]:.2f}% sur la dernière année !")
-    st.info("💡 **Action recommandée** : Consulter le document business_insights.md pour les recommandations stratégiques")
+    # Alerte si croissance négative
+    if yoy_growth['YOY_GROWTH_PCT'].iloc[0] < 0:
+        st.error(f"⚠️ **ALERTE** : Croissance négative de {yoy_growth['YOY_GROWTH_PCT'].iloc[0]:.2f}% sur la dernière année !")
+        st.info("💡 **Action recommandée** : Consulter le document business_insights.md pour les recommandations stratégiques")
 
 st.markdown("---")
 
@@ -387,42 +375,37 @@ st.markdown("---")
 
 st.header("🌡️ Analyse de Saisonnalité")
 
-if SNOWFLAKE_AVAILABLE:
-    seasonality_query = """
-    SELECT 
-        MONTH(transaction_date) AS month_number,
-        TO_CHAR(transaction_date, 'Month') AS month_name,
-        SUM(amount) AS total_sales
-    FROM SILVER.financial_transactions_clean
-    WHERE transaction_type = 'Sale'
-    GROUP BY MONTH(transaction_date), TO_CHAR(transaction_date, 'Month')
-    ORDER BY month_number
-    """
-    seasonality = run_query(seasonality_query)
+if DATA_AVAILABLE and bundled_mode:
+    seasonality = seasonality_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    seasonality = results["sales_seasonality"].result()
 else:
     seasonality = get_demo_data("seasonality")
 
-fig_season = px.bar(
-    seasonality,
-    x='MONTH_NAME',
-    y='TOTAL_SALES',
-    title="Saisonnalité des Ventes (Moyenne Mensuelle)",
-    labels={'TOTAL_SALES': 'Ventes Totales ($)', 'MONTH_NAME': 'Mois'},
-    color='TOTAL_SALES',
-    color_continuous_scale='Viridis'
-)
-fig_season.update_layout(height=400)
-st.plotly_chart(fig_season, use_container_width=True)
+if seasonality.empty:
+    st.info(NO_DATA_MESSAGE)
+else:
+    fig_season = px.bar(
+        seasonality,
+        x='MONTH_NAME',
+        y='TOTAL_SALES',
+        title="Saisonnalité des Ventes (Moyenne Mensuelle)",
+        labels={'TOTAL_SALES': 'Ventes Totales ($)', 'MONTH_NAME': 'Mois'},
+        color='TOTAL_SALES',
+        color_continuous_scale='Viridis'
+    )
+    fig_season.update_layout(height=400)
+    st.plotly_chart(fig_season, use_container_width=True)
 
-# Identifier pic et creux
-max_month = seasonality.loc[seasonality['TOTAL_SALES'].idxmax(), 'MONTH_NAME']
-min_month = seasonality.loc[seasonality['TOTAL_SALES'].idxmin(), 'MONTH_NAME']
+    # Identifier pic et creux
+    max_month = seasonality.loc[seasonality['TOTAL_SALES'].idxmax(), 'MONTH_NAME']
+    min_month = seasonality.loc[seasonality['TOTAL_SALES'].idxmin(), 'MONTH_NAME']
 
-col1, col2 = st.columns(2)
-with col1:
-    st.success(f"📈 **Pic saisonnier** : {max_month}")
-with col2:
-    st.warning(f"📉 **Creux saisonnier** : {min_month}")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.success(f"📈 **Pic saisonnier** : {max_month}")
+    with col2:
+        st.warning(f"📉 **Creux saisonnier** : {min_month}")
 
 st.markdown("---")
 
@@ -432,46 +415,107 @@ st.markdown("---")
 
 st.header("💳 Analyse des Méthodes de Paiement")
 
-if SNOWFLAKE_AVAILABLE:
-    payment_query = """
-    SELECT 
-        payment_method,
-        COUNT(*) AS number_of_transactions,
-        SUM(amount) AS total_amount
-    FROM SILVER.financial_transactions_clean
-    WHERE transaction_type = 'Sale'
-    GROUP BY payment_method
-    ORDER BY total_amount DESC
-    """
-    payment_methods = run_query(payment_query)
+if DATA_AVAILABLE and bundled_mode:
+    payment_methods = payment_from_bundle(sales_bundle)
+elif DATA_AVAILABLE:
+    payment_methods = results["sales_payment"].result()
 else:
     payment_methods = get_demo_data("payment")
 
-col1, col2 = st.columns(2)
+if payment_methods.empty:
+    st.info(NO_DATA_MESSAGE)
+else:
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_payment = px.bar(
+            payment_methods,
+            x='PAYMENT_METHOD',
+            y='TOTAL_AMOUNT',
+            title="Volume de Ventes par Méthode de Paiement",
+            labels={'TOTAL_AMOUNT': 'Montant Total ($)', 'PAYMENT_METHOD': 'Méthode'},
+            color='TOTAL_AMOUNT',
+            color_continuous_scale='Oranges'
+        )
+        st.plotly_chart(fig_payment, use_container_width=True)
+
+    with col2:
+        st.subheader("📋 Détails")
+        payment_methods['PCT_VOLUME'] = payment_methods['TOTAL_AMOUNT'] / payment_methods['TOTAL_AMOUNT'].sum() * 100
+        st.dataframe(
+            payment_methods.style.format({
+                'NUMBER_OF_TRANSACTIONS': '{:,.0f}',
+                'TOTAL_AMOUNT': '${:,.0f}',
+                'PCT_VOLUME': '{:.2f}%'
+            }),
+            use_container_width=True
+        )
 
-with col1:
-    fig_payment = px.bar(
-        payment_methods,
-        x='PAYMENT_METHOD',
-        y='TOTAL_AMOUNT',
-        title="Volume de Ventes par Méthode de Paiement",
-        labels={'TOTAL_AMOUNT': 'Montant Total ($)', 'PAYMENT_METHOD': 'Méthode'},
-        color='TOTAL_AMOUNT',
-        color_continuous_scale='Oranges'
-    )
-    st.plotly_chart(fig_payment, use_container_width=True)
+st.markdown("---")
 
-with col2:
-    st.subheader("📋 Détails")
-    payment_methods['PCT_VOLUME'] = payment_methods['TOTAL_AMOUNT'] / payment_methods['TOTAL_AMOUNT'].sum() * 100
-    st.dataframe(
-        payment_methods.style.format({
-            'NUMBER_OF_TRANSACTIONS': '{:,.0f}',
-            'TOTAL_AMOUNT': '${:,.0f}',
-            'PCT_VOLUME': '{:.2f}%'
-        }),
-        use_container_width=True
-    )
+# ========================================
+# ALERTES ANOMALIES
+# ========================================
+
+st.header("🚨 Alertes Anomalies")
+
+if alerts_available:
+    alerts = alerts_future.result()
+elif DATA_AVAILABLE:
+    alerts = None
+    st.info("Aucune alerte calculée : exécuter d'abord Sql/anomaly_detection.sql "
+            "(en local : `python Streamlit/local_engine.py detect`).")
+else:
+    alerts = get_demo_data("alerts")
+
+if alerts is not None:
+    scopes = {
+        "Toutes les ventes": 'GLOBAL',
+        "Par région": 'REGION',
+        "Par méthode de paiement": 'PAYMENT_METHOD'
+    }
+    scope = scopes[st.radio("Périmètre des statistiques", list(scopes), horizontal=True)]
+    alerts = alerts[alerts['DIMENSION'] == scope]
+    # Régions et méthodes de paiement de la sidebar
+    if scope == 'REGION' and filters['regions']:
+        alerts = alerts[alerts['DIMENSION_VALUE'].isin(filters['regions'])]
+    elif scope == 'PAYMENT_METHOD' and filters['payment_methods']:
+        alerts = alerts[alerts['DIMENSION_VALUE'].isin(filters['payment_methods'])]
+
+    drops = alerts[alerts['ALERT_TYPE'] == 'BAISSE MENSUELLE']
+    outliers = alerts[alerts['ALERT_TYPE'] == 'TRANSACTION EXCEPTIONNELLE']
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader(f"📉 Baisses mensuelles > 10% ({len(drops)})")
+        st.dataframe(
+            drops[['ALERT_DATE', 'DIMENSION_VALUE', 'AMOUNT', 'REFERENCE_VALUE', 'SCORE']]
+            .rename(columns={
+                'ALERT_DATE': 'MOIS', 'DIMENSION_VALUE': 'PÉRIMÈTRE', 'AMOUNT': 'VENTES',
+                'REFERENCE_VALUE': 'MOIS_PRÉCÉDENT', 'SCORE': 'VARIATION_PCT'
+            })
+            .style.format({'VENTES': '${:,.0f}', 'MOIS_PRÉCÉDENT': '${:,.0f}', 'VARIATION_PCT': '{:.2f}%'}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    with col2:
+        st.subheader(f"💥 Transactions > 3 écarts-types ({len(outliers)})")
+        st.dataframe(
+            outliers.sort_values('SCORE', ascending=False).head(20)
+            [['ALERT_DATE', 'TRANSACTION_ID', 'DIMENSION_VALUE', 'AMOUNT', 'REFERENCE_VALUE', 'SCORE']]
+            .rename(columns={
+                'ALERT_DATE': 'DATE', 'DIMENSION_VALUE': 'PÉRIMÈTRE',
+                'REFERENCE_VALUE': 'MOYENNE', 'SCORE': 'NB_ÉCARTS_TYPES'
+            })
+            .style.format({'AMOUNT': '${:,.2f}', 'MOYENNE': '${:,.2f}', 'NB_ÉCARTS_TYPES': '{:.2f}'}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    st.caption("Moyennes et écarts-types tenus à jour à chaque nouveau lot de ventes "
+               "(Sql/anomaly_detection.sql) : l'historique n'est pas relu à l'affichage.")
 
 st.markdown("---")
 
@@ -513,6 +557,12 @@ with col3:
     👉 Plan d'action prioritaire
     """)
 
+# ========================================
+# PROFILAGE DES REQUÊTES
+# ========================================
+
+render_profiler(mark=profiler_mark)
+
 # ========================================
 # FOOTER
 # ========================================
@@ -525,5 +575,5 @@ st.markdown(f"""
 """)
 
 # Note sur les données
-if not SNOWFLAKE_AVAILABLE:
+if not DATA_AVAILABLE:
     st.info("ℹ️ **Mode Démonstration** : Configurez Snowflake dans `.streamlit/secrets.toml` pour utiliser les vraies données.")
\ No newline at end of file
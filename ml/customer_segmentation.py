@@ -0,0 +1,326 @@
+"""
+AnyCompany Food & Beverage - Segmentation clients (K-Means)
+Version script de customer_segmentation.ipynb pour les grandes bases clients :
+les valeurs de k candidates sont évaluées en parallèle, la silhouette est estimée
+sur un échantillon et MiniBatchKMeans peut remplacer KMeans
+
+Usage :
+    python ml/customer_segmentation.py --secrets .streamlit/secrets.toml
+    python ml/customer_segmentation.py --parquet data/ml/customer_features.parquet --algorithm minibatch --workers 4
+    python ml/customer_segmentation.py --select-k --plots data/ml/plots/segmentation
+"""
+
+import argparse
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from feature_store import SEGMENTATION_QUERY
+from model_registry import registry
+
+try:
+    import snowflake.connector
+    SNOWFLAKE_AVAILABLE = True
+except ImportError:
+    SNOWFLAKE_AVAILABLE = False
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ML_DIR = Path(__file__).resolve().parent
+MODEL_NAME = 'customer_segmentation'  # Nom dans le registre (model_registry.py)
+
+K_RANGE = range(2, 11)
+OPTIMAL_K = 5                 # Choix du notebook (coude + silhouette)
+RANDOM_STATE = 42
+SILHOUETTE_SAMPLE = 10_000    # La silhouette exacte est en O(n²) : estimée sur un échantillon
+MINIBATCH_SIZE = 4096
+# Au-delà, MiniBatchKMeans est utilisé par défaut (--algorithm auto)
+MINIBATCH_THRESHOLD = 200_000
+
+QUERY = SEGMENTATION_QUERY  # Dernière photo du feature store clients
+
+FEATURES = ['RECENCY_DAYS', 'FREQUENCY', 'MONETARY', 'AVG_TRANSACTION_VALUE']
+RESULT_COLS = ['CUSTOMER_NAME', 'REGION', 'RECENCY_DAYS', 'FREQUENCY', 'MONETARY', 'AVG_TRANSACTION_VALUE']
+
+
+def get_snowflake_config(secrets_path):
+    """Lire la section [snowflake] du même secrets.toml que les dashboards"""
+    with open(secrets_path, 'rb') as f:
+        return tomllib.load(f)['snowflake']
+
+
+def load_customers(config=None, parquet=None):
+    """Lire les clients du feature store depuis Snowflake (format Arrow) ou depuis un fichier Parquet"""
+    if parquet is not None:
+        df = pd.read_parquet(parquet)
+        df.columns = [c.upper() for c in df.columns]
+        return df[(df['MONETARY'] > 0) & (df['FREQUENCY'] > 0)].reset_index(drop=True)
+    conn = snowflake.connector.connect(
+        user=config["user"],
+        password=config["password"],
+        account=config["account"],
+        warehouse=config["warehouse"],
+        database=config["database"],
+        schema=config["schema"]
+    )
+    try:
+        return conn.cursor().execute(QUERY).fetch_pandas_all()
+    finally:
+        conn.close()
+
+
+# ========================================
+# FEATURES
+# ========================================
+
+def prepare_features(df):
+    """Plafonner au 99e percentile puis standardiser (comme le notebook)"""
+    X = df[FEATURES].astype('float64')
+    X = X.clip(upper=X.quantile(0.99), axis=1)
+    scaler = StandardScaler()
+    return scaler.fit_transform(X), scaler
+
+
+def make_model(k, algorithm, random_state=RANDOM_STATE):
+    if algorithm == 'minibatch':
+        return MiniBatchKMeans(n_clusters=k, batch_size=MINIBATCH_SIZE, n_init=3, random_state=random_state)
+    return KMeans(n_clusters=k, n_init=10, random_state=random_state)
+
+
+def resolve_algorithm(algorithm, n_rows):
+    if algorithm == 'auto':
+        return 'minibatch' if n_rows > MINIBATCH_THRESHOLD else 'kmeans'
+    return algorithm
+
+
+# ========================================
+# CHOIX DE K EN PARALLÈLE
+# ========================================
+
+_worker_X = None
+
+
+def _init_worker(X):
+    """La matrice n'est envoyée qu'une fois à chaque processus, pas à chaque k"""
+    global _worker_X
+    _worker_X = X
+
+
+def score_k(k, algorithm, sample_size=SILHOUETTE_SAMPLE, X=None):
+    """Ajuster un k candidat ; inertie, silhouette (échantillonnée) et Davies-Bouldin"""
+    X = _worker_X if X is None else X
+    start = time.perf_counter()
+    model = make_model(k, algorithm).fit(X)
+    labels = model.labels_ if hasattr(model, 'labels_') else model.predict(X)
+    sample = sample_size if sample_size and len(X) > sample_size else None
+    return {
+        'k': k,
+        'inertia': float(model.inertia_),
+        'silhouette': float(silhouette_score(X, labels, sample_size=sample, random_state=RANDOM_STATE)),
+        'davies_bouldin': float(davies_bouldin_score(X, labels)),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def select_k(X, k_range=K_RANGE, algorithm='kmeans', workers=None, sample_size=SILHOUETTE_SAMPLE):
+    """Évaluer chaque k candidat sur un pool de processus ; une ligne par k
+
+    workers=1 évalue les k dans le processus courant (pas de pool).
+    """
+    workers = workers or min(len(k_range), os.cpu_count() or 1)
+    if workers == 1:
+        scores = [score_k(k, algorithm, sample_size, X=X) for k in k_range]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X,)) as pool:
+            scores = list(pool.map(score_k, k_range, [algorithm] * len(k_range),
+                                   [sample_size] * len(k_range)))
+    return pd.DataFrame(scores)
+
+
+# ========================================
+# SEGMENTS
+# ========================================
+
+def label_segments(df):
+    """Libellés métier du notebook, calculés en une fois pour tous les clients
+
+    Les seuils (médianes) sont calculés une seule fois au lieu d'une fois par client.
+    """
+    recency, frequency, monetary = df['RECENCY_DAYS'], df['FREQUENCY'], df['MONETARY']
+    recency_threshold = recency.median()
+    frequency_threshold = frequency.median()
+    monetary_threshold = monetary.median()
+    conditions = [
+        (monetary > monetary_threshold * 2) & (frequency > frequency_threshold) & (recency < recency_threshold),
+        (monetary > monetary_threshold) & (frequency > frequency_threshold),
+        (recency < recency_threshold) & (monetary > monetary_threshold),
+        (recency > recency_threshold * 2) & (frequency < frequency_threshold),
+        recency > recency_threshold * 3,
+    ]
+    labels = ['Champions', 'Loyal Customers', 'Promising', 'At Risk', 'Lost Customers']
+    return pd.Series(np.select(conditions, labels, default='Needs Attention'), index=df.index)
+
+
+def cluster_profiles(df):
+    profiles = df.groupby('cluster').agg({
+        'CUSTOMER_NAME': 'count',
+        'RECENCY_DAYS': 'mean',
+        'FREQUENCY': 'mean',
+        'MONETARY': 'mean',
+        'AVG_TRANSACTION_VALUE': 'mean',
+        'CUSTOMER_LIFETIME_DAYS': 'mean'
+    }).round(2)
+    return profiles
+
+
+def fit_segments(X, k=OPTIMAL_K, algorithm='kmeans', select=False, k_range=K_RANGE, workers=None,
+                 sample_size=SILHOUETTE_SAMPLE):
+    """Choisir k (si select) et ajuster le modèle ; retourne (artefacts, durées)
+
+    Artefacts : modèle, étiquette de cluster de chaque client, scores par k et métriques.
+    """
+    timings = {}
+    k_scores = None
+    if select:
+        start = time.perf_counter()
+        k_scores = select_k(X, k_range, algorithm=algorithm, workers=workers, sample_size=sample_size)
+        k = int(k_scores.loc[k_scores['silhouette'].idxmax(), 'k'])
+        timings['select_k'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = make_model(k, algorithm)
+    labels = model.fit_predict(X)
+    sample = sample_size if sample_size and len(X) > sample_size else None
+    metrics = {
+        'k': k,
+        'algorithm': algorithm,
+        'silhouette': float(silhouette_score(X, labels, sample_size=sample, random_state=RANDOM_STATE)),
+        'davies_bouldin': float(davies_bouldin_score(X, labels))
+    }
+    timings['fit'] = time.perf_counter() - start
+    return {'model': model, 'labels': labels, 'k_scores': k_scores, 'metrics': metrics}, timings
+
+
+def segment(df, k=OPTIMAL_K, algorithm='auto', select=False, k_range=K_RANGE, workers=None,
+            sample_size=SILHOUETTE_SAMPLE, use_registry=True, force=False):
+    """Segmenter les clients ; retourne un dict (clients, profils, scores par k, modèle)
+
+    select=True évalue d'abord k_range en parallèle et retient la meilleure silhouette ;
+    sinon k est utilisé directement (OPTIMAL_K, le choix du notebook). Avec le registre,
+    des features et des paramètres inchangés réutilisent le modèle et les clusters enregistrés.
+    """
+    timings = {}
+    algorithm = resolve_algorithm(algorithm, len(df))
+
+    start = time.perf_counter()
+    X, scaler = prepare_features(df)
+    timings['features'] = time.perf_counter() - start
+
+    def fit():
+        fitted, fit_timings = fit_segments(X, k, algorithm, select, k_range, workers, sample_size)
+        timings.update(fit_timings)
+        return {**fitted, 'scaler': scaler}, fitted['metrics']
+
+    if use_registry:
+        start = time.perf_counter()
+        params = {
+            'k': None if select else k,
+            'k_range': list(k_range) if select else None,
+            'algorithm': algorithm,
+            'sample_size': sample_size,
+            'features': FEATURES,
+            'random_state': RANDOM_STATE,
+        }
+        fitted, _, reused = registry.get_or_train(MODEL_NAME, df[FEATURES], params, fit, force=force)
+        if reused:
+            timings['registry'] = time.perf_counter() - start
+    else:
+        fitted, _ = fit()
+
+    df = df.copy()
+    df['cluster'] = np.asarray(fitted['labels'])
+    df['segment_label'] = label_segments(df)
+
+    return {
+        'customers': df,
+        'profiles': cluster_profiles(df),
+        'k_scores': fitted['k_scores'],
+        'metrics': fitted['metrics'],
+        'model': fitted['model'],
+        'scaler': fitted['scaler'],
+        'timings': timings
+    }
+
+
+def save_outputs(result, output_dir=ML_DIR):
+    """Mêmes fichiers CSV que le notebook"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result['customers'][RESULT_COLS].to_csv(output_dir / 'customer_segments_results.csv', index=False)
+    result['profiles'].to_csv(output_dir / 'cluster_profiles.csv')
+    print(f"💾 Résultats sauvegardés dans {output_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Segmentation clients K-Means")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--secrets', default='.streamlit/secrets.toml', help="Fichier secrets.toml")
+    source.add_argument('--parquet', help="Fichier Parquet des clients (feature_store.py export)")
+    parser.add_argument('--k', type=int, default=OPTIMAL_K, help="Nombre de segments (ignoré avec --select-k)")
+    parser.add_argument('--select-k', action='store_true',
+                        help="Évaluer k = 2..10 en parallèle et retenir la meilleure silhouette")
+    parser.add_argument('--algorithm', choices=['auto', 'kmeans', 'minibatch'], default='auto',
+                        help=f"auto = MiniBatchKMeans au-delà de {MINIBATCH_THRESHOLD:,} clients")
+    parser.add_argument('--workers', type=int, help="Processus pour le choix de k (défaut : nb de CPU)")
+    parser.add_argument('--silhouette-sample', type=int, default=SILHOUETTE_SAMPLE,
+                        help="Clients tirés pour estimer la silhouette (0 = tous)")
+    parser.add_argument('--output', default=str(ML_DIR), help="Dossier des fichiers CSV de résultats")
+    parser.add_argument('--retrain', action='store_true',
+                        help="Réentraîner même si le registre contient déjà ces données et paramètres")
+    parser.add_argument('--plots', help="Dossier où écrire les graphiques en PNG (aucun graphique par défaut)")
+    args = parser.parse_args(argv)
+
+    if args.parquet is None and not SNOWFLAKE_AVAILABLE:
+        print("❌ snowflake-connector-python n'est pas installé (utiliser --parquet)")
+        return 1
+    start = time.perf_counter()
+    df = load_customers(None if args.parquet else get_snowflake_config(args.secrets), parquet=args.parquet)
+    timings = {'load': time.perf_counter() - start}
+    print(f"📊 {len(df):,} clients chargés")
+
+    result = segment(df, k=args.k, algorithm=args.algorithm, select=args.select_k,
+                     workers=args.workers, sample_size=args.silhouette_sample, force=args.retrain)
+    if result['k_scores'] is not None:
+        print("\n📊 Scores par k:")
+        print(result['k_scores'].round(4).to_string(index=False))
+    metrics = result['metrics']
+    print(f"\n✅ Clustering avec k={metrics['k']} ({metrics['algorithm']})")
+    print(f"Silhouette Score: {metrics['silhouette']:.4f}")
+    print(f"Davies-Bouldin: {metrics['davies_bouldin']:.4f}")
+    print("\n📈 Distribution des segments:")
+    print(result['customers']['segment_label'].value_counts().to_string())
+    save_outputs(result, args.output)
+    timings.update(result['timings'])
+    if args.plots:
+        import plots
+        start = time.perf_counter()
+        paths = plots.write_figures(lambda: plots.segmentation_figures(result), args.plots)
+        timings['plots'] = time.perf_counter() - start
+        print(f"🖼️  {len(paths)} graphique(s) → {args.plots}")
+    print("⏱️  " + ", ".join(f"{step} {seconds:.1f} s" for step, seconds in timings.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+AnyCompany Food & Beverage - Feature store clients
+Requêtes de lecture de ANALYTICS.customer_feature_snapshots (Sql/customer_features.sql),
+communes à la segmentation, à la propension à l'achat et au modèle de réponse aux
+promotions : les agrégats clients sont calculés une fois par rafraîchissement, puis
+lus par les trois modèles
+
+Usage :
+    python Streamlit/local_engine.py features      # Rafraîchir les photos (moteur local)
+    python ml/feature_store.py export --local-data data/local
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ML_DIR = Path(__file__).resolve().parent
+DATA_DIR = ML_DIR.parent / 'data' / 'ml'
+STREAMLIT_DIR = ML_DIR.parent / 'Streamlit'
+# Dossier Parquet du moteur local des dashboards (Streamlit/local_engine.py)
+LOCAL_DATA_DIR = Path(os.environ.get('ANYCOMPANY_LOCAL_DATA', ML_DIR.parent / 'data' / 'local'))
+
+TRAINING_SNAPSHOTS = 3  # Photos étiquetées les plus récentes utilisées pour la propension
+
+# Clients de la dernière photo (tout l'historique des ventes)
+SEGMENTATION_QUERY = """
+SELECT
+    customer_name,
+    region,
+    total_purchases AS frequency,
+    total_spent AS monetary,
+    days_since_last_purchase AS recency_days,
+    avg_transaction_value,
+    customer_lifetime_days
+FROM ANALYTICS.customer_feature_snapshots
+WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM ANALYTICS.customer_feature_snapshots)
+  AND total_spent > 0
+  AND total_purchases > 0
+"""
+
+PROPENSITY_COLUMNS = """
+    s.customer_name,
+    s.region,
+    s.total_purchases,
+    s.total_spent,
+    s.avg_transaction_value,
+    s.customer_lifetime_days,
+    s.days_since_last_purchase,
+    s.active_months,
+    s.promotions_received,
+    s.avg_discount_received,
+    s.campaigns_exposed,
+    s.avg_campaign_conversion"""
+
+# Étiquette : le client achète-t-il dans le mois qui suit la photo ? Seules les photos dont
+# ce mois est complet (antérieur au dernier mois de ventes) sont étiquetées.
+PROPENSITY_TRAINING_QUERY = f"""
+WITH photos AS (
+    SELECT DISTINCT snapshot_date
+    FROM ANALYTICS.customer_feature_snapshots
+    WHERE snapshot_date < (SELECT MAX(mois) FROM ANALYTICS.customer_monthly_activity)
+    ORDER BY snapshot_date DESC
+    LIMIT {TRAINING_SNAPSHOTS}
+)
+SELECT
+    s.snapshot_date,{PROPENSITY_COLUMNS},
+    CASE WHEN n.customer_name IS NOT NULL THEN 1 ELSE 0 END AS will_purchase_next_30days
+FROM ANALYTICS.customer_feature_snapshots s
+INNER JOIN photos p
+    ON p.snapshot_date = s.snapshot_date
+LEFT JOIN ANALYTICS.customer_monthly_activity n
+    ON n.customer_name = s.customer_name
+    AND n.region = s.region
+    AND n.mois = s.snapshot_date
+"""
+
+PROPENSITY_SCORING_QUERY = f"""
+SELECT{PROPENSITY_COLUMNS}
+FROM ANALYTICS.customer_feature_snapshots s
+WHERE s.snapshot_date = (SELECT MAX(snapshot_date) FROM ANALYTICS.customer_feature_snapshots)
+"""
+
+# Chaque vente reçoit la photo du 1er de son mois : l'historique du client tel qu'il
+# était connu avant la vente (les clients sans achat antérieur n'ont pas de photo)
+PROMOTION_RESPONSE_QUERY = """
+SELECT
+    f.transaction_id,
+    f.amount,
+    f.region,
+    f.payment_method,
+    f.transaction_month AS month,
+    DAYOFWEEK(f.transaction_date) + 1 AS day_of_week,
+    CASE WHEN f.promotion_id IS NOT NULL THEN 1 ELSE 0 END AS has_promotion,
+    COALESCE(f.discount_percentage, 0) AS discount_percentage,
+    s.total_purchases AS customer_purchase_history,
+    s.avg_transaction_value AS customer_avg_spend,
+    DATEDIFF(day, s.last_purchase_date, f.transaction_date) AS days_since_last_purchase
+FROM ANALYTICS.transaction_promotion_flags f
+INNER JOIN ANALYTICS.customer_feature_snapshots s
+    ON s.customer_name = f.entity
+    AND s.region = f.region
+    AND s.snapshot_date = DATE_TRUNC('month', f.transaction_date)
+WHERE f.amount > 0
+"""
+
+# Entrées des modèles : fichiers Parquet acceptés par l'option --parquet de chaque script
+MODEL_INPUTS = {
+    'customer_features.parquet': SEGMENTATION_QUERY,
+    'purchase_propensity_training.parquet': PROPENSITY_TRAINING_QUERY,
+    'purchase_propensity_data.parquet': PROPENSITY_SCORING_QUERY,
+    'promotion_response_data.parquet': PROMOTION_RESPONSE_QUERY,
+}
+
+
+def export_local(data_dir, output_dir=DATA_DIR):
+    """Écrire les entrées des trois modèles depuis le moteur local (Streamlit/local_engine.py)"""
+    if str(STREAMLIT_DIR) not in sys.path:
+        sys.path.append(str(STREAMLIT_DIR))
+    import local_engine
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for file_name, query in MODEL_INPUTS.items():
+        rows = local_engine.export_query(query, output_dir / file_name, data_dir)
+        print(f"💾 {rows:,} lignes → {output_dir / file_name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature store clients")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_cmd = sub.add_parser('export', help="Écrire en Parquet les entrées des modèles (moteur local)")
+    export_cmd.add_argument('--local-data', default=str(LOCAL_DATA_DIR),
+                            help="Dossier Parquet du moteur local")
+    export_cmd.add_argument('--output', default=str(DATA_DIR), help="Dossier des fichiers Parquet")
+    args = parser.parse_args(argv)
+
+    export_local(args.local_data, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+AnyCompany Food & Beverage - Registre local des modèles
+Conserve les estimateurs entraînés, scalers et encodeurs, rangés par empreinte des données
+d'entraînement et des paramètres : des entrées inchangées réutilisent les artefacts déjà
+calculés au lieu de réentraîner, et les dashboards chargent un modèle en quelques millisecondes
+
+Organisation : data/ml/registry/<modèle>/<clé>/
+    <artefact>.joblib   un fichier par artefact (non compressé : chargé en mémoire partagée)
+    meta.json           paramètres, empreinte des données, métriques, versions
+data/ml/registry/<modèle>/LATEST contient la clé de la dernière version enregistrée.
+
+Usage :
+    python ml/model_registry.py list
+    python ml/model_registry.py prune --keep 3
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import sklearn
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ML_DIR = Path(__file__).resolve().parent
+REGISTRY_DIR = Path(os.environ.get('ANYCOMPANY_MODEL_REGISTRY', ML_DIR.parent / 'data' / 'ml' / 'registry'))
+HASH_BLOCK_BYTES = 1 << 20
+
+
+# ========================================
+# EMPREINTES
+# ========================================
+
+def data_fingerprint(data):
+    """Empreinte des données d'entraînement
+
+    Fichier (Parquet...) : contenu octet par octet, quelques ms par Go. DataFrame : empreinte
+    de chaque ligne (pd.util.hash_pandas_object) et du schéma. Liste ou tuple : empreinte
+    de chacun des éléments.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, (list, tuple)):
+        for item in data:
+            digest.update(data_fingerprint(item).encode())
+    elif isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([[str(c), str(t)] for c, t in data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def params_fingerprint(params):
+    """Empreinte des paramètres (JSON trié ; objets non sérialisables par leur repr)"""
+    text = json.dumps(params, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def model_key(data, params):
+    """Clé de registre : données + paramètres + version de scikit-learn
+
+    Les artefacts picklés ne sont pas garantis d'une version de scikit-learn à l'autre :
+    une mise à jour produit donc une nouvelle clé (et un réentraînement).
+    """
+    digest = hashlib.sha256()
+    digest.update(data_fingerprint(data).encode())
+    digest.update(params_fingerprint(params).encode())
+    digest.update(sklearn.__version__.encode())
+    return digest.hexdigest()[:16]
+
+
+def artifact_name(model_label):
+    """Nom d'artefact d'un modèle : 'Random Forest' → 'model_random_forest'"""
+    return 'model_' + '_'.join(model_label.lower().split())
+
+
+# ========================================
+# REGISTRE
+# ========================================
+
+class ModelRegistry:
+    """Artefacts rangés par modèle et par clé, gardés en mémoire une fois chargés
+
+    Les artefacts sont écrits sans compression : joblib les relit en mmap (mmap_mode='r'),
+    les grands tableaux numpy (arbres, matrices de référence) ne sont pas copiés à la lecture.
+    Une version est écrite dans un dossier temporaire puis renommée : un lecteur ne voit
+    jamais une version incomplète.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._loaded = {}  # (modèle, clé, artefact) → objet
+
+    def _dir(self, name, key):
+        return self.root / name / key
+
+    def latest_key(self, name):
+        """Clé de la dernière version enregistrée (None si aucune)"""
+        path = self.root / name / 'LATEST'
+        return path.read_text().strip() if path.exists() else None
+
+    def exists(self, name, key):
+        return (self._dir(name, key) / 'meta.json').exists()
+
+    def metadata(self, name, key=None):
+        key = key or self.latest_key(name)
+        if key is None or not self.exists(name, key):
+            return None
+        return json.loads((self._dir(name, key) / 'meta.json').read_text(encoding='utf-8'))
+
+    def save(self, name, key, artifacts, params=None, metrics=None):
+        """Enregistrer les artefacts ({nom: objet}) d'une version et en faire la dernière"""
+        target = self._dir(name, key)
+        staging = target.parent / f'.{key}-{uuid.uuid4().hex[:8]}'
+        staging.mkdir(parents=True)
+        for artifact, obj in artifacts.items():
+            joblib.dump(obj, staging / f'{artifact}.joblib')
+        meta = {
+            'name': name,
+            'key': key,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'artifacts': sorted(artifacts),
+            'params': params,
+            'metrics': metrics,
+            'sklearn_version': sklearn.__version__,
+        }
+        (staging / 'meta.json').write_text(json.dumps(meta, indent=2, default=repr), encoding='utf-8')
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+        self.set_latest(name, key)
+        return target
+
+    def add_artifacts(self, name, key, artifacts):
+        """Ajouter des artefacts dérivés à une version existante (ex. prédictions précalculées)"""
+        target = self._dir(name, key)
+        for artifact, obj in artifacts.items():
+            partial = target / f'.{artifact}.joblib.tmp'
+            joblib.dump(obj, partial)
+            os.replace(partial, target / f'{artifact}.joblib')
+            with self._lock:
+                self._loaded.pop((name, key, artifact), None)
+        meta = self.metadata(name, key)
+        meta['artifacts'] = sorted(set(meta['artifacts']) | set(artifacts))
+        (target / 'meta.json').write_text(json.dumps(meta, indent=2, default=repr), encoding='utf-8')
+
+    def set_latest(self, name, key):
+        partial = self.root / name / '.LATEST.tmp'
+        partial.write_text(key)
+        os.replace(partial, self.root / name / 'LATEST')
+
+    def load(self, name, key=None, artifacts=None):
+        """Charger les artefacts d'une version (la dernière par défaut) ; {nom: objet}
+
+        Chaque artefact n'est lu qu'une fois par processus : les appels suivants le
+        retournent depuis la mémoire.
+        """
+        key = key or self.latest_key(name)
+        if key is None or not self.exists(name, key):
+            raise KeyError(f"Aucune version de {name} dans le registre {self.root}")
+        names = artifacts or self.metadata(name, key)['artifacts']
+        loaded = {}
+        for artifact in names:
+            cache_key = (name, key, artifact)
+            with self._lock:
+                cached = cache_key in self._loaded
+                obj = self._loaded.get(cache_key)
+            if not cached:
+                obj = joblib.load(self._dir(name, key) / f'{artifact}.joblib', mmap_mode='r')
+                with self._lock:
+                    self._loaded[cache_key] = obj
+            loaded[artifact] = obj
+        return loaded
+
+    def get_or_train(self, name, data, params, train_fn, force=False, verbose=True):
+        """Artefacts de la version correspondant à (données, paramètres), entraînée au besoin
+
+        train_fn() retourne (artefacts, métriques) ; force=True réentraîne même si la version
+        existe. Retourne (artefacts, clé, réutilisé).
+        """
+        start = time.perf_counter()
+        key = model_key(data, params)
+        if self.exists(name, key) and not force:
+            artifacts = self.load(name, key)
+            self.set_latest(name, key)
+            if verbose:
+                print(f"♻️  {name} {key} réutilisé depuis le registre ({time.perf_counter() - start:.2f} s)")
+            return artifacts, key, True
+        artifacts, metrics = train_fn()
+        self.save(name, key, artifacts, params=params, metrics=metrics)
+        with self._lock:
+            self._loaded.update({(name, key, artifact): obj for artifact, obj in artifacts.items()})
+        if verbose:
+            print(f"💾 {name} {key} enregistré dans {self.root}")
+        return artifacts, key, False
+
+    def versions(self, name=None):
+        """Une ligne par version enregistrée (tous les modèles si name est None)"""
+        rows = []
+        names = [name] if name else sorted(p.name for p in self.root.glob('*') if p.is_dir())
+        for model in names:
+            latest = self.latest_key(model)
+            for meta_path in (self.root / model).glob('*/meta.json'):
+                meta = json.loads(meta_path.read_text(encoding='utf-8'))
+                size = sum(f.stat().st_size for f in meta_path.parent.glob('*.joblib'))
+                rows.append({
+                    'MODEL': model,
+                    'KEY': meta['key'],
+                    'CREATED_AT': meta['created_at'],
+                    'LATEST': meta['key'] == latest,
+                    'ARTIFACTS': ', '.join(meta['artifacts']),
+                    'SIZE_MB': round(size / 1e6, 1),
+                })
+        columns = ['MODEL', 'KEY', 'CREATED_AT', 'LATEST', 'ARTIFACTS', 'SIZE_MB']
+        return pd.DataFrame(rows, columns=columns).sort_values(['MODEL', 'CREATED_AT']).reset_index(drop=True)
+
+    def prune(self, name, keep=3):
+        """Supprimer les versions les plus anciennes (la dernière est toujours conservée)"""
+        versions = self.versions(name)
+        older = versions.loc[versions['KEY'] != self.latest_key(name), 'KEY']  # Du plus ancien au plus récent
+        removed = list(older.iloc[:max(len(older) - (keep - 1), 0)])
+        for key in removed:
+            shutil.rmtree(self._dir(name, key))
+        return removed
+
+
+registry = ModelRegistry()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registre local des modèles")
+    parser.add_argument('--root', default=str(REGISTRY_DIR), help="Dossier du registre")
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_cmd = sub.add_parser('list', help="Lister les versions enregistrées")
+    list_cmd.add_argument('--model', help="Un seul modèle")
+    prune_cmd = sub.add_parser('prune', help="Supprimer les anciennes versions")
+    prune_cmd.add_argument('--model', help="Un seul modèle (défaut : tous)")
+    prune_cmd.add_argument('--keep', type=int, default=3, help="Versions conservées par modèle")
+    args = parser.parse_args(argv)
+
+    reg = ModelRegistry(args.root)
+    if args.command == 'list':
+        print(reg.versions(args.model).to_string(index=False))
+    else:
+        for model in [args.model] if args.model else reg.versions()['MODEL'].unique():
+            removed = reg.prune(model, keep=args.keep)
+            print(f"🗑️  {model} : {len(removed)} version(s) supprimée(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+AnyCompany Food & Beverage - Graphiques des modèles ML
+Figures des notebooks, séparées des calculs : les scripts de ml/ ne les produisent qu'avec
+l'option --plots, en PNG et sans affichage (backend Agg), après avoir écrit leurs résultats.
+Dans un notebook, les mêmes fonctions retournent des figures à afficher.
+
+Usage (notebook) :
+    from plots import segmentation_figures
+    figures = segmentation_figures(result)
+    figures['segments']
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import matplotlib
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use('Agg')  # Pas d'affichage hors notebook (Jupyter définit MPLBACKEND)
+    import matplotlib.pyplot as plt
+    plt.style.use('ggplot')  # Style des notebooks
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+BINS = 50
+
+
+def save_figures(figures, output_dir, dpi=100):
+    """Écrire chaque figure en PNG (<nom>.png) puis la fermer ; retourne les chemins"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, fig in figures.items():
+        path = output_dir / f'{name}.png'
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def write_figures(build, output_dir):
+    """Construire les figures (build() → {nom: figure}) et les écrire en PNG ; [] sans matplotlib"""
+    if not MATPLOTLIB_AVAILABLE:
+        print("⚠️  matplotlib n'est pas installé : graphiques ignorés")
+        return []
+    return save_figures(build(), output_dir)
+
+
+def _bar(ax, values, title, color, ylabel=None):
+    ax.bar(range(len(values)), values.values, color=color, edgecolor='black')
+    ax.set_xticks(range(len(values)))
+    ax.set_xticklabels(values.index, rotation=45, ha='right')
+    ax.set_title(title)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+
+
+# ========================================
+# SEGMENTATION CLIENTS
+# ========================================
+
+def segmentation_figures(result):
+    """Distributions RFM, choix de k (si évalué) et profil des segments"""
+    customers = result['customers']
+    figures = {}
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    for ax, (col, title, color) in zip(axes.flat, [
+        ('RECENCY_DAYS', 'Recency (jours)', None),
+        ('FREQUENCY', 'Frequency (nb achats)', 'orange'),
+        ('MONETARY', 'Monetary (€)', 'green'),
+        ('AVG_TRANSACTION_VALUE', 'Panier Moyen (€)', 'red'),
+    ]):
+        ax.hist(customers[col], bins=BINS, edgecolor='black', color=color)
+        ax.set_title(title)
+    fig.tight_layout()
+    figures['rfm_distributions'] = fig
+
+    k_scores = result.get('k_scores')
+    if k_scores is not None:
+        fig, axes = plt.subplots(1, 2, figsize=(15, 5))
+        axes[0].plot(k_scores['k'], k_scores['inertia'], 'bo-', linewidth=2, markersize=8)
+        axes[0].set_xlabel('k')
+        axes[0].set_ylabel('Inertie')
+        axes[0].set_title('Elbow Method')
+        axes[1].plot(k_scores['k'], k_scores['silhouette'], 'ro-', linewidth=2, markersize=8)
+        axes[1].set_xlabel('k')
+        axes[1].set_ylabel('Silhouette Score')
+        axes[1].set_title('Silhouette Score par k')
+        fig.tight_layout()
+        figures['k_selection'] = fig
+
+    by_segment = customers.groupby('segment_label')
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    counts = customers['segment_label'].value_counts()
+    axes[0, 0].pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=90)
+    axes[0, 0].set_title('Distribution par Segment')
+    _bar(axes[0, 1], by_segment['MONETARY'].sum().sort_values(ascending=False),
+         'Revenue par Segment', 'skyblue', 'Revenue (€)')
+    _bar(axes[1, 0], by_segment['FREQUENCY'].mean().sort_values(ascending=False),
+         'Fréquence Moyenne par Segment', 'lightcoral')
+    _bar(axes[1, 1], by_segment['RECENCY_DAYS'].mean().sort_values(),
+         'Recency Moyenne par Segment', 'lightgreen')
+    fig.tight_layout()
+    figures['segments'] = fig
+    return figures
+
+
+# ========================================
+# PROPENSION À L'ACHAT
+# ========================================
+
+def propensity_figures(trained, df=None, target_col='WILL_PURCHASE_NEXT_30DAYS'):
+    """Performance des modèles et, avec les clients d'entraînement, profils acheteurs / non-acheteurs"""
+    figures = {}
+    results = trained['results'].set_index('Model')
+    fig, ax = plt.subplots(figsize=(12, 5))
+    results[['ROC_AUC', 'Precision', 'Recall', 'F1']].plot(kind='bar', ax=ax, edgecolor='black')
+    ax.set_title(f"Performance des Modèles (meilleur : {trained['best_model']})")
+    ax.set_ylim(0, 1)
+    ax.tick_params(axis='x', rotation=0)
+    fig.tight_layout()
+    figures['model_performance'] = fig
+
+    if df is not None:
+        buyers = df[target_col] == 1
+        fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+        axes[0, 0].hist(df.loc[~buyers, 'DAYS_SINCE_LAST_PURCHASE'], bins=BINS, alpha=0.7,
+                        label='Non-acheteur', edgecolor='black')
+        axes[0, 0].hist(df.loc[buyers, 'DAYS_SINCE_LAST_PURCHASE'], bins=BINS, alpha=0.7,
+                        label='Acheteur', edgecolor='black')
+        axes[0, 0].set_title('Jours depuis dernier achat')
+        axes[0, 0].legend()
+        for ax, (col, title) in zip(axes.flat[1:], [
+            ('TOTAL_PURCHASES', "Nombre total d'achats"),
+            ('TOTAL_SPENT', 'Montant total dépensé'),
+            ('AVG_TRANSACTION_VALUE', 'Panier moyen'),
+            ('ACTIVE_MONTHS', 'Mois actifs'),
+            ('PROMOTIONS_RECEIVED', 'Promotions reçues'),
+        ]):
+            ax.boxplot([df.loc[~buyers, col], df.loc[buyers, col]], tick_labels=['Non-acheteur', 'Acheteur'])
+            ax.set_title(title)
+        fig.tight_layout()
+        figures['buyer_profiles'] = fig
+    return figures
+
+
+def score_distribution_figure(scores, bins=(0.3, 0.6)):
+    """Histogramme des probabilités d'achat, seuils des tranches en pointillés"""
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.hist(scores, bins=BINS, edgecolor='black')
+    for threshold in bins:
+        ax.axvline(threshold, color='r', linestyle='--', lw=2)
+    ax.set_xlabel("Probabilité d'achat (30 jours)")
+    ax.set_ylabel('Clients')
+    ax.set_title('Distribution des scores de propension')
+    fig.tight_layout()
+    return {'score_distribution': fig}
+
+
+# ========================================
+# RÉPONSE AUX PROMOTIONS
+# ========================================
+
+def promotion_figures(trained, scenarios_df):
+    """Importance des features, prédictions vs réel, scénarios de remise et lift par segment"""
+    figures = {}
+    top = trained['feature_importance'].head(10)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(top['Feature'], top['Importance'], edgecolor='black')
+    ax.set_xlabel('Importance')
+    ax.set_title('Top 10 Features - Random Forest')
+    ax.invert_yaxis()
+    fig.tight_layout()
+    figures['feature_importance'] = fig
+
+    sample = trained['test_sample']
+    predicted_col = f"pred_{trained['best_model']}"
+    if len(sample) and predicted_col in sample:
+        actual, predicted = sample['actual'], sample[predicted_col]
+        fig, axes = plt.subplots(1, 2, figsize=(15, 5))
+        axes[0].scatter(actual, predicted, alpha=0.3)
+        axes[0].plot([actual.min(), actual.max()], [actual.min(), actual.max()], 'r--', lw=2, label='Parfait')
+        axes[0].set_xlabel('Montant Réel (€)')
+        axes[0].set_ylabel('Montant Prédit (€)')
+        axes[0].set_title(f"Prédictions vs Réel ({trained['best_model']})")
+        axes[0].legend()
+        axes[1].scatter(predicted, actual - predicted, alpha=0.3)
+        axes[1].axhline(y=0, color='r', linestyle='--', lw=2)
+        axes[1].set_xlabel('Montant Prédit (€)')
+        axes[1].set_ylabel('Résidus (€)')
+        axes[1].set_title('Analyse des Résidus')
+        fig.tight_layout()
+        figures['predictions'] = fig
+
+    fig, axes = plt.subplots(1, 2, figsize=(15, 5))
+    axes[0].bar(scenarios_df['Scenario'], scenarios_df['Avg Transaction'], edgecolor='black')
+    axes[0].set_title('Transaction Moyenne par Scénario')
+    axes[0].set_ylabel('Montant (€)')
+    axes[0].tick_params(axis='x', rotation=45)
+    axes[1].plot(scenarios_df['Scenario'], scenarios_df['Lift vs No Promo'], 'o-', linewidth=2, markersize=8)
+    axes[1].axhline(y=0, color='r', linestyle='--')
+    axes[1].set_title('Lift vs Sans Promotion (%)')
+    axes[1].tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    figures['scenarios'] = fig
+
+    lift = trained['lift_by_segment']
+    if lift is not None and len(lift):
+        fig, ax = plt.subplots(figsize=(10, 5))
+        x = np.arange(len(lift))
+        ax.bar(x - 0.2, lift['Avg Without'], 0.4, label='Sans Promo', edgecolor='black')
+        ax.bar(x + 0.2, lift['Avg With'], 0.4, label='Avec Promo', edgecolor='black')
+        ax.set_xticks(x)
+        ax.set_xticklabels([f"{s}\n{l:+.1f}%" for s, l in zip(lift['Segment'], lift['Lift'])])
+        ax.set_ylabel('Montant Moyen (€)')
+        ax.set_title('Lift par Segment Client')
+        ax.legend()
+        fig.tight_layout()
+        figures['lift_by_segment'] = fig
+    return figures
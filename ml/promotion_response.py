@@ -0,0 +1,579 @@
+"""
+AnyCompany Food & Beverage - Modèle de réponse aux promotions (entraînement par blocs)
+Version hors mémoire de promotion_response_model.ipynb : les transactions sont lues par
+lots Arrow, les features calculées bloc par bloc et les modèles entraînés de façon
+incrémentale. La mémoire utilisée dépend de la taille des blocs, pas du nombre de lignes.
+
+Usage :
+    python ml/promotion_response.py --secrets .streamlit/secrets.toml
+    python ml/promotion_response.py --parquet data/ml/promotion_response_data.parquet
+    python ml/promotion_response.py --plots data/ml/plots/promotion_response
+"""
+
+import argparse
+import os
+import sys
+import time
+import tomllib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+from feature_store import PROMOTION_RESPONSE_QUERY
+from model_registry import artifact_name, registry
+
+try:
+    import snowflake.connector
+    SNOWFLAKE_AVAILABLE = True
+except ImportError:
+    SNOWFLAKE_AVAILABLE = False
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ML_DIR = Path(__file__).resolve().parent
+DATA_DIR = ML_DIR.parent / 'data' / 'ml'
+SPILL_FILE = DATA_DIR / 'promotion_response_data.parquet'  # Copie locale de la requête Snowflake
+MODEL_NAME = 'promotion_response'                          # Nom dans le registre (model_registry.py)
+
+CHUNK_ROWS = 250_000      # Lignes par bloc de features
+TEST_SHARE = 20           # % des transactions réservées au test (tirage par transaction_id)
+SAMPLE_ROWS = 50_000      # Échantillon de test conservé pour les scénarios et les graphiques
+RANDOM_STATE = 42
+
+QUERY = PROMOTION_RESPONSE_QUERY  # Ventes et historique client tiré du feature store
+
+FEATURE_COLS = [
+    'HAS_PROMOTION', 'DISCOUNT_PERCENTAGE', 'MONTH', 'DAY_OF_WEEK',
+    'CUSTOMER_PURCHASE_HISTORY', 'CUSTOMER_AVG_SPEND', 'DAYS_SINCE_LAST_PURCHASE',
+    'region_encoded', 'payment_encoded', 'promo_x_history',
+    'discount_x_avg_spend', 'is_weekend', 'is_high_season'
+]
+TARGET_COL = 'AMOUNT'
+
+SEGMENT_BINS = [0, 2, 5, 10, 1000]
+SEGMENT_LABELS = ['Nouveau', 'Occasionnel', 'Régulier', 'VIP']
+SCENARIO_DISCOUNTS = [0.05, 0.10, 0.15, 0.20]
+
+# La forêt reçoit des arbres entraînés chacun sur un seul bloc. Le boosting a besoin des
+# mêmes seuils de découpage (bins) pour tous ses arbres : il est entraîné une seule fois,
+# sur un échantillon aléatoire borné des transactions d'entraînement tiré pendant la passe 1
+BOOSTING_SAMPLE_ROWS = 200_000
+BOOSTING_MAX_ITER = 100
+FOREST_TREES_TOTAL = 100
+
+
+def get_snowflake_config(secrets_path):
+    """Lire la section [snowflake] du même secrets.toml que les dashboards"""
+    with open(secrets_path, 'rb') as f:
+        return tomllib.load(f)['snowflake']
+
+
+# ========================================
+# LECTURE PAR LOTS ARROW
+# ========================================
+
+def _normalize_batch(batch):
+    """Entiers en int64 et décimaux en float64 : les lots Snowflake n'ont pas tous la même
+    largeur d'entier, le fichier Parquet a besoin d'un schéma unique"""
+    columns = []
+    for field, column in zip(batch.schema, batch.columns):
+        if pa.types.is_integer(field.type):
+            column = pc.cast(column, pa.int64())
+        elif pa.types.is_decimal(field.type):
+            column = pc.cast(column, pa.float64())
+        columns.append(column)
+    return pa.table(columns, names=batch.schema.names)
+
+
+def spill_snowflake_query(config, query=QUERY, path=SPILL_FILE):
+    """Écrire le résultat de la requête dans un fichier Parquet, lot Arrow par lot Arrow
+
+    Les passes d'entraînement relisent ce fichier au lieu de réexécuter la requête ;
+    aucun lot n'est gardé en mémoire après son écriture. Le fichier est écrit sous un nom
+    temporaire puis renommé : un job lancé en parallèle ne lit jamais une copie partielle.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    conn = snowflake.connector.connect(
+        user=config["user"],
+        password=config["password"],
+        account=config["account"],
+        warehouse=config["warehouse"],
+        database=config["database"],
+        schema=config["schema"]
+    )
+    writer, rows = None, 0
+    try:
+        cursor = conn.cursor().execute(query)
+        for batch in cursor.fetch_arrow_batches():
+            batch = _normalize_batch(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(partial, batch.schema)
+            writer.write_table(batch.cast(writer.schema))
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        conn.close()
+    if writer is None:
+        raise ValueError("La requête n'a retourné aucune ligne")
+    os.replace(partial, path)
+    print(f"💾 {rows:,} lignes → {path}")
+    return path
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS, columns=None):
+    """Parcourir un fichier Parquet par blocs de chunk_rows lignes (DataFrames, colonnes en majuscules)"""
+    source = pq.ParquetFile(path)
+    if columns is not None:
+        by_upper = {name.upper(): name for name in source.schema_arrow.names}
+        columns = [by_upper[c] for c in columns]
+    for batch in source.iter_batches(batch_size=chunk_rows, columns=columns):
+        df = batch.to_pandas()
+        df.columns = [c.upper() for c in df.columns]
+        yield df
+
+
+def is_test_row(transaction_ids, test_share=TEST_SHARE):
+    """Affectation train/test stable d'une passe à l'autre : empreinte de transaction_id"""
+    hashes = pd.util.hash_pandas_object(pd.Series(transaction_ids).astype(str), index=False)
+    return (hashes.to_numpy() % 100) < test_share
+
+
+# ========================================
+# FEATURES
+# ========================================
+
+class StreamingEncoder:
+    """Équivalent de LabelEncoder pour des blocs successifs
+
+    Les codes sont attribués dans l'ordre alphabétique des modalités vues lors de la
+    première passe (comme LabelEncoder) ; une modalité inconnue reçoit -1.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.classes_ = np.array([], dtype=object)
+
+    def partial_fit(self, values):
+        self.seen.update(pd.unique(pd.Series(values).dropna().astype(str)))
+        return self
+
+    def finalize(self):
+        self.classes_ = np.array(sorted(self.seen), dtype=object)
+        return self
+
+    def transform(self, values):
+        index = pd.Index(self.classes_)
+        return index.get_indexer(pd.Series(values).astype(str))
+
+
+def build_features(df, region_encoder, payment_encoder):
+    """Features de promotion_response_model.ipynb calculées sur un bloc"""
+    features = pd.DataFrame(index=df.index)
+    for col in ['HAS_PROMOTION', 'DISCOUNT_PERCENTAGE', 'MONTH', 'DAY_OF_WEEK',
+                'CUSTOMER_PURCHASE_HISTORY', 'CUSTOMER_AVG_SPEND', 'DAYS_SINCE_LAST_PURCHASE']:
+        features[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    features = features.fillna(0)
+
+    features['region_encoded'] = region_encoder.transform(df['REGION'])
+    features['payment_encoded'] = payment_encoder.transform(df['PAYMENT_METHOD'])
+
+    # Features d'interaction
+    features['promo_x_history'] = features['HAS_PROMOTION'] * features['CUSTOMER_PURCHASE_HISTORY']
+    features['discount_x_avg_spend'] = features['DISCOUNT_PERCENTAGE'] * features['CUSTOMER_AVG_SPEND']
+
+    # Features temporelles binaires
+    features['is_weekend'] = features['DAY_OF_WEEK'].isin([1, 7]).astype(int)
+    features['is_high_season'] = features['MONTH'].isin([11, 12, 1]).astype(int)
+    return features[FEATURE_COLS]
+
+
+# ========================================
+# MÉTRIQUES EN FLUX
+# ========================================
+
+class StreamingMetrics:
+    """MAE, RMSE et R² cumulés bloc par bloc (sans garder les prédictions)"""
+
+    def __init__(self):
+        self.n = 0
+        self.abs_error = 0.0
+        self.sq_error = 0.0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=float)
+        errors = y_true - np.asarray(y_pred, dtype=float)
+        self.n += len(y_true)
+        self.abs_error += np.abs(errors).sum()
+        self.sq_error += (errors ** 2).sum()
+        self.sum_y += y_true.sum()
+        self.sum_y2 += (y_true ** 2).sum()
+
+    def result(self):
+        if self.n == 0:
+            return {'MAE': np.nan, 'RMSE': np.nan, 'R2': np.nan}
+        total = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {
+            'MAE': self.abs_error / self.n,
+            'RMSE': np.sqrt(self.sq_error / self.n),
+            'R2': 1 - self.sq_error / total if total > 0 else np.nan
+        }
+
+
+# ========================================
+# ENTRAÎNEMENT
+# ========================================
+
+def scan(path, chunk_rows=CHUNK_ROWS, boosting_rows=BOOSTING_SAMPLE_ROWS):
+    """Passe 1 : modalités, standardisation, nombre de blocs d'entraînement et
+    échantillon uniforme de boosting_rows transactions d'entraînement (features + cible)"""
+    region_encoder, payment_encoder = StreamingEncoder(), StreamingEncoder()
+    for df in iter_chunks(path, chunk_rows, columns=['REGION', 'PAYMENT_METHOD']):
+        region_encoder.partial_fit(df['REGION'])
+        payment_encoder.partial_fit(df['PAYMENT_METHOD'])
+    region_encoder.finalize()
+    payment_encoder.finalize()
+
+    scaler = StandardScaler()
+    rows = {'train': 0, 'test': 0}
+    chunks = 0
+    sample = []
+    rng = np.random.default_rng(RANDOM_STATE)
+    for df in iter_chunks(path, chunk_rows):
+        test = is_test_row(df['TRANSACTION_ID'])
+        X = build_features(df, region_encoder, payment_encoder)
+        if (~test).any():
+            scaler.partial_fit(X[~test])
+            chunks += 1
+            # Même tirage que l'échantillon de test : les plus petites clés aléatoires
+            block = X[~test].assign(_target=df.loc[~test, TARGET_COL].astype('float64'),
+                                    _key=rng.random(int((~test).sum())))
+            sample = [pd.concat(sample + [block]).nsmallest(boosting_rows, '_key')]
+        rows['train'] += int((~test).sum())
+        rows['test'] += int(test.sum())
+    boosting_sample = sample[0].drop(columns='_key') if sample else None
+    return region_encoder, payment_encoder, scaler, rows, chunks, boosting_sample
+
+
+def make_models(train_chunks):
+    """Modèles à mémoire bornée, pendants des quatre modèles du notebook
+
+    - SGD Ridge : régression linéaire pénalisée L2 (partial_fit bloc par bloc), remplace Linear/Ridge
+    - Hist Gradient Boosting : un seul fit sur l'échantillon de la passe 1 (bins calculés une fois)
+    - Random Forest : FOREST_TREES_TOTAL arbres au plus, répartis sur les blocs (warm_start)
+
+    Retourne aussi le nombre d'arbres ajoutés à chaque bloc d'entraînement : au-delà de
+    FOREST_TREES_TOTAL blocs, seul un bloc sur train_chunks / FOREST_TREES_TOTAL reçoit
+    un arbre, pour que la taille de la forêt ne dépende pas du volume.
+    """
+    trees_per_chunk = np.diff(np.arange(train_chunks + 1) * FOREST_TREES_TOTAL // max(train_chunks, 1))
+    return {
+        'SGD Ridge': SGDRegressor(penalty='l2', alpha=1e-4, learning_rate='invscaling',
+                                  eta0=0.01, random_state=RANDOM_STATE),
+        'Hist Gradient Boosting': HistGradientBoostingRegressor(
+            max_iter=BOOSTING_MAX_ITER, max_depth=5, learning_rate=0.1,
+            early_stopping=False, random_state=RANDOM_STATE),
+        'Random Forest': RandomForestRegressor(
+            n_estimators=0, max_depth=10, warm_start=True, n_jobs=-1,
+            random_state=RANDOM_STATE),
+    }, trees_per_chunk
+
+
+# Modèles entraînés bloc par bloc ; les autres le sont sur l'échantillon de la passe 1
+CHUNKED_MODELS = ('SGD Ridge', 'Random Forest')
+
+
+def fit_chunk(name, model, X, y, scaler, trees):
+    """Faire progresser un modèle de CHUNKED_MODELS sur un bloc d'entraînement"""
+    if name == 'SGD Ridge':
+        model.partial_fit(scaler.transform(X), y)
+    elif trees > 0:
+        model.n_estimators += int(trees)
+        model.fit(X, y)
+
+
+def predict(name, model, X, scaler):
+    if name == 'SGD Ridge':
+        return model.predict(scaler.transform(X))
+    return model.predict(X)
+
+
+def train(path, chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS, verbose=True):
+    """Entraîner et évaluer les modèles en trois passes sur le fichier
+
+    1. modalités, standardisation, comptage, échantillon d'entraînement du boosting
+    2. boosting sur l'échantillon, puis SGD et forêt bloc par bloc sur les transactions d'entraînement
+    3. métriques cumulées sur les transactions de test, lift par segment et
+       échantillon de test borné (sample_rows lignes) pour les scénarios
+
+    Retourne un dict : modèles, préprocesseurs, résultats et échantillon de test.
+    """
+    timings = {}
+    start = time.perf_counter()
+    region_encoder, payment_encoder, scaler, rows, train_chunks, boosting_sample = scan(path, chunk_rows)
+    timings['scan'] = time.perf_counter() - start
+    if verbose:
+        print(f"🔎 {rows['train']:,} transactions d'entraînement, {rows['test']:,} de test "
+              f"({train_chunks} bloc(s) de {chunk_rows:,} lignes au plus)")
+
+    start = time.perf_counter()
+    models, trees_per_chunk = make_models(train_chunks)
+    if boosting_sample is not None:
+        models['Hist Gradient Boosting'].fit(boosting_sample[FEATURE_COLS], boosting_sample['_target'])
+    chunk_no = 0
+    for i, df in enumerate(iter_chunks(path, chunk_rows), start=1):
+        train_mask = ~is_test_row(df['TRANSACTION_ID'])
+        if not train_mask.any():
+            continue
+        X = build_features(df[train_mask], region_encoder, payment_encoder)
+        y = df.loc[train_mask, TARGET_COL].astype('float64').to_numpy()
+        for name in CHUNKED_MODELS:
+            fit_chunk(name, models[name], X, y, scaler, trees_per_chunk[chunk_no])
+        chunk_no += 1
+        if verbose:
+            print(f"  🔄 bloc {i} : {len(X):,} lignes")
+    forest_trees = len(getattr(models['Random Forest'], 'estimators_', []))
+    if forest_trees > FOREST_TREES_TOTAL:
+        raise RuntimeError(f"Forêt de {forest_trees} arbres (FOREST_TREES_TOTAL = {FOREST_TREES_TOTAL})")
+    timings['train'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = {name: StreamingMetrics() for name in models}
+    segment_sums = []
+    sample = []
+    rng = np.random.default_rng(RANDOM_STATE)
+    for df in iter_chunks(path, chunk_rows):
+        test_mask = is_test_row(df['TRANSACTION_ID'])
+        if not test_mask.any():
+            continue
+        X = build_features(df[test_mask], region_encoder, payment_encoder)
+        y = df.loc[test_mask, TARGET_COL].astype('float64').to_numpy()
+        predictions = {name: predict(name, model, X, scaler) for name, model in models.items()}
+        for name, y_pred in predictions.items():
+            metrics[name].update(y, y_pred)
+        segment_sums.append(segment_totals(X, y))
+
+        # Échantillon uniforme borné : on garde les sample_rows lignes de plus petite clé aléatoire
+        block = X.assign(actual=y, _key=rng.random(len(X)))
+        for name, y_pred in predictions.items():
+            block[f'pred_{name}'] = y_pred
+        sample = [pd.concat(sample + [block]).nsmallest(sample_rows, '_key')]
+    timings['evaluate'] = time.perf_counter() - start
+
+    results_df = pd.DataFrame([{'Model': name, **m.result()} for name, m in metrics.items()])
+    results_df = results_df.sort_values('R2', ascending=False)
+    best_name = results_df.iloc[0]['Model']
+    test_sample = sample[0].drop(columns='_key') if sample else pd.DataFrame(columns=FEATURE_COLS)
+
+    return {
+        'models': models,
+        'best_model': best_name,
+        'scaler': scaler,
+        'region_encoder': region_encoder,
+        'payment_encoder': payment_encoder,
+        'results': results_df,
+        'feature_importance': pd.DataFrame({
+            'Feature': FEATURE_COLS,
+            'Importance': models['Random Forest'].feature_importances_
+        }).sort_values('Importance', ascending=False),
+        'lift_by_segment': lift_by_segment(pd.concat(segment_sums) if segment_sums else None),
+        'test_sample': test_sample,
+        'rows': rows,
+        'timings': timings,
+    }
+
+
+# ========================================
+# REGISTRE DES MODÈLES
+# ========================================
+
+TRAINED_ARTIFACTS = ('scaler', 'region_encoder', 'payment_encoder', 'results',
+                     'feature_importance', 'lift_by_segment', 'test_sample')
+
+
+def training_params(chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS):
+    """Paramètres qui, avec le fichier de données, déterminent le résultat de train()"""
+    models, _ = make_models(1)
+    return {
+        'chunk_rows': chunk_rows,
+        'sample_rows': sample_rows,
+        'test_share': TEST_SHARE,
+        'features': FEATURE_COLS,
+        'boosting_sample_rows': BOOSTING_SAMPLE_ROWS,
+        'forest_trees_total': FOREST_TREES_TOTAL,
+        'random_state': RANDOM_STATE,
+        'models': {name: model.get_params() for name, model in models.items()},
+    }
+
+
+def to_artifacts(trained):
+    """Un artefact par modèle (chargeable seul) et par préprocesseur ou tableau de résultats"""
+    artifacts = {artifact_name(name): model for name, model in trained['models'].items()}
+    artifacts.update({name: trained[name] for name in TRAINED_ARTIFACTS})
+    artifacts['summary'] = {
+        'best_model': trained['best_model'],
+        'model_names': list(trained['models']),
+        'rows': trained['rows'],
+    }
+    return artifacts
+
+
+def from_artifacts(artifacts):
+    """Inverse de to_artifacts : même dict que train() (sans les durées)"""
+    summary = artifacts['summary']
+    trained = {name: artifacts[name] for name in TRAINED_ARTIFACTS}
+    trained['models'] = {name: artifacts[artifact_name(name)] for name in summary['model_names']}
+    trained['best_model'] = summary['best_model']
+    trained['rows'] = summary['rows']
+    return trained
+
+
+def train_or_reuse(path, chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS, force=False, verbose=True):
+    """train() en passant par le registre : même fichier et mêmes paramètres → modèles,
+    préprocesseurs et résultats rechargés au lieu d'être réentraînés
+
+    Retourne (trained, clé de registre, réutilisé).
+    """
+    start = time.perf_counter()
+    timings = {}
+
+    def fit():
+        trained = train(path, chunk_rows=chunk_rows, sample_rows=sample_rows, verbose=verbose)
+        timings.update(trained['timings'])
+        return to_artifacts(trained), {'results': trained['results'].to_dict('records'), 'rows': trained['rows']}
+
+    artifacts, key, reused = registry.get_or_train(
+        MODEL_NAME, path, training_params(chunk_rows, sample_rows), fit, force=force, verbose=verbose
+    )
+    trained = from_artifacts(artifacts)
+    trained['timings'] = {'registry': time.perf_counter() - start} if reused else timings
+    return trained, key, reused
+
+
+# ========================================
+# RÉSULTATS
+# ========================================
+
+def segment_totals(X, y):
+    """Sommes et effectifs par segment client × promotion pour un bloc de test"""
+    segments = pd.cut(X['CUSTOMER_PURCHASE_HISTORY'], bins=SEGMENT_BINS, labels=SEGMENT_LABELS)
+    return (pd.DataFrame({'segment': segments, 'promo': X['HAS_PROMOTION'].to_numpy(), 'actual': y})
+            .groupby(['segment', 'promo'], observed=True)['actual'].agg(['sum', 'count']))
+
+
+def lift_by_segment(totals):
+    """Lift des promotions par segment (mêmes colonnes que lift_by_segment.csv)"""
+    if totals is None or totals.empty:
+        return pd.DataFrame(columns=['Segment', 'Lift', 'Avg Without', 'Avg With'])
+    totals = totals.groupby(level=[0, 1], observed=True).sum()
+    means = (totals['sum'] / totals['count']).unstack('promo')
+    rows = []
+    for segment in SEGMENT_LABELS:
+        if segment not in means.index:
+            continue
+        with_promo = means.loc[segment].get(1.0, np.nan)
+        without_promo = means.loc[segment].get(0.0, np.nan)
+        if without_promo > 0:
+            rows.append({
+                'Segment': segment,
+                'Lift': (with_promo / without_promo - 1) * 100,
+                'Avg Without': without_promo,
+                'Avg With': with_promo
+            })
+    return pd.DataFrame(rows, columns=['Segment', 'Lift', 'Avg Without', 'Avg With'])
+
+
+def simulate_scenarios(trained, discounts=SCENARIO_DISCOUNTS):
+    """Impact de différents niveaux de remise, prédit sur l'échantillon de test
+
+    Tous les scénarios sont évalués en un seul predict (voir scenario_engine.py).
+    """
+    from scenario_engine import ScenarioEngine
+
+    name = trained['best_model']
+    engine = ScenarioEngine(name, trained['models'][name], trained['test_sample'],
+                            scaler=trained['scaler'], region_classes=trained['region_encoder'].classes_)
+    sweep = engine.sweep(discounts, by=())
+    return pd.DataFrame({
+        'Scenario': ['Sans Promotion' if d == 0 else f'Promo {int(round(d * 100))}%' for d in sweep['DISCOUNT']],
+        'Avg Transaction': sweep['AVG_TRANSACTION'],
+        'Total Revenue': sweep['TOTAL_REVENUE'],
+        'Lift vs No Promo': sweep['LIFT_PCT']
+    })
+
+
+def save_outputs(trained, scenarios_df, output_dir=ML_DIR):
+    """Mêmes fichiers CSV que le notebook"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    trained['results'].to_csv(output_dir / 'model_performance.csv', index=False)
+    trained['feature_importance'].to_csv(output_dir / 'feature_importance.csv', index=False)
+    scenarios_df.to_csv(output_dir / 'promotion_scenarios.csv', index=False)
+    trained['lift_by_segment'].to_csv(output_dir / 'lift_by_segment.csv', index=False)
+    print(f"💾 Résultats sauvegardés dans {output_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modèle de réponse aux promotions, entraîné par blocs")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--secrets', default='.streamlit/secrets.toml',
+                        help="Fichier secrets.toml : la requête est d'abord copiée en Parquet")
+    source.add_argument('--parquet', help="Fichier Parquet déjà extrait (colonnes de la requête)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Lignes par bloc (mémoire)")
+    parser.add_argument('--sample-rows', type=int, default=SAMPLE_ROWS,
+                        help="Taille de l'échantillon de test gardé pour les scénarios")
+    parser.add_argument('--output', default=str(ML_DIR), help="Dossier des fichiers CSV de résultats")
+    parser.add_argument('--retrain', action='store_true',
+                        help="Réentraîner même si le registre contient déjà ces données et paramètres")
+    parser.add_argument('--plots', help="Dossier où écrire les graphiques en PNG (aucun graphique par défaut)")
+    args = parser.parse_args(argv)
+
+    timings = {}
+    if args.parquet:
+        path = Path(args.parquet)
+    else:
+        if not SNOWFLAKE_AVAILABLE:
+            print("❌ snowflake-connector-python n'est pas installé (utiliser --parquet)")
+            return 1
+        start = time.perf_counter()
+        path = spill_snowflake_query(get_snowflake_config(args.secrets))
+        timings['extract'] = time.perf_counter() - start
+
+    from scenario_engine import save_engine_inputs
+
+    trained, key, _ = train_or_reuse(path, chunk_rows=args.chunk_rows, sample_rows=args.sample_rows,
+                                     force=args.retrain)
+    print("\n Performance des Modèles:")
+    print(trained['results'].to_string(index=False))
+    scenarios_df = simulate_scenarios(trained)
+    print("\n Simulation Impact Promotions:")
+    print(scenarios_df.to_string(index=False))
+    save_outputs(trained, scenarios_df, args.output)
+    save_engine_inputs(trained, key)
+    print(f"💾 Simulateur de remises : version {key} du registre")
+    timings.update(trained['timings'])
+    if args.plots:
+        import plots
+        start = time.perf_counter()
+        paths = plots.write_figures(lambda: plots.promotion_figures(trained, scenarios_df), args.plots)
+        timings['plots'] = time.perf_counter() - start
+        print(f"🖼️  {len(paths)} graphique(s) → {args.plots}")
+    print("⏱️  " + ", ".join(f"{step} {seconds:.1f} s" for step, seconds in timings.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,486 @@
+"""
+AnyCompany Food & Beverage - Propension à l'achat : entraînement et scoring par lots
+Suite de purchase_propensity.ipynb : le modèle est entraîné une fois et enregistré dans le
+registre local (model_registry.py), puis toute la base clients est scorée par blocs sur un
+pool de processus. Les probabilités sont écrites dans ANALYTICS.customer_propensity_scores, lue par le dashboard marketing.
+
+Usage :
+    python ml/purchase_propensity.py train --secrets .streamlit/secrets.toml
+    python ml/purchase_propensity.py score --secrets .streamlit/secrets.toml --workers 8
+    python ml/purchase_propensity.py train --parquet data/ml/purchase_propensity_training.parquet
+    python ml/purchase_propensity.py score --parquet data/ml/purchase_propensity_data.parquet
+    python ml/purchase_propensity.py train --plots data/ml/plots/propensity
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from feature_store import PROPENSITY_SCORING_QUERY, PROPENSITY_TRAINING_QUERY
+from model_registry import ModelRegistry, artifact_name, registry
+from promotion_response import (
+    DATA_DIR, SNOWFLAKE_AVAILABLE, get_snowflake_config, spill_snowflake_query
+)
+
+if SNOWFLAKE_AVAILABLE:
+    import snowflake.connector
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+ML_DIR = Path(__file__).resolve().parent
+MODEL_NAME = 'purchase_propensity'  # Nom dans le registre (model_registry.py)
+SPILL_FILE = DATA_DIR / 'purchase_propensity_data.parquet'     # Copie locale de la requête Snowflake
+SCORES_FILE = DATA_DIR / 'customer_propensity_scores.parquet'
+# Dossier Parquet du moteur local des dashboards (Streamlit/local_engine.py)
+LOCAL_DATA_DIR = Path(os.environ.get('ANYCOMPANY_LOCAL_DATA', ML_DIR.parent / 'data' / 'local'))
+
+SCORES_TABLE = 'customer_propensity_scores'
+SCORE_CHUNK_ROWS = 200_000    # Clients par tâche de scoring
+TRAIN_ROWS = 500_000          # Au-delà, l'entraînement se fait sur un échantillon
+MIN_CLASS_ROWS = 5            # Acheteurs et non-acheteurs minimum (découpage stratifié, ROC AUC)
+RANDOM_STATE = 42
+
+# Photos étiquetées pour l'entraînement, dernière photo pour le scoring (feature_store.py)
+TRAINING_QUERY = PROPENSITY_TRAINING_QUERY
+SCORING_QUERY = PROPENSITY_SCORING_QUERY
+
+NUMERIC_COLS = [
+    'TOTAL_PURCHASES', 'TOTAL_SPENT', 'AVG_TRANSACTION_VALUE', 'CUSTOMER_LIFETIME_DAYS',
+    'DAYS_SINCE_LAST_PURCHASE', 'ACTIVE_MONTHS', 'PROMOTIONS_RECEIVED', 'AVG_DISCOUNT_RECEIVED',
+    'CAMPAIGNS_EXPOSED', 'AVG_CAMPAIGN_CONVERSION'
+]
+FEATURE_COLS = NUMERIC_COLS + ['region_encoded']
+TARGET_COL = 'WILL_PURCHASE_NEXT_30DAYS'
+SCORING_COLS = ['CUSTOMER_NAME', 'REGION'] + NUMERIC_COLS
+
+# Tranches de probabilité affichées par le dashboard
+SCORE_BINS = [0.3, 0.6]
+SCORE_BANDS = np.array(['Faible', 'Moyenne', 'Forte'], dtype=object)
+
+SCORES_SCHEMA = pa.schema([
+    ('CUSTOMER_NAME', pa.string()),
+    ('REGION', pa.string()),
+    ('PROPENSITY_SCORE', pa.float64()),
+    ('PROPENSITY_BAND', pa.string()),
+    ('MODEL_NAME', pa.string()),
+    ('SCORED_AT', pa.timestamp('us')),
+])
+
+
+def connect(config):
+    return snowflake.connector.connect(
+        user=config["user"],
+        password=config["password"],
+        account=config["account"],
+        warehouse=config["warehouse"],
+        database=config["database"],
+        schema=config["schema"]
+    )
+
+
+# ========================================
+# FEATURES
+# ========================================
+
+def build_features(df, region_classes):
+    """Matrice (n, features) en float64 ; une région inconnue du modèle reçoit -1"""
+    X = np.empty((len(df), len(FEATURE_COLS)), dtype='float64')
+    for i, col in enumerate(NUMERIC_COLS):
+        X[:, i] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    np.nan_to_num(X[:, :len(NUMERIC_COLS)], copy=False, nan=0.0)
+    X[:, -1] = pd.Index(region_classes).get_indexer(df['REGION'].astype(str))
+    return X
+
+
+def score_band(scores):
+    return SCORE_BANDS[np.searchsorted(SCORE_BINS, scores, side='right')]
+
+
+def predict_proba(name, model, X, scaler):
+    """Probabilité d'achat ; seule la régression logistique travaille sur les features standardisées"""
+    if name == 'Logistic Regression':
+        X = scaler.transform(X)
+    return model.predict_proba(X)[:, 1]
+
+
+# ========================================
+# ENTRAÎNEMENT
+# ========================================
+
+def load_training_data(config=None, parquet=None, rows=TRAIN_ROWS):
+    """Clients étiquetés (Snowflake au format Arrow, ou fichier Parquet), échantillonnés au-delà de rows"""
+    if parquet is not None:
+        df = pd.read_parquet(parquet)
+        df.columns = [c.upper() for c in df.columns]
+    else:
+        conn = connect(config)
+        try:
+            df = conn.cursor().execute(TRAINING_QUERY).fetch_pandas_all()
+        finally:
+            conn.close()
+    df = df.dropna(subset=[TARGET_COL])
+    if rows and len(df) > rows:
+        df = df.sample(n=rows, random_state=RANDOM_STATE)
+    return df.reset_index(drop=True)
+
+
+def make_models():
+    """Modèles du notebook ; HistGradientBoosting remplace XGBoost (pas de dépendance en plus)"""
+    return {
+        'Logistic Regression': LogisticRegression(max_iter=1000, class_weight='balanced'),
+        'Random Forest': RandomForestClassifier(n_estimators=100, max_depth=10, min_samples_leaf=20,
+                                                class_weight='balanced', n_jobs=-1,
+                                                random_state=RANDOM_STATE),
+        'Gradient Boosting': HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1,
+                                                            random_state=RANDOM_STATE),
+    }
+
+
+def train(df):
+    """Entraîner les trois modèles ; retourne un dict (modèles, meilleur modèle, préprocesseurs, scores)
+
+    ValueError si l'une des deux classes a moins de MIN_CLASS_ROWS clients.
+    """
+    timings = {}
+    start = time.perf_counter()
+    y = df[TARGET_COL].astype(int).to_numpy()
+    buyers, non_buyers = int((y == 1).sum()), int((y == 0).sum())
+    if min(buyers, non_buyers) < MIN_CLASS_ROWS:
+        raise ValueError(
+            f"{buyers} acheteur(s) et {non_buyers} non-acheteur(s) dans les données d'entraînement : "
+            f"il en faut au moins {MIN_CLASS_ROWS} de chaque (historique trop court ou trop peu de clients)"
+        )
+    region_classes = np.array(sorted(df['REGION'].dropna().astype(str).unique()), dtype=object)
+    X = build_features(df, region_classes)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y
+    )
+    scaler = StandardScaler().fit(X_train)
+    timings['features'] = time.perf_counter() - start
+
+    models, results = make_models(), []
+    for name, model in models.items():
+        start = time.perf_counter()
+        model.fit(scaler.transform(X_train) if name == 'Logistic Regression' else X_train, y_train)
+        proba = predict_proba(name, model, X_test, scaler)
+        predicted = (proba >= 0.5).astype(int)
+        results.append({
+            'Model': name,
+            'ROC_AUC': roc_auc_score(y_test, proba),
+            'Precision': precision_score(y_test, predicted, zero_division=0),
+            'Recall': recall_score(y_test, predicted, zero_division=0),
+            'F1': f1_score(y_test, predicted, zero_division=0)
+        })
+        timings[name] = time.perf_counter() - start
+
+    results = pd.DataFrame(results)
+    best_model = results.loc[results['ROC_AUC'].idxmax(), 'Model']
+    return {
+        'models': models,
+        'best_model': best_model,
+        'scaler': scaler,
+        'region_classes': region_classes,
+        'results': results,
+        'timings': timings
+    }
+
+
+def train_or_reuse(df, force=False):
+    """train() en passant par le registre : mêmes clients et mêmes paramètres → modèles
+    rechargés au lieu d'être réentraînés. Retourne (trained, clé de registre, réutilisé)"""
+    timings = {}
+
+    def fit():
+        trained = train(df)
+        timings.update(trained['timings'])
+        artifacts = {artifact_name(name): model for name, model in trained['models'].items()}
+        artifacts.update({
+            'scaler': trained['scaler'],
+            'region_classes': trained['region_classes'],
+            'results': trained['results'],
+            'summary': {'best_model': trained['best_model'], 'model_names': list(trained['models'])},
+        })
+        return artifacts, {'results': trained['results'].to_dict('records')}
+
+    params = {
+        'features': FEATURE_COLS,
+        'target': TARGET_COL,
+        'random_state': RANDOM_STATE,
+        'models': {name: model.get_params() for name, model in make_models().items()},
+    }
+    artifacts, key, reused = registry.get_or_train(MODEL_NAME, df, params, fit, force=force)
+    summary = artifacts['summary']
+    trained = {
+        'models': {name: artifacts[artifact_name(name)] for name in summary['model_names']},
+        'best_model': summary['best_model'],
+        'scaler': artifacts['scaler'],
+        'region_classes': artifacts['region_classes'],
+        'results': artifacts['results'],
+        'timings': timings,
+    }
+    return trained, key, reused
+
+
+def load_scoring_bundle(key=None, reg=registry):
+    """Meilleur modèle, scaler et régions connues d'une version du registre (la dernière par défaut)"""
+    best_model = reg.load(MODEL_NAME, key, artifacts=['summary'])['summary']['best_model']
+    model_artifact = artifact_name(best_model)
+    artifacts = reg.load(MODEL_NAME, key, artifacts=[model_artifact, 'scaler', 'region_classes'])
+    return {
+        'model_name': best_model,
+        'model': artifacts[model_artifact],
+        'scaler': artifacts['scaler'],
+        'region_classes': artifacts['region_classes'],
+    }
+
+
+# ========================================
+# SCORING PAR BLOCS
+# ========================================
+
+_worker_bundle = None
+
+
+def _init_worker(registry_root, key):
+    """Le modèle est chargé une seule fois par processus, pas à chaque bloc (en mmap : les
+    tableaux des arbres sont partagés entre processus par le cache de pages du système)"""
+    global _worker_bundle
+    _worker_bundle = load_scoring_bundle(key, ModelRegistry(registry_root))
+
+
+def plan_chunks(path, chunk_rows=SCORE_CHUNK_ROWS):
+    """Regrouper les row groups du fichier Parquet en tâches d'environ chunk_rows clients
+
+    Chaque processus relit lui-même ses row groups : seuls les scores (quelques colonnes)
+    repassent par le processus principal. Un row group plus grand que chunk_rows forme
+    une tâche à lui seul.
+    """
+    metadata = pq.ParquetFile(path).metadata
+    chunks, current, rows = [], [], 0
+    for i in range(metadata.num_row_groups):
+        if metadata.row_group(i).num_rows == 0:
+            continue  # Row group vide (fichier écrit depuis un DataFrame vide)
+        current.append(i)
+        rows += metadata.row_group(i).num_rows
+        if rows >= chunk_rows:
+            chunks.append(current)
+            current, rows = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def score_chunk(path, row_groups, scored_at, bundle=None):
+    """Scorer les clients de quelques row groups ; retourne une table Arrow SCORES_SCHEMA"""
+    bundle = _worker_bundle if bundle is None else bundle
+    source = pq.ParquetFile(path)
+    by_upper = {name.upper(): name for name in source.schema_arrow.names}
+    table = source.read_row_groups(row_groups, columns=[by_upper[c] for c in SCORING_COLS])
+    table = table.rename_columns(SCORING_COLS)
+    df = table.to_pandas()
+
+    X = build_features(df, bundle['region_classes'])
+    scores = predict_proba(bundle['model_name'], bundle['model'], X, bundle['scaler'])
+    return pa.table({
+        'CUSTOMER_NAME': table.column('CUSTOMER_NAME').cast(pa.string()),
+        'REGION': table.column('REGION').cast(pa.string()),
+        'PROPENSITY_SCORE': np.round(scores, 4),
+        'PROPENSITY_BAND': score_band(scores),
+        'MODEL_NAME': np.full(len(df), bundle['model_name'], dtype=object),
+        'SCORED_AT': np.full(len(df), np.datetime64(scored_at, 'us')),
+    }, schema=SCORES_SCHEMA)
+
+
+def score_customers(path, key=None, output=SCORES_FILE, workers=None, chunk_rows=SCORE_CHUNK_ROWS):
+    """Scorer tout le fichier clients sur un pool de processus et écrire les scores en Parquet
+
+    key : version du modèle dans le registre (la dernière par défaut). Les blocs sont écrits
+    dans l'ordre du fichier, au fil de leur arrivée ; le fichier final n'apparaît qu'une
+    fois complet. workers=1 score dans le processus courant.
+    Retourne (chemin, nombre de clients, secondes).
+    """
+    start = time.perf_counter()
+    key = key or registry.latest_key(MODEL_NAME)
+    chunks = plan_chunks(path, chunk_rows)
+    # Fichier sans client : aucune tâche, un fichier de scores vide est tout de même écrit
+    workers = workers or max(1, min(len(chunks), os.cpu_count() or 1))
+    scored_at = datetime.now().replace(microsecond=0)
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    partial = output.with_suffix('.tmp')
+
+    rows = 0
+    with pq.ParquetWriter(partial, SCORES_SCHEMA) as writer:
+        if workers == 1:
+            bundle = load_scoring_bundle(key)
+            results = (score_chunk(path, chunk, scored_at, bundle) for chunk in chunks)
+            for table in results:
+                writer.write_table(table)
+                rows += table.num_rows
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(registry.root), key)) as pool:
+                for table in pool.map(score_chunk, [path] * len(chunks), chunks,
+                                      [scored_at] * len(chunks)):
+                    writer.write_table(table)
+                    rows += table.num_rows
+    os.replace(partial, output)
+    return output, rows, time.perf_counter() - start
+
+
+# ========================================
+# PUBLICATION DANS ANALYTICS
+# ========================================
+
+def publish_snowflake(config, scores_path):
+    """Charger les scores dans ANALYTICS.customer_propensity_scores (PUT + COPY INTO)
+
+    Le chargement se fait dans une table de travail échangée ensuite avec la table lue par
+    le dashboard (SWAP) : les utilisateurs ne voient jamais une table à moitié chargée.
+    """
+    staging = f'{SCORES_TABLE}_loading'
+    conn = connect(config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("USE SCHEMA ANALYTICS")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {SCORES_TABLE} (
+                customer_name VARCHAR(200),
+                region VARCHAR(100),
+                propensity_score FLOAT,
+                propensity_band VARCHAR(20),
+                model_name VARCHAR(50),
+                scored_at TIMESTAMP_NTZ
+            )""")
+        cursor.execute(f"CREATE OR REPLACE TABLE {staging} LIKE {SCORES_TABLE}")
+        cursor.execute(
+            f"PUT 'file://{Path(scores_path).resolve().as_posix()}' @%{staging} "
+            f"AUTO_COMPRESS = FALSE OVERWRITE = TRUE"
+        )
+        cursor.execute(
+            f"COPY INTO {staging} FROM @%{staging} "
+            f"FILE_FORMAT = (TYPE = PARQUET) MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE"
+        )
+        cursor.execute(f"ALTER TABLE {staging} SWAP WITH {SCORES_TABLE}")
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        conn.close()
+    return f"ANALYTICS.{SCORES_TABLE}"
+
+
+def publish_local(scores_path, data_dir=LOCAL_DATA_DIR):
+    """Déposer les scores parmi les tables ANALYTICS du moteur local (Parquet)"""
+    target = Path(data_dir) / 'analytics' / f'{SCORES_TABLE}.parquet'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.tmp')
+    partial.write_bytes(Path(scores_path).read_bytes())
+    os.replace(partial, target)
+    return target
+
+
+def summarize(scores_path):
+    """Nombre de clients et score moyen par tranche"""
+    df = pd.read_parquet(scores_path, columns=['PROPENSITY_BAND', 'PROPENSITY_SCORE'])
+    return df.groupby('PROPENSITY_BAND')['PROPENSITY_SCORE'].agg(['count', 'mean']).reindex(SCORE_BANDS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Propension à l'achat : entraînement et scoring par lots")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in [('train', "Entraîner et sauvegarder le modèle"),
+                            ('score', "Scorer toute la base clients et publier les probabilités")]:
+        cmd = sub.add_parser(name, help=help_text)
+        source = cmd.add_mutually_exclusive_group()
+        source.add_argument('--secrets', default='.streamlit/secrets.toml', help="Fichier secrets.toml")
+        source.add_argument('--parquet', help="Fichier Parquet des clients (feature_store.py export)")
+        cmd.add_argument('--plots', help="Dossier où écrire les graphiques en PNG (aucun graphique par défaut)")
+    train_cmd = sub.choices['train']
+    train_cmd.add_argument('--train-rows', type=int, default=TRAIN_ROWS,
+                           help="Clients tirés pour l'entraînement (0 = tous)")
+    train_cmd.add_argument('--retrain', action='store_true',
+                           help="Réentraîner même si le registre contient déjà ces données et paramètres")
+    score_cmd = sub.choices['score']
+    score_cmd.add_argument('--key', help="Version du modèle dans le registre (défaut : la dernière)")
+    score_cmd.add_argument('--workers', type=int, help="Processus de scoring (défaut : nb de CPU)")
+    score_cmd.add_argument('--chunk-rows', type=int, default=SCORE_CHUNK_ROWS, help="Clients par tâche")
+    score_cmd.add_argument('--output', default=str(SCORES_FILE), help="Fichier Parquet des scores")
+    score_cmd.add_argument('--local-data', default=str(LOCAL_DATA_DIR),
+                           help="Avec --parquet : dossier Parquet du moteur local où publier les scores")
+    args = parser.parse_args(argv)
+
+    if args.parquet is None and not SNOWFLAKE_AVAILABLE:
+        print("❌ snowflake-connector-python n'est pas installé (utiliser --parquet)")
+        return 1
+    config = None if args.parquet else get_snowflake_config(args.secrets)
+
+    if args.command == 'train':
+        start = time.perf_counter()
+        df = load_training_data(config, parquet=args.parquet, rows=args.train_rows)
+        timings = {'load': time.perf_counter() - start}
+        print(f"📊 {len(df):,} clients chargés (taux d'achat {df[TARGET_COL].mean() * 100:.1f}%)")
+        try:
+            trained, key, _ = train_or_reuse(df, force=args.retrain)
+        except ValueError as e:
+            print(f"❌ Entraînement impossible : {e}")
+            return 1
+        print("\n Performance des Modèles:")
+        print(trained['results'].round(4).to_string(index=False))
+        print(f"✅ Meilleur modèle : {trained['best_model']} (version {key} du registre)")
+        timings.update(trained['timings'])
+        if args.plots:
+            import plots
+            start = time.perf_counter()
+            paths = plots.write_figures(lambda: plots.propensity_figures(trained, df, TARGET_COL), args.plots)
+            timings['plots'] = time.perf_counter() - start
+            print(f"🖼️  {len(paths)} graphique(s) → {args.plots}")
+        print("⏱️  " + ", ".join(f"{step} {seconds:.1f} s" for step, seconds in timings.items()))
+        return 0
+
+    if registry.metadata(MODEL_NAME, args.key) is None:
+        print(f"❌ Modèle introuvable dans le registre {registry.root} (lancer d'abord la commande train)")
+        return 1
+    timings = {}
+    if args.parquet:
+        path = Path(args.parquet)
+    else:
+        start = time.perf_counter()
+        path = spill_snowflake_query(config, SCORING_QUERY, SPILL_FILE)
+        timings['extract'] = time.perf_counter() - start
+    scores_path, rows, seconds = score_customers(path, args.key, args.output, workers=args.workers,
+                                                 chunk_rows=args.chunk_rows)
+    timings['score'] = seconds
+    print(f"✅ {rows:,} clients scorés en {seconds:.1f} s ({rows / max(seconds, 1e-9):,.0f} clients/s)")
+    print(summarize(scores_path).round(4).to_string())
+    start = time.perf_counter()
+    target = publish_local(scores_path, args.local_data) if args.parquet else publish_snowflake(config, scores_path)
+    timings['publish'] = time.perf_counter() - start
+    print(f"💾 Scores publiés → {target}")
+    if args.plots:
+        import plots
+        start = time.perf_counter()
+        scores = pd.read_parquet(scores_path, columns=['PROPENSITY_SCORE'])['PROPENSITY_SCORE']
+        paths = plots.write_figures(lambda: plots.score_distribution_figure(scores, SCORE_BINS), args.plots)
+        timings['plots'] = time.perf_counter() - start
+        print(f"🖼️  {len(paths)} graphique(s) → {args.plots}")
+    print("⏱️  " + ", ".join(f"{step} {seconds:.1f} s" for step, seconds in timings.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+AnyCompany Food & Beverage - Pipelines ML planifiés
+Lance sans affichage les scripts issus des notebooks (segmentation, propension à l'achat,
+réponse aux promotions), chacun dans son propre processus : un job en échec n'arrête pas
+les autres. Sortie de chaque job dans data/logs/pipelines/<run_id>/<job>.log, bilan
+(statut et durée par job) dans summary.json ; code de sortie 1 si un job échoue.
+
+Usage :
+    python ml/run_pipelines.py --secrets .streamlit/secrets.toml
+    python ml/run_pipelines.py --local-data data/local --refresh-features --parallel 3
+    python ml/run_pipelines.py --jobs propensity --plots data/ml/plots --retrain
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from feature_store import DATA_DIR, ML_DIR, STREAMLIT_DIR, export_local
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+LOG_DIR = Path(os.environ.get('ANYCOMPANY_PIPELINE_LOGS', ML_DIR.parent / 'data' / 'logs' / 'pipelines'))
+
+# Étapes de chaque job : (arguments du script, fichier Parquet lu avec --local-data).
+# Les étapes d'un même job s'enchaînent ; les jobs sont indépendants.
+JOBS = {
+    'segmentation': [
+        (['customer_segmentation.py'], 'customer_features.parquet'),
+    ],
+    'propensity': [
+        (['purchase_propensity.py', 'train'], 'purchase_propensity_training.parquet'),
+        (['purchase_propensity.py', 'score'], 'purchase_propensity_data.parquet'),
+    ],
+    'promotion_response': [
+        (['promotion_response.py'], 'promotion_response_data.parquet'),
+    ],
+}
+
+CSV_SCRIPTS = {'customer_segmentation.py', 'promotion_response.py'}  # Acceptent --output (dossier des CSV)
+
+
+# ========================================
+# EXÉCUTION
+# ========================================
+
+def step_command(step, input_file, args, plots_dir=None):
+    """Ligne de commande d'une étape selon la source (Snowflake ou moteur local)"""
+    script, *step_args = step
+    scoring = step_args[:1] == ['score']
+    command = [sys.executable, str(ML_DIR / script), *step_args]
+    if args.local_data:
+        command += ['--parquet', str(Path(args.inputs) / input_file)]
+        if scoring:
+            command += ['--local-data', str(args.local_data)]
+    else:
+        command += ['--secrets', str(Path(args.secrets).resolve())]
+    if args.retrain and not scoring:
+        command.append('--retrain')
+    if args.output and script in CSV_SCRIPTS:
+        command += ['--output', str(args.output)]
+    if plots_dir:
+        command += ['--plots', str(plots_dir)]
+    return command
+
+
+def run_job(name, args, run_dir):
+    """Enchaîner les étapes d'un job ; s'arrête à la première en échec"""
+    log_path = run_dir / f'{name}.log'
+    plots_dir = Path(args.plots) / name if args.plots else None
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONUNBUFFERED='1')
+    start = time.perf_counter()
+    returncode = 0
+    with open(log_path, 'w', encoding='utf-8') as log:
+        for step, input_file in JOBS[name]:
+            command = step_command(step, input_file, args, plots_dir)
+            log.write(f"$ {' '.join(command)}\n")
+            log.flush()
+            returncode = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=env).returncode
+            if returncode != 0:
+                break
+    return {
+        'status': 'ok' if returncode == 0 else 'failed',
+        'returncode': returncode,
+        'seconds': round(time.perf_counter() - start, 1),
+        'log': str(log_path),
+    }
+
+
+def run_pipelines(args):
+    """Préparer les entrées puis lancer les jobs demandés ; retourne le bilan du run"""
+    run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    run_dir = Path(args.log_dir) / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    summary = {
+        'run_id': run_id,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'source': 'local' if args.local_data else 'snowflake',
+        'timings': {},
+        'jobs': {},
+    }
+
+    if args.local_data:
+        if args.refresh_features:
+            if str(STREAMLIT_DIR) not in sys.path:
+                sys.path.append(str(STREAMLIT_DIR))
+            import local_engine
+            start = time.perf_counter()
+            local_engine.refresh_features(args.local_data)
+            summary['timings']['refresh_features'] = round(time.perf_counter() - start, 1)
+        start = time.perf_counter()
+        export_local(args.local_data, args.inputs)
+        summary['timings']['export'] = round(time.perf_counter() - start, 1)
+
+    jobs = args.jobs or list(JOBS)
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as pool:
+        futures = {name: pool.submit(run_job, name, args, run_dir) for name in jobs}
+        for name, future in futures.items():
+            summary['jobs'][name] = result = future.result()
+            icon = '✅' if result['status'] == 'ok' else '❌'
+            print(f"{icon} {name} : {result['seconds']:.1f} s ({result['log']})")
+
+    summary['finished_at'] = datetime.now().isoformat(timespec='seconds')
+    (run_dir / 'summary.json').write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lancer les pipelines ML sans affichage")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--secrets', default='.streamlit/secrets.toml', help="Fichier secrets.toml (Snowflake)")
+    source.add_argument('--local-data', help="Dossier Parquet du moteur local (au lieu de Snowflake)")
+    parser.add_argument('--refresh-features', action='store_true',
+                        help="Avec --local-data : rafraîchir le feature store avant l'export")
+    parser.add_argument('--inputs', default=str(DATA_DIR),
+                        help="Avec --local-data : dossier des entrées Parquet exportées")
+    parser.add_argument('--jobs', nargs='+', choices=list(JOBS), help="Jobs à lancer (défaut : tous)")
+    parser.add_argument('--parallel', type=int, default=1, help="Jobs lancés en même temps")
+    parser.add_argument('--retrain', action='store_true', help="Réentraîner même si le registre est à jour")
+    parser.add_argument('--output', help="Dossier des fichiers CSV de résultats (défaut : celui de chaque script)")
+    parser.add_argument('--plots', help="Dossier des graphiques PNG, un sous-dossier par job")
+    parser.add_argument('--log-dir', default=str(LOG_DIR), help="Dossier des journaux d'exécution")
+    args = parser.parse_args(argv)
+
+    summary = run_pipelines(args)
+    failed = [name for name, job in summary['jobs'].items() if job['status'] != 'ok']
+    if failed:
+        print(f"❌ {len(failed)} job(s) en échec : {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+AnyCompany Food & Beverage - Simulation vectorisée des scénarios de remise
+Évalue une grille remises × segments clients × régions avec le modèle de réponse aux
+promotions en un seul appel à predict, sur une matrice de features de référence gardée
+en mémoire (échantillon de test de promotion_response.py)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_registry import artifact_name, registry
+from promotion_response import (
+    FEATURE_COLS, MODEL_NAME, SEGMENT_BINS, SEGMENT_LABELS, predict
+)
+
+ENGINE_ARTIFACT = 'scenario_engine'  # Artefact ajouté à la version du modèle dans le registre
+
+# Grille par défaut du simulateur : 0 % (sans promotion) à 30 % par pas de 1 %
+DEFAULT_GRID = np.round(np.arange(0, 0.31, 0.01), 2)
+
+# Lignes de la matrice de référence sauvegardée pour le dashboard
+ENGINE_ROWS = 20_000
+
+_COL = {name: i for i, name in enumerate(FEATURE_COLS)}
+
+
+class ScenarioEngine:
+    """Prédictions de panier pour une grille de remises, agrégées par segment et région
+
+    La matrice de référence (une ligne par transaction de l'échantillon) est convertie une
+    fois en tableau numpy. Pour K remises, elle est répétée K fois, les colonnes de
+    promotion sont réécrites en bloc et le modèle est appelé une seule fois sur les
+    K × n lignes. Les prédictions sont gardées par remise : un nouveau balayage ne
+    recalcule que les remises jamais vues.
+
+    Une remise de 0 correspond au scénario « Sans Promotion » (HAS_PROMOTION = 0).
+    """
+
+    def __init__(self, model_name, model, base_features, scaler=None, region_classes=None, predictions=None):
+        self.model_name = model_name
+        self.model = model
+        self.scaler = scaler
+        self.base = base_features[FEATURE_COLS].to_numpy(dtype='float64', copy=True)
+        self.segment_codes = pd.cut(
+            base_features['CUSTOMER_PURCHASE_HISTORY'], bins=SEGMENT_BINS, labels=SEGMENT_LABELS
+        ).cat.codes.to_numpy(dtype=np.int64)
+        self.region_codes = base_features['region_encoded'].to_numpy(dtype=np.int64)
+        self.region_names = np.asarray(
+            region_classes if region_classes is not None else np.unique(self.region_codes).astype(str),
+            dtype=object
+        )
+        self._predictions = dict(predictions or {})
+
+    @property
+    def rows(self):
+        return len(self.base)
+
+    def _scenario_matrix(self, discounts):
+        """Matrice (K × n, features) des K scénarios, colonnes de promotion réécrites en bloc"""
+        discounts = np.asarray(discounts, dtype='float64')
+        X = np.repeat(self.base[None, :, :], len(discounts), axis=0)
+        has_promo = (discounts > 0).astype('float64')[:, None]
+        X[:, :, _COL['HAS_PROMOTION']] = has_promo
+        X[:, :, _COL['DISCOUNT_PERCENTAGE']] = discounts[:, None]
+        X[:, :, _COL['promo_x_history']] = has_promo * self.base[None, :, _COL['CUSTOMER_PURCHASE_HISTORY']]
+        X[:, :, _COL['discount_x_avg_spend']] = discounts[:, None] * self.base[None, :, _COL['CUSTOMER_AVG_SPEND']]
+        return X.reshape(-1, len(FEATURE_COLS))
+
+    def predictions(self, discounts):
+        """Prédictions (K, n) pour les remises demandées, calculées en un seul predict"""
+        discounts = [round(float(d), 4) for d in discounts]
+        missing = sorted({d for d in discounts if d not in self._predictions})
+        if missing:
+            X = pd.DataFrame(self._scenario_matrix(missing), columns=FEATURE_COLS)
+            predicted = predict(self.model_name, self.model, X, self.scaler).reshape(len(missing), -1)
+            self._predictions.update(zip(missing, predicted))
+        return np.vstack([self._predictions[d] for d in discounts])
+
+    def sweep(self, discounts=DEFAULT_GRID, by=('SEGMENT', 'REGION'), segments=None, regions=None):
+        """Balayer une grille de remises ; une ligne par remise × groupe
+
+        by       : dimensions d'agrégation parmi 'SEGMENT' et 'REGION' (vide = total)
+        segments : segments retenus (None = tous) ; regions : idem pour les régions
+        LIFT_PCT compare chaque remise au scénario sans promotion du même groupe.
+        """
+        discounts = sorted({round(float(d), 4) for d in discounts} | {0.0})
+        preds = self.predictions(discounts)
+
+        mask = np.ones(self.rows, dtype=bool)
+        if segments is not None:
+            mask &= np.isin(self.segment_codes, [SEGMENT_LABELS.index(s) for s in segments])
+        if segments is not None or 'SEGMENT' in by:
+            mask &= self.segment_codes >= 0  # Historique hors des tranches de SEGMENT_BINS
+        if regions is not None or 'REGION' in by:
+            mask &= self.region_codes >= 0  # Régions inconnues de l'encodeur
+        if regions is not None:
+            mask &= np.isin(self.region_names[self.region_codes.clip(0)], list(regions))
+
+        # Identifiant de groupe par ligne, puis un seul bincount sur (remise, groupe)
+        dims = {'SEGMENT': (self.segment_codes, np.array(SEGMENT_LABELS, dtype=object)),
+                'REGION': (self.region_codes, self.region_names)}
+        group = np.zeros(self.rows, dtype=np.int64)
+        sizes = []
+        for dim in by:
+            codes, labels = dims[dim]
+            group = group * len(labels) + codes.clip(0)
+            sizes.append(len(labels))
+        n_groups = int(np.prod(sizes)) if sizes else 1
+
+        k = len(discounts)
+        flat_group = (np.arange(k)[:, None] * n_groups + group[None, :])[:, mask].ravel()
+        revenue = np.bincount(flat_group, weights=preds[:, mask].ravel(), minlength=k * n_groups)
+        revenue = revenue.reshape(k, n_groups)
+        counts = np.bincount(group[mask], minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = (revenue / revenue[discounts.index(0.0)] - 1) * 100
+
+        result = pd.DataFrame({
+            'DISCOUNT': np.repeat(discounts, n_groups),
+            'TRANSACTIONS': np.tile(counts, k),
+            'TOTAL_REVENUE': revenue.ravel(),
+            'LIFT_PCT': lift.ravel(),
+        })
+        remaining = np.arange(n_groups)
+        for dim, size in reversed(list(zip(by, sizes))):
+            result[dim] = np.tile(dims[dim][1][remaining % size], k)
+            remaining = remaining // size
+        result = result[result['TRANSACTIONS'] > 0].reset_index(drop=True)
+        result['AVG_TRANSACTION'] = result['TOTAL_REVENUE'] / result['TRANSACTIONS']
+        return result[['DISCOUNT', *by, 'TRANSACTIONS', 'AVG_TRANSACTION', 'TOTAL_REVENUE', 'LIFT_PCT']]
+
+
+# ========================================
+# SAUVEGARDE / CHARGEMENT
+# ========================================
+
+def save_engine_inputs(trained, key, rows=ENGINE_ROWS, grid=DEFAULT_GRID):
+    """Ajouter à la version `key` du registre la matrice de référence (rows lignes de
+    l'échantillon de test) et les prédictions de la grille par défaut du meilleur modèle
+
+    Les prédictions sont calculées ici, hors du dashboard : un balayage de la grille
+    par défaut n'est plus qu'une agrégation au moment de l'affichage. Rien n'est recalculé
+    si la version contient déjà ces entrées (modèle réutilisé depuis le registre).
+    """
+    grid = [round(float(d), 4) for d in grid]
+    if ENGINE_ARTIFACT in registry.metadata(MODEL_NAME, key)['artifacts']:
+        saved = registry.load(MODEL_NAME, key, artifacts=[ENGINE_ARTIFACT])[ENGINE_ARTIFACT]
+        if saved['rows'] == rows and saved['grid'] == grid:
+            return key
+    name = trained['best_model']
+    base = trained['test_sample'][FEATURE_COLS]
+    if len(base) > rows:
+        base = base.sample(n=rows, random_state=0)
+    engine = ScenarioEngine(name, trained['models'][name], base, scaler=trained['scaler'],
+                            region_classes=trained['region_encoder'].classes_)
+    engine.predictions(grid)
+    registry.add_artifacts(MODEL_NAME, key, {ENGINE_ARTIFACT: {
+        'model_name': name,
+        'region_classes': engine.region_names,
+        'base_features': base,
+        'predictions': engine._predictions,
+        'rows': rows,
+        'grid': grid,
+    }})
+    return key
+
+
+def load_engine(key=None):
+    """Recréer le moteur (et son cache de prédictions) depuis le registre (dernière version par défaut)
+
+    Seuls le meilleur modèle, le scaler et les entrées du moteur sont lus, en mmap.
+    """
+    bundle = registry.load(MODEL_NAME, key, artifacts=[ENGINE_ARTIFACT, 'scaler'])
+    engine_inputs = bundle[ENGINE_ARTIFACT]
+    model_artifact = artifact_name(engine_inputs['model_name'])
+    model = registry.load(MODEL_NAME, key, artifacts=[model_artifact])[model_artifact]
+    return ScenarioEngine(engine_inputs['model_name'], model, engine_inputs['base_features'],
+                          scaler=bundle['scaler'], region_classes=engine_inputs['region_classes'],
+                          predictions=engine_inputs['predictions'])
+
+
+def has_engine(key=None):
+    """Vrai si la version (la dernière par défaut) contient les entrées du simulateur"""
+    meta = registry.metadata(MODEL_NAME, key)
+    return meta is not None and ENGINE_ARTIFACT in meta['artifacts']
+
+
+def timed_sweep(engine, *args, **kwargs):
+    """sweep() et sa durée en secondes"""
+    start = time.perf_counter()
+    result = engine.sweep(*args, **kwargs)
+    return result, time.perf_counter() - start
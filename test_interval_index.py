@@ -0,0 +1,119 @@
+"""
+Moteur de chevauchement (Streamlit/interval_index.py) comparé à une jointure par plage
+de dates en pandas : intervalle retenu, nombre de chevauchements et pondération
+de campaign_sales_impact
+
+    python -m pytest test_interval_index.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'Streamlit'))
+
+from interval_index import (CAMPAIGN_PRIORITY, PROMOTION_PRIORITY, RegionIntervalIndex,  # noqa: E402
+                            campaign_sales_impact, flag_campaigns)
+
+PROMOTIONS = pd.DataFrame([
+    # Europe : P1 et P2 se chevauchent, P3 a la même remise que P2 mais commence plus tard,
+    # P4 commence le lendemain de la fin de P1
+    ('P1', 'Europe', '2024-01-01', '2024-01-10', 10.0),
+    ('P2', 'Europe', '2024-01-05', '2024-01-20', 15.0),
+    ('P3', 'Europe', '2024-01-08', '2024-01-08', 15.0),
+    ('P4', 'Europe', '2024-01-11', '2024-01-11', 5.0),
+    # Asia : deux promotions identiques, départagées par l'id
+    ('P6', 'Asia', '2024-02-01', '2024-02-03', 20.0),
+    ('P5', 'Asia', '2024-02-01', '2024-02-03', 20.0),
+], columns=['PROMOTION_ID', 'REGION', 'START_DATE', 'END_DATE', 'DISCOUNT_PERCENTAGE'])
+
+CAMPAIGNS = pd.DataFrame([
+    ('C1', 'Europe', '2024-01-01', '2024-01-31', 'Email'),
+    ('C2', 'Europe', '2024-01-15', '2024-02-15', 'TV'),
+    ('C3', 'Europe', '2024-01-15', '2024-01-15', 'Print'),
+    ('C4', 'Asia', '2024-02-02', '2024-02-02', 'Social Media'),
+], columns=['CAMPAIGN_ID', 'REGION', 'START_DATE', 'END_DATE', 'CAMPAIGN_TYPE'])
+
+
+def _transactions():
+    """Chaque jour autour des bornes, dans deux régions indexées et une région sans intervalle"""
+    days = pd.date_range('2023-12-30', '2024-02-17', freq='D')
+    regions = ['Europe', 'Asia', 'Africa']
+    grid = pd.MultiIndex.from_product([regions, days], names=['REGION', 'TRANSACTION_DATE']).to_frame(index=False)
+    grid['TRANSACTION_ID'] = np.arange(len(grid))
+    grid['AMOUNT'] = 10.0 + grid['TRANSACTION_ID'] % 7
+    return grid
+
+
+def _range_join(transactions, intervals, key_col, priority):
+    """Référence : toutes les paires (vente, intervalle actif), puis l'intervalle prioritaire"""
+    intervals = intervals.assign(START_DATE=pd.to_datetime(intervals['START_DATE']),
+                                 END_DATE=pd.to_datetime(intervals['END_DATE']))
+    pairs = transactions.merge(intervals, on='REGION')
+    pairs = pairs[(pairs['TRANSACTION_DATE'] >= pairs['START_DATE'])
+                  & (pairs['TRANSACTION_DATE'] <= pairs['END_DATE'])]
+    overlaps = pairs.groupby('TRANSACTION_ID').size()
+    best = (pairs.sort_values([col for col, _ in priority], ascending=[best for _, best in priority])
+            .drop_duplicates('TRANSACTION_ID').set_index('TRANSACTION_ID')[key_col])
+    ids = transactions['TRANSACTION_ID']
+    return ids.map(best).to_numpy(dtype=object), ids.map(overlaps).fillna(0).astype('int64').to_numpy()
+
+
+def _lookup_keys(intervals, key_col, priority, transactions):
+    index = RegionIntervalIndex(intervals, key_col, priority)
+    positions, overlaps = index.lookup(transactions['REGION'], transactions['TRANSACTION_DATE'])
+    keys = np.full(len(positions), None, dtype=object)
+    keys[positions >= 0] = index.intervals[key_col].to_numpy(dtype=object)[positions[positions >= 0]]
+    return keys, overlaps
+
+
+def _assert_same_keys(actual, expected):
+    assert [None if pd.isna(k) else k for k in actual] == [None if pd.isna(k) else k for k in expected]
+
+
+def test_promotion_lookup_matches_range_join():
+    transactions = _transactions()
+    keys, overlaps = _lookup_keys(PROMOTIONS, 'PROMOTION_ID', PROMOTION_PRIORITY, transactions)
+    expected_keys, expected_overlaps = _range_join(transactions, PROMOTIONS, 'PROMOTION_ID', PROMOTION_PRIORITY)
+    _assert_same_keys(keys, expected_keys)
+    np.testing.assert_array_equal(overlaps, expected_overlaps)
+
+
+def test_campaign_lookup_matches_range_join():
+    transactions = _transactions()
+    keys, overlaps = _lookup_keys(CAMPAIGNS, 'CAMPAIGN_ID', CAMPAIGN_PRIORITY, transactions)
+    expected_keys, expected_overlaps = _range_join(transactions, CAMPAIGNS, 'CAMPAIGN_ID', CAMPAIGN_PRIORITY)
+    _assert_same_keys(keys, expected_keys)
+    np.testing.assert_array_equal(overlaps, expected_overlaps)
+
+
+def test_boundary_dates():
+    transactions = pd.DataFrame({
+        'REGION': ['Europe', 'Europe', 'Europe', 'Europe', 'Europe', 'Asia', 'Africa'],
+        'TRANSACTION_DATE': ['2023-12-31', '2024-01-01', '2024-01-10', '2024-01-11', '2024-01-21',
+                             '2024-02-03', '2024-01-05'],
+    })
+    keys, overlaps = _lookup_keys(PROMOTIONS, 'PROMOTION_ID', PROMOTION_PRIORITY, transactions)
+    # Veille du début, premier jour, dernier jour de P1 (P2 l'emporte), lendemain de P1 (P4 et P2),
+    # lendemain de la fin de P2, égalité départagée par l'id, région sans promotion
+    assert list(keys) == [None, 'P1', 'P2', 'P2', None, 'P5', None]
+    assert list(overlaps) == [0, 1, 2, 2, 0, 2, 0]
+
+
+def test_campaign_sales_impact_counts_each_overlapping_campaign():
+    transactions = _transactions()
+    impact = campaign_sales_impact(flag_campaigns(transactions, CAMPAIGNS)).set_index('CAMPAIGN_STATUS')
+
+    intervals = CAMPAIGNS.assign(START_DATE=pd.to_datetime(CAMPAIGNS['START_DATE']),
+                                 END_DATE=pd.to_datetime(CAMPAIGNS['END_DATE']))
+    pairs = transactions.merge(intervals, on='REGION')
+    pairs = pairs[(pairs['TRANSACTION_DATE'] >= pairs['START_DATE'])
+                  & (pairs['TRANSACTION_DATE'] <= pairs['END_DATE'])]
+    outside = transactions[~transactions['TRANSACTION_ID'].isin(pairs['TRANSACTION_ID'])]
+
+    assert impact.loc['Pendant Campagne', 'NUMBER_OF_SALES'] == len(pairs)
+    assert impact.loc['Pendant Campagne', 'TOTAL_SALES'] == pairs['AMOUNT'].sum()
+    assert impact.loc['Hors Campagne', 'NUMBER_OF_SALES'] == len(outside)
+    assert impact.loc['Hors Campagne', 'TOTAL_SALES'] == outside['AMOUNT'].sum()